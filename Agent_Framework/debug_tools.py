@@ -0,0 +1,150 @@
+# Agent_Framework/debug_tools.py
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Optional
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005, max_depth: int = 64) -> Dict[str, Any]:
+    """Sample every thread's stack for `seconds`; returns collapsed stacks (flamegraph.pl format).
+
+    Runs in the calling thread, so call it via asyncio.to_thread; nothing is
+    installed in the profiled code, so there is no cost outside a profile.
+    """
+    me = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    stacks: Counter = Counter()
+    samples = 0
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            parts = []
+            while frame is not None and len(parts) < max_depth:
+                parts.append(_frame_label(frame))
+                frame = frame.f_back
+            parts.append(names.get(ident, str(ident)))
+            stacks[";".join(reversed(parts))] += 1
+        samples += 1
+        time.sleep(interval)
+    return {
+        "seconds": seconds,
+        "interval_ms": interval * 1000,
+        "samples": samples,
+        "collapsed": "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()),
+    }
+
+
+async def profile_event_loop(seconds: float, sort: str = "cumulative", limit: int = 40) -> Dict[str, Any]:
+    """cProfile the event-loop thread (where handlers run) for `seconds`; returns pstats text"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.disable()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats(sort).print_stats(limit)
+    return {"seconds": seconds, "sort": sort, "pstats": out.getvalue()}
+
+
+class MemoryTracker:
+    """tracemalloc is only switched on between start() and stop(), since tracing slows allocation"""
+
+    def __init__(self):
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    def start(self, frames: int = 10) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._baseline = tracemalloc.take_snapshot()
+        return self.status()
+
+    def diff(self, top: int = 20, key_type: str = "lineno") -> Dict[str, Any]:
+        """Top allocation sites grown since the previous start()/diff() call"""
+        if not tracemalloc.is_tracing() or self._baseline is None:
+            raise RuntimeError("Memory tracing is not running; call start first")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        stats = snapshot.compare_to(self._baseline, key_type)
+        self._baseline = snapshot
+        return {
+            **self.status(),
+            "top": [
+                {
+                    "site": str(stat.traceback[0]) if stat.traceback else "?",
+                    "size_diff_kb": round(stat.size_diff / 1024, 1),
+                    "size_kb": round(stat.size / 1024, 1),
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:top]
+            ],
+        }
+
+    def stop(self) -> Dict[str, Any]:
+        self._baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return self.status()
+
+    @staticmethod
+    def status() -> Dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {"tracing": tracing, "traced_kb": round(current / 1024, 1), "peak_kb": round(peak / 1024, 1)}
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic timer fires, i.e. how long the loop was blocked"""
+
+    def __init__(self, interval: float = 0.25, window: int = 240):
+        self.interval = interval
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.max_lag_ms = 0.0
+        self.blocked_over_100ms = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.perf_counter() - start - self.interval) * 1000)
+            self.samples.append(lag_ms)
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            if lag_ms > 100:
+                self.blocked_over_100ms += 1
+
+    def stats(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+
+        def pct(p: float) -> Optional[float]:
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))], 2) if ordered else None
+
+        return {
+            "interval_ms": self.interval * 1000,
+            "window_samples": len(ordered),
+            "p50_ms": pct(50),
+            "p99_ms": pct(99),
+            "recent_max_ms": round(ordered[-1], 2) if ordered else None,
+            "max_since_start_ms": round(self.max_lag_ms, 2),
+            "blocked_over_100ms": self.blocked_over_100ms,
+        }
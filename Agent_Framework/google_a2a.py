@@ -1,15 +1,21 @@
 import json
 import asyncio
+import hmac
+import os
+import time
 import uuid
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Union, Callable
 from dataclasses import dataclass, field, asdict
 from enum import Enum
 from datetime import datetime
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel, Field
-import uvicorn
-import aiohttp
-import requests
+from utils.prompt_budget import PromptBudgetManager
+from utils.shared_store import SharedCache, SharedMetrics, DEFAULT_STATE_DIR
+from utils.rate_limiter import SharedRateLimiter
+from utils.deadlines import DeadlineExceeded, ClientDisconnected, deadline_from_budget, run_cancellable
+from utils.event_log import configure_event_log, get_event_log, get_correlation_id, bind_correlation_id, timed_event
 
 class MessageType(str, Enum):
     """Google A2A Protocol message types"""
@@ -61,6 +67,8 @@ class A2AMessage(BaseModel):
     timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
     protocol_version: str = "google-a2a-v1"
     correlation_id: Optional[str] = None
+    # Milliseconds the sender can still wait for this hop; None means no deadline
+    deadline_budget_ms: Optional[float] = None
 
 class A2AResponse(BaseModel):
     """Google A2A Protocol response format"""
@@ -71,14 +79,68 @@ class A2AResponse(BaseModel):
     error_message: Optional[str] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
+# Payload fields that affect how a call is run but not its result
+_UNCACHED_PAYLOAD_KEYS = {"latency_budget_ms"}
+
 class GoogleA2AServer:
     """Google A2A Protocol compliant server"""
     
-    def __init__(self, agent: A2AAgent):
+    def __init__(self, agent: A2AAgent, config: Optional[Dict[str, Any]] = None):
         self.agent = agent
+        self.config = config or {}
         self.app = FastAPI(title=f"{agent.name} A2A Server")
         self.capabilities: Dict[str, A2ACapability] = {}
+        # Capability name -> bound handler, resolved once at registration
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self.prompt_budget = PromptBudgetManager(self.config.get("prompt_budget"))
+        self._metrics_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._health_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        # Component name -> ready flag; the agent is ready once every component is
+        self.readiness: Dict[str, bool] = {}
+        self._startup_tasks: Dict[str, Callable[[], Any]] = {}
+        
+        # Request-path events go out as JSON lines from a background thread
+        configure_event_log(self.config.get("logging"), service=agent.agent_id)
+        self.register_metrics("event_log", lambda: get_event_log().stats())
+        
+        # Result cache and counters live in SQLite so every uvicorn worker shares them
+        cache_config = self.config.get("cache", {})
+        state_path = cache_config.get("path", f"{DEFAULT_STATE_DIR}/{agent.agent_id}.sqlite3")
+        self.cache = SharedCache(
+            state_path,
+            ttl_seconds=cache_config.get("ttl_seconds", 3600),
+            max_entries=cache_config.get("max_entries", 10000)
+        )
+        self.cacheable_capabilities = set(cache_config.get("capabilities", []))
+        self.shared_metrics = SharedMetrics(state_path)
+        self.register_metrics("shared", lambda: {
+            "counters": self.shared_metrics.snapshot(),
+            "cache": self.cache.stats()
+        })
+        
+        # Upstream model quota; every agent points at the same file so limits are project-wide
+        rate_limit_config = dict(self.config.get("rate_limit", {}))
+        if os.getenv("A2A_RATE_LIMIT_ENABLED") is not None:
+            rate_limit_config["enabled"] = os.getenv("A2A_RATE_LIMIT_ENABLED") != "0"
+        self.rate_limiter = SharedRateLimiter(**rate_limit_config)
+        self.register_metrics("rate_limit", self.rate_limiter.stats)
+        self.register_health("rate_limit", self.rate_limiter.stats)
+        # Invocations running in this process; reported to the registry as load
+        self.in_flight = 0
+        self.register_health("load", self.load)
         self._setup_routes()
+        
+        # Push registration and heartbeats to the agent registry, if one is configured
+        registry_config = self.config.get("registry", {})
+        registry_url = os.getenv("A2A_REGISTRY_URL", registry_config.get("url") or "")
+        if registry_url and registry_url != "0":
+            self._setup_registry_heartbeat(registry_url, registry_config.get("heartbeat_seconds", 5),
+                                           registry_config.get("token_env", "A2A_REGISTRY_TOKEN"))
+        
+        # Profiling endpoints exist only when switched on in config
+        self.debug_config = self.config.get("debug", {})
+        if self.debug_config.get("enabled", False):
+            self._setup_debug_routes()
     
     def _setup_routes(self):
         """Setup Google A2A Protocol standard endpoints"""
@@ -86,68 +148,273 @@ class GoogleA2AServer:
         @self.app.get("/a2a/discovery")
         async def discovery():
             """A2A Protocol agent discovery endpoint"""
-            return {
-                "agent": asdict(self.agent),
-                "capabilities": [asdict(cap) for cap in self.capabilities.values()],
-                "protocol_version": "google-a2a-v1",
-                "status": "active"
-            }
+            return self.discovery_document()
         
         @self.app.post("/a2a/invoke")
-        async def invoke(message: A2AMessage):
+        async def invoke(message: A2AMessage, request: Request):
             """A2A Protocol capability invocation endpoint"""
-            try:
-                # Validate capability exists
-                if message.capability_name not in self.capabilities:
-                    raise HTTPException(
-                        status_code=404, 
-                        detail=f"Capability '{message.capability_name}' not found"
-                    )
-                
-                capability = self.capabilities[message.capability_name]
-                
-                # Execute capability
-                result = await self._execute_capability(capability, message.payload)
-                
-                return A2AResponse(
-                    message_id=str(uuid.uuid4()),
-                    success=True,
-                    result=result,
-                    metadata={
-                        "capability": message.capability_name,
-                        "processed_at": datetime.utcnow().isoformat(),
-                        "correlation_id": message.correlation_id
-                    }
-                )
-                
-            except Exception as e:
-                return A2AResponse(
-                    message_id=str(uuid.uuid4()),
-                    success=False,
-                    error_code="EXECUTION_ERROR",
-                    error_message=str(e),
-                    metadata={"correlation_id": message.correlation_id}
-                )
+            with bind_correlation_id(message.correlation_id or message.message_id), \
+                    timed_event("a2a.invoke", capability=message.capability_name, sender=message.sender_id) as event:
+                return await self._invoke(message, request, event)
+        
+        @self.app.on_event("startup")
+        async def run_startup_tasks():
+            """Run deferred initialisation in the background so liveness answers immediately"""
+            for name, task in self._startup_tasks.items():
+                asyncio.create_task(self._run_startup_task(name, task))
         
         @self.app.get("/a2a/health")
         async def health():
             """A2A Protocol health check endpoint"""
+            # Providers read SQLite state, so collect them off the event loop
+            provided = await asyncio.to_thread(self._collect, self._health_providers)
             return {
                 "status": "healthy",
+                "ready": self.is_ready(),
                 "agent_id": self.agent.agent_id,
                 "capabilities_count": len(self.capabilities),
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": datetime.utcnow().isoformat(),
+                **provided
+            }
+        
+        @self.app.get("/a2a/health/live")
+        async def liveness():
+            """Liveness probe: the process is up and serving requests"""
+            return {"status": "alive", "agent_id": self.agent.agent_id}
+        
+        @self.app.get("/a2a/health/ready")
+        async def readiness():
+            """Readiness probe: deferred initialisation has finished"""
+            ready = self.is_ready()
+            body = {"status": "ready" if ready else "starting", "components": self.readiness}
+            return JSONResponse(body, status_code=200 if ready else 503)
+        
+        @self.app.get("/a2a/metrics")
+        async def metrics():
+            """Agent runtime metrics (model latency, caches, ...)"""
+            provided = await asyncio.to_thread(self._collect, self._metrics_providers)
+            return {
+                "agent_id": self.agent.agent_id,
+                "timestamp": datetime.utcnow().isoformat(),
+                **provided
             }
     
+    async def _invoke(self, message: A2AMessage, request: Request, event: Dict[str, Any]) -> A2AResponse:
+        """Run one invocation; fills `event` with the fields of its a2a.invoke log line"""
+        deadline = deadline_from_budget(message.deadline_budget_ms)
+        try:
+            # Refuse work the caller has already given up on
+            if message.deadline_budget_ms is not None and message.deadline_budget_ms <= 0:
+                raise DeadlineExceeded("Deadline already passed when the request arrived")
+        
+            # Validate capability exists
+            if message.capability_name not in self.capabilities:
+                raise HTTPException(
+                    status_code=404, 
+                    detail=f"Capability '{message.capability_name}' not found"
+                )
+        
+            capability = self.capabilities[message.capability_name]
+        
+            # Fit oversized inputs into the capability's prompt budget
+            payload, budget_report = self.prompt_budget.apply(message.capability_name, message.payload)
+            if message.deadline_budget_ms is not None:
+                # Handlers pass latency_budget_ms to the model router, which enforces it
+                requested = payload.get("latency_budget_ms")
+                payload = {**payload, "latency_budget_ms": min(message.deadline_budget_ms, requested or float("inf"))}
+        
+            self.shared_metrics.incr(f"invocations.{message.capability_name}")
+            result = None
+            cache_key = None
+            if message.capability_name in self.cacheable_capabilities:
+                cache_key = self.cache_key(message.capability_name, payload)
+                result = await self.cache.run(self.cache.get, cache_key)
+            cache_hit = result is not None
+            event["cache_hit"] = cache_hit
+        
+            # Execute capability
+            if not cache_hit:
+                # Stop generating if the caller disconnects or the deadline passes
+                self.in_flight += 1
+                try:
+                    result = await run_cancellable(request, self._execute_capability(capability, payload), deadline)
+                finally:
+                    self.in_flight -= 1
+                if cache_key:
+                    await self.cache.run(self.cache.set, cache_key, result)
+            self.shared_metrics.incr(f"cache_{'hits' if cache_hit else 'misses'}.{message.capability_name}")
+        
+            metadata = {
+                "capability": message.capability_name,
+                "processed_at": datetime.utcnow().isoformat(),
+                "correlation_id": message.correlation_id,
+                "cache_hit": cache_hit
+            }
+            if budget_report:
+                metadata["prompt_budget"] = budget_report
+        
+            return A2AResponse(
+                message_id=str(uuid.uuid4()),
+                success=True,
+                result=result,
+                metadata=metadata
+            )
+        
+        except Exception as e:
+            # A model timeout caused by the propagated budget is a deadline miss, not a failure
+            if not isinstance(e, ClientDisconnected) and deadline is not None and time.monotonic() >= deadline:
+                e = DeadlineExceeded(f"Deadline exceeded: {str(e)}")
+            if isinstance(e, DeadlineExceeded):
+                error_code, counter = "DEADLINE_EXCEEDED", "deadline_exceeded"
+            elif isinstance(e, ClientDisconnected):
+                error_code, counter = "CLIENT_DISCONNECTED", "disconnects"
+            else:
+                error_code, counter = "EXECUTION_ERROR", "errors"
+            self.shared_metrics.incr(f"{counter}.{message.capability_name}")
+            event.update(outcome=error_code.lower(), error=str(e)[:200], level="warning")
+            return A2AResponse(
+                message_id=str(uuid.uuid4()),
+                success=False,
+                error_code=error_code,
+                error_message=str(e),
+                metadata={"correlation_id": message.correlation_id}
+            )
+    
+    def _setup_debug_routes(self):
+        """Token-protected CPU, memory and event-loop diagnostics under /a2a/debug"""
+        from Agent_Framework.debug_tools import sample_stacks, profile_event_loop, MemoryTracker, LoopLagMonitor
+        
+        token_env = self.debug_config.get("token_env", "A2A_DEBUG_TOKEN")
+        max_seconds = self.debug_config.get("max_profile_seconds", 30)
+        memory = MemoryTracker()
+        loop_lag = LoopLagMonitor(interval=self.debug_config.get("loop_lag_interval_ms", 250) / 1000)
+        profile_lock = asyncio.Lock()
+        print(f"🩺 Debug endpoints enabled at /a2a/debug (token from ${token_env})")
+        
+        def authorize(request: Request):
+            expected = os.getenv(token_env)
+            if not expected:
+                raise HTTPException(status_code=403, detail=f"Set {token_env} to use debug endpoints")
+            if not hmac.compare_digest(request.headers.get("x-debug-token", ""), expected):
+                raise HTTPException(status_code=401, detail="Invalid debug token")
+        
+        @self.app.on_event("startup")
+        async def start_loop_lag_monitor():
+            loop_lag.start()
+        
+        @self.app.get("/a2a/debug/profile")
+        async def cpu_profile(request: Request, seconds: float = 5, mode: str = "sampling",
+                              interval_ms: float = 5, format: str = "json"):
+            """Sample all threads (collapsed stacks) or cProfile the event loop (pstats) for N seconds"""
+            authorize(request)
+            seconds = min(max(seconds, 0.1), max_seconds)
+            if profile_lock.locked():
+                raise HTTPException(status_code=409, detail="A profile is already running")
+            async with profile_lock:
+                if mode == "pstats":
+                    report = await profile_event_loop(seconds)
+                    text = report["pstats"]
+                else:
+                    report = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000)
+                    text = report["collapsed"]
+            return PlainTextResponse(text) if format == "text" else report
+        
+        @self.app.post("/a2a/debug/memory/start")
+        async def memory_start(request: Request, frames: int = 10):
+            authorize(request)
+            return memory.start(frames)
+        
+        @self.app.get("/a2a/debug/memory/diff")
+        async def memory_diff(request: Request, top: int = 20):
+            """Top allocation sites grown since the last start/diff call"""
+            authorize(request)
+            try:
+                return memory.diff(top)
+            except RuntimeError as e:
+                raise HTTPException(status_code=409, detail=str(e))
+        
+        @self.app.post("/a2a/debug/memory/stop")
+        async def memory_stop(request: Request):
+            authorize(request)
+            return memory.stop()
+        
+        @self.app.get("/a2a/debug/loop_lag")
+        async def loop_lag_stats(request: Request):
+            authorize(request)
+            return loop_lag.stats()
+    
+    def _setup_registry_heartbeat(self, url: str, interval: float, token_env: str):
+        from Agent_Framework.registry import RegistryHeartbeat
+        
+        endpoint = os.getenv("A2A_ADVERTISE_ENDPOINT", self.agent.endpoint)
+        heartbeat = RegistryHeartbeat(url, endpoint, self.discovery_document, self.load, interval=interval,
+                                      token_env=token_env)
+        
+        @self.app.on_event("startup")
+        async def start_heartbeat():
+            heartbeat.start()
+        
+        @self.app.on_event("shutdown")
+        async def stop_heartbeat():
+            await heartbeat.stop()
+    
+    def discovery_document(self) -> Dict[str, Any]:
+        return {
+            "agent": asdict(self.agent),
+            "capabilities": [asdict(cap) for cap in self.capabilities.values()],
+            "protocol_version": "google-a2a-v1",
+            "status": "active"
+        }
+    
+    def load(self) -> Dict[str, Any]:
+        """Load figures pushed with each registry heartbeat"""
+        return {"in_flight": self.in_flight, "ready": self.is_ready(), "pid": os.getpid()}
+    
     async def _execute_capability(self, capability: A2ACapability, payload: Dict[str, Any]):
-        """Execute a capability with given payload"""
-        # This will be overridden by specific agent implementations
-        raise NotImplementedError("Capability execution must be implemented by agent")
+        """Execute a capability with given payload via its registered handler"""
+        handler = self._handlers.get(capability.name)
+        if handler is None:
+            raise NotImplementedError(f"No handler registered for capability '{capability.name}'")
+        return await handler(payload)
     
     def register_capability(self, capability: A2ACapability, handler):
         """Register a capability with its handler"""
         self.capabilities[capability.name] = capability
+        self._handlers[capability.name] = handler
         setattr(self, f"_handle_{capability.name.replace(' ', '_').lower()}", handler)
+    
+    def cache_key(self, capability_name: str, payload: Dict[str, Any]) -> str:
+        """Cache key for a capability result, ignoring transient payload fields"""
+        stable = {k: v for k, v in payload.items() if k not in _UNCACHED_PAYLOAD_KEYS}
+        return SharedCache.make_key(self.agent.agent_id, capability_name, stable)
+    
+    def add_startup_task(self, name: str, task: Callable[[], Any]):
+        """Run a blocking initialisation step in a thread after the server starts"""
+        self.readiness[name] = False
+        self._startup_tasks[name] = task
+    
+    async def _run_startup_task(self, name: str, task: Callable[[], Any]):
+        try:
+            await asyncio.to_thread(task)
+            self.readiness[name] = True
+        except Exception as e:
+            print(f"❌ Startup task '{name}' failed: {str(e)}")
+    
+    def is_ready(self) -> bool:
+        return all(self.readiness.values())
+    
+    def register_metrics(self, name: str, provider: Callable[[], Dict[str, Any]]):
+        """Expose a metrics section under /a2a/metrics"""
+        self._metrics_providers[name] = provider
+    
+    def register_health(self, name: str, provider: Callable[[], Dict[str, Any]]):
+        """Expose a status section under /a2a/health"""
+        self._health_providers[name] = provider
+
+    @staticmethod
+    def _collect(providers: Dict[str, Callable[[], Dict[str, Any]]]) -> Dict[str, Any]:
+        """Call each status provider; they may block on SQLite, so run this in a worker thread"""
+        return {name: provider() for name, provider in providers.items()}
 
 class GoogleA2AClient:
     """Google A2A Protocol compliant client"""
@@ -155,6 +422,8 @@ class GoogleA2AClient:
     @staticmethod
     async def discover_agent(endpoint: str) -> Dict[str, Any]:
         """Discover agent capabilities using A2A protocol"""
+        import aiohttp
+        
         async with aiohttp.ClientSession() as session:
             async with session.get(f"{endpoint}/a2a/discovery") as response:
                 return await response.json()
@@ -165,7 +434,8 @@ class GoogleA2AClient:
         capability_name: str,
         payload: Dict[str, Any],
         sender_id: str = "orchestrator",
-        recipient_id: str = "agent"
+        recipient_id: str = "agent",
+        deadline_budget_ms: Optional[float] = None
     ) -> A2AResponse:
         """Invoke agent capability using A2A protocol"""
         
@@ -175,18 +445,40 @@ class GoogleA2AClient:
             recipient_id=recipient_id,
             capability_name=capability_name,
             payload=payload,
-            correlation_id=str(uuid.uuid4())
+            # Carry the caller's correlation id so every hop logs under the same id
+            correlation_id=get_correlation_id() or str(uuid.uuid4()),
+            deadline_budget_ms=deadline_budget_ms
         )
         
-        async with aiohttp.ClientSession() as session:
+        import aiohttp
+        
+        # Give the agent a moment past the budget to answer DEADLINE_EXCEEDED itself
+        session_kwargs = {}
+        if deadline_budget_ms is not None:
+            session_kwargs["timeout"] = aiohttp.ClientTimeout(total=deadline_budget_ms / 1000 + 2)
+        # Serialise and validate in pydantic-core rather than via intermediate dicts
+        async with aiohttp.ClientSession(**session_kwargs) as session:
             async with session.post(
                 f"{endpoint}/a2a/invoke",
-                json=message.model_dump()
+                data=message.model_dump_json(),
+                headers={"Content-Type": "application/json"}
             ) as response:
-                result = await response.json()
-                return A2AResponse(**result)
+                return A2AResponse.model_validate_json(await response.read())
 
 # ✅ Added function to start the FastAPI server
-def run_server(agent: GoogleA2AServer, host: str = "localhost", port: int = 8000):
-    """Run the Google A2A FastAPI server using Uvicorn"""
-    uvicorn.run(agent.app, host=host, port=port)
\ No newline at end of file
+def run_server(agent: Union[GoogleA2AServer, str], host: str = "localhost", port: int = 8000, workers: int = 1):
+    """Run the Google A2A FastAPI server using Uvicorn
+    
+    ``agent`` is either a server instance (single process) or the import string
+    of an app factory such as ``"Research_Agent.Research:create_app"``. With a
+    factory, uvicorn starts ``workers`` processes and each one builds its own
+    agent after forking, so models and config are never shared across processes.
+    """
+    import uvicorn
+    
+    if isinstance(agent, str):
+        uvicorn.run(agent, host=host, port=port, workers=workers, factory=True)
+    else:
+        if workers > 1:
+            raise ValueError("Multiple workers require an app factory import string")
+        uvicorn.run(agent.app, host=host, port=port)
\ No newline at end of file
@@ -0,0 +1,411 @@
+# Agent_Framework/registry.py
+"""Lightweight agent registry with push heartbeats.
+
+Agents (GoogleA2AServer) register their discovery document and push a
+heartbeat with load figures every few seconds. Subscribers get a snapshot
+followed by a stream of register/heartbeat/deregister/expire events, either
+in-process (AgentRegistry.subscribe) or over Server-Sent Events
+(GET /registry/events). The registry is mounted in app.py by default and
+can also run on its own:
+
+    python -m Agent_Framework.registry    # port A2A_REGISTRY_PORT, default 8010
+
+Register, heartbeat and deregister change where the orchestrator sends
+traffic, so they are authenticated: with $A2A_REGISTRY_TOKEN set, callers
+must send it in X-Registry-Token. Without a token, only loopback callers
+advertising loopback endpoints are accepted (the single-host default).
+"""
+import asyncio
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import socket
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urlparse
+
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+
+def agent_role(discovery: Dict[str, Any]) -> str:
+    """Role the orchestrator routes by: agent metadata "role", else the agent_id prefix"""
+    agent = discovery.get("agent", {})
+    return agent.get("metadata", {}).get("role") or agent.get("agent_id", "unknown").split("-")[0]
+
+
+class RegisterRequest(BaseModel):
+    instance_id: str
+    endpoint: str
+    discovery: Dict[str, Any]
+    load: Dict[str, Any] = Field(default_factory=dict)
+
+
+class HeartbeatRequest(BaseModel):
+    instance_id: str
+    load: Dict[str, Any] = Field(default_factory=dict)
+
+
+class DeregisterRequest(BaseModel):
+    instance_id: str
+
+
+class AgentRegistry:
+    """In-memory table of live agent instances; entries expire after ttl_seconds without a heartbeat"""
+
+    def __init__(self, ttl_seconds: float = 15.0, sweep_interval: float = 1.0, queue_size: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self.queue_size = queue_size
+        self.instances: Dict[str, Dict[str, Any]] = {}
+        self._subscribers: List[asyncio.Queue] = []
+        self._sweeper: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _public(entry: Dict[str, Any], with_discovery: bool = True) -> Dict[str, Any]:
+        return {k: v for k, v in entry.items() if with_discovery or k != "discovery"}
+
+    def _publish(self, event: str, entry: Dict[str, Any], with_discovery: bool = False):
+        message = {"event": event, "instance": self._public(entry, with_discovery)}
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A slow subscriber resynchronises from a fresh snapshot instead of blocking the registry
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot_event())
+
+    def register(self, instance_id: str, endpoint: str, discovery: Dict[str, Any],
+                 load: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        now = time.time()
+        known = instance_id in self.instances
+        entry = {
+            "instance_id": instance_id,
+            "agent_id": discovery.get("agent", {}).get("agent_id"),
+            "role": agent_role(discovery),
+            "endpoint": endpoint.rstrip("/"),
+            "discovery": discovery,
+            "load": load or {},
+            "registered_at": self.instances[instance_id]["registered_at"] if known else now,
+            "last_seen": now,
+        }
+        self.instances[instance_id] = entry
+        if not known:
+            print(f"🛰️ [Registry] {entry['role']} instance {instance_id} registered at {entry['endpoint']}")
+        self._publish("register", entry, with_discovery=True)
+        return entry
+
+    def heartbeat(self, instance_id: str, load: Optional[Dict[str, Any]] = None) -> bool:
+        """False if the instance is unknown (e.g. expired or the registry restarted), so it re-registers"""
+        entry = self.instances.get(instance_id)
+        if entry is None:
+            return False
+        entry["last_seen"] = time.time()
+        entry["load"] = load or {}
+        self._publish("heartbeat", entry)
+        return True
+
+    def deregister(self, instance_id: str, reason: str = "deregister") -> bool:
+        entry = self.instances.pop(instance_id, None)
+        if entry is None:
+            return False
+        print(f"🛰️ [Registry] {entry['role']} instance {instance_id} removed ({reason})")
+        self._publish(reason, entry)
+        return True
+
+    def sweep(self) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [i for i, entry in self.instances.items() if entry["last_seen"] < cutoff]
+        for instance_id in expired:
+            self.deregister(instance_id, reason="expire")
+        return len(expired)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [self._public(entry) for entry in self.instances.values()]
+
+    def snapshot_event(self) -> Dict[str, Any]:
+        return {"event": "snapshot", "instances": self.snapshot()}
+
+    async def subscribe(self, keepalive: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield a snapshot, then every change as it happens (and a keepalive event when idle)"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        # Subscribe before taking the snapshot so no event falls in between
+        self._subscribers.append(queue)
+        try:
+            yield self.snapshot_event()
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield {"event": "keepalive"}
+        finally:
+            self._subscribers.remove(queue)
+
+    def start(self):
+        """Start expiring silent instances; call from a running event loop"""
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_forever())
+
+    async def _sweep_forever(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.sweep()
+
+    def stats(self) -> Dict[str, Any]:
+        roles: Dict[str, int] = {}
+        for entry in self.instances.values():
+            roles[entry["role"]] = roles.get(entry["role"], 0) + 1
+        return {"instances": len(self.instances), "roles": roles, "subscribers": len(self._subscribers)}
+
+
+class _HeartbeatAccessFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        return "/registry/heartbeat" not in record.getMessage()
+
+
+def quiet_heartbeat_access_log():
+    """Drop uvicorn access-log lines for heartbeats (one per agent worker every few seconds)"""
+    logging.getLogger("uvicorn.access").addFilter(_HeartbeatAccessFilter())
+
+
+DEFAULT_TOKEN_ENV = "A2A_REGISTRY_TOKEN"
+
+
+def _is_loopback(host: Optional[str]) -> bool:
+    if not host:
+        return False
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def registry_router(registry: AgentRegistry, keepalive_seconds: float = 15.0,
+                    token_env: str = DEFAULT_TOKEN_ENV) -> APIRouter:
+    """HTTP API for a registry: register, heartbeat, deregister, list and an SSE event stream"""
+    router = APIRouter(prefix="/registry")
+
+    def authorize(request: Request, endpoint: Optional[str] = None):
+        """Shared token if $token_env is set; otherwise loopback callers and endpoints only"""
+        expected = os.getenv(token_env)
+        if expected:
+            if not hmac.compare_digest(request.headers.get("x-registry-token", ""), expected):
+                raise HTTPException(status_code=401, detail="Invalid registry token")
+            return
+        if not _is_loopback(request.client.host if request.client else None):
+            raise HTTPException(status_code=403, detail=f"Set {token_env} to accept remote agents")
+        if endpoint is not None and not _is_loopback(urlparse(endpoint).hostname):
+            raise HTTPException(status_code=403, detail=f"Set {token_env} to register non-loopback endpoints")
+
+    @router.post("/register")
+    async def register(body: RegisterRequest, request: Request):
+        authorize(request, body.endpoint)
+        entry = registry.register(body.instance_id, body.endpoint, body.discovery, body.load)
+        return {"registered": True, "ttl_seconds": registry.ttl_seconds, "role": entry["role"]}
+
+    @router.post("/heartbeat")
+    async def heartbeat(body: HeartbeatRequest, request: Request):
+        authorize(request)
+        if not registry.heartbeat(body.instance_id, body.load):
+            raise HTTPException(status_code=404, detail="Unknown instance; register again")
+        return {"ok": True}
+
+    @router.post("/deregister")
+    async def deregister(body: DeregisterRequest, request: Request):
+        authorize(request)
+        return {"deregistered": registry.deregister(body.instance_id)}
+
+    @router.get("/agents")
+    async def agents():
+        return {"instances": registry.snapshot(), **registry.stats()}
+
+    @router.get("/events")
+    async def events():
+        """Server-Sent Events: a snapshot, then one event per change; comments keep idle links alive"""
+        async def stream():
+            async for event in registry.subscribe(keepalive=keepalive_seconds):
+                if event["event"] == "keepalive":
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache"})
+
+    return router
+
+
+class RegistryHeartbeat:
+    """Registers a GoogleA2AServer with a registry and pushes its load every interval"""
+
+    def __init__(self, url: str, endpoint: str, discovery, load, interval: float = 5.0,
+                 token_env: str = DEFAULT_TOKEN_ENV):
+        self.url = url.rstrip("/")
+        self.endpoint = endpoint
+        self.discovery = discovery
+        self.load = load
+        self.interval = interval
+        token = os.getenv(token_env)
+        self.headers = {"X-Registry-Token": token} if token else {}
+        agent_id = discovery()["agent"]["agent_id"]
+        self.instance_id = f"{agent_id}:{socket.gethostname()}:{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _post(self, session, path: str, body: Dict[str, Any]) -> int:
+        async with session.post(f"{self.url}/{path}", json=body, headers=self.headers) as response:
+            return response.status
+
+    async def _run(self):
+        import aiohttp
+
+        registered = False
+        reachable = True
+        timeout = aiohttp.ClientTimeout(total=max(self.interval, 2))
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            while True:
+                try:
+                    if not registered:
+                        status = await self._post(session, "register", {
+                            "instance_id": self.instance_id, "endpoint": self.endpoint,
+                            "discovery": self.discovery(), "load": self.load()
+                        })
+                        registered = status == 200
+                        if registered:
+                            print(f"🛰️ Registered {self.instance_id} with {self.url}")
+                        elif status in (401, 403) and reachable:
+                            print(f"⚠️ Registry {self.url} refused {self.instance_id} ({status}); "
+                                  f"check the registry token")
+                    else:
+                        status = await self._post(session, "heartbeat",
+                                                  {"instance_id": self.instance_id, "load": self.load()})
+                        registered = status == 200
+                    reachable = True
+                except Exception as e:
+                    registered = False
+                    # Log once per outage; the API usually starts after the agents
+                    if reachable:
+                        print(f"⚠️ Registry {self.url} unreachable ({type(e).__name__}); retrying")
+                    reachable = False
+                await asyncio.sleep(self.interval)
+
+    async def stop(self):
+        """Stop heartbeats and deregister, so routing drops this instance right away"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        import aiohttp
+
+        try:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=2)) as session:
+                await self._post(session, "deregister", {"instance_id": self.instance_id})
+        except Exception:
+            pass
+
+
+async def registry_events(url: str, keepalive_seconds: float = 15.0) -> AsyncIterator[Dict[str, Any]]:
+    """Events from a remote registry's SSE stream; raises when the connection drops"""
+    import aiohttp
+
+    # No event or keepalive for three intervals means the stream is dead
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=keepalive_seconds * 3)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with session.get(f"{url.rstrip('/')}/events") as response:
+            response.raise_for_status()
+            async for raw in response.content:
+                line = raw.decode("utf-8").strip()
+                if line.startswith("data:"):
+                    yield json.loads(line[5:])
+
+
+class RegistryView:
+    """Routing table built from registry events: live endpoints per role with their load"""
+
+    def __init__(self):
+        self.instances: Dict[str, Dict[str, Any]] = {}
+        # Calls this process has in flight per endpoint, so it does not pile onto
+        # one endpoint between heartbeats
+        self.local_in_flight: Dict[str, int] = {}
+        self.synced = False
+        self._turn = 0
+
+    def apply(self, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update the table; returns the instance an event added, if any"""
+        kind = event.get("event")
+        if kind == "snapshot":
+            self.instances = {entry["instance_id"]: entry for entry in event.get("instances", [])}
+            self.synced = True
+            return None
+        entry = event.get("instance", {})
+        instance_id = entry.get("instance_id")
+        if kind == "register":
+            added = instance_id not in self.instances
+            self.instances[instance_id] = entry
+            return entry if added else None
+        if kind == "heartbeat" and instance_id in self.instances:
+            self.instances[instance_id]["load"] = entry.get("load", {})
+            self.instances[instance_id]["last_seen"] = entry.get("last_seen")
+        elif kind in ("deregister", "expire"):
+            self.instances.pop(instance_id, None)
+        return None
+
+    def endpoints(self, role: str) -> Dict[str, int]:
+        """Ready endpoints for a role -> in-flight calls (all workers reported plus this process's own)"""
+        load: Dict[str, int] = {}
+        for entry in self.instances.values():
+            if entry.get("role") != role or entry.get("load", {}).get("ready") is False:
+                continue
+            endpoint = entry["endpoint"]
+            load[endpoint] = load.get(endpoint, 0) + entry.get("load", {}).get("in_flight", 0)
+        return {endpoint: n + self.local_in_flight.get(endpoint, 0) for endpoint, n in load.items()}
+
+    def pick(self, role: str) -> Optional[str]:
+        """Least-loaded endpoint for a role, rotating between ties; None if none is registered"""
+        load = self.endpoints(role)
+        if not load:
+            return None
+        least = min(load.values())
+        candidates = sorted(endpoint for endpoint, n in load.items() if n == least)
+        self._turn += 1
+        return candidates[self._turn % len(candidates)]
+
+    def discovery(self, role: str) -> Optional[Dict[str, Any]]:
+        for entry in self.instances.values():
+            if entry.get("role") == role and entry.get("discovery"):
+                return entry["discovery"]
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        roles = sorted({entry.get("role") for entry in self.instances.values()})
+        return {"synced": self.synced, "instances": len(self.instances),
+                "endpoints": {role: self.endpoints(role) for role in roles}}
+
+
+def create_registry_app(ttl_seconds: float = 15.0, token_env: str = DEFAULT_TOKEN_ENV) -> FastAPI:
+    registry = AgentRegistry(ttl_seconds=ttl_seconds)
+    app = FastAPI(title="A2A Agent Registry")
+    app.include_router(registry_router(registry, token_env=token_env))
+    quiet_heartbeat_access_log()
+
+    @app.on_event("startup")
+    async def start_sweeper():
+        registry.start()
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(create_registry_app(float(os.getenv("A2A_REGISTRY_TTL_SECONDS", "15"))),
+                host="0.0.0.0", port=int(os.getenv("A2A_REGISTRY_PORT", "8010")))
@@ -1,16 +1,18 @@
-import google.generativeai as genai
 import os
 import json
+import time
+import asyncio
 from pathlib import Path
 from Agent_Framework.google_a2a import GoogleA2AServer, A2AAgent, A2ACapability, SkillType
-from typing import Dict, Any 
+from utils.model_router import ModelRouter, gemini_model_factory
+from utils.event_log import log_event
+from utils.prompt_budget import estimate_tokens
+from Editor_Agent.proofread_rules import ProofreadPrepass, PrepassResult
+from Editor_Agent.incremental_edit import split_paragraphs, paragraph_key, build_prompt, parse_edited
+from typing import Dict, Any, Optional, List
 
 class EditorAgentA2A(GoogleA2AServer):
     def __init__(self):
-        # Initialize Google Gemini
-        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
-        
         # Load agent configuration from config.json
         config_path = Path(__file__).parent / "config.json"
         with open(config_path, "r") as f:
@@ -35,8 +37,28 @@ class EditorAgentA2A(GoogleA2AServer):
             metadata=agent_config.get("metadata", {})
         )
         
-        super().__init__(agent)
+        super().__init__(agent, config=config)
+        
+        # Google Gemini is imported and configured lazily; the model for each call
+        # is picked by the routing policy and warmed up after the server starts
+        self.router = ModelRouter(
+            config.get("model_routing"), gemini_model_factory,
+            metrics=self.shared_metrics, rate_limiter=self.rate_limiter
+        )
+        self.add_startup_task("model", self.router.warm_up)
+        
+        # Local rule-based pre-pass: confidently clean text skips the model entirely
+        self.prepass_config = config.get("proofread_prepass", {})
+        self.prepass = ProofreadPrepass()
+        
+        # Per-paragraph edit cache: resubmitted documents only re-edit what changed
+        self.incremental_config = config.get("incremental_edit", {})
+        # Text to edit is never compacted; what does not fit one model call is chunked or rejected
+        self.max_content_tokens = config.get("content_limit", {}).get("max_tokens", 8000)
+        
         self._register_capabilities()
+        self.register_metrics("models", self.router.get_stats)
+        self.register_metrics("prepass", self._prepass_metrics)
     
     def _register_capabilities(self):
         """Register editing capabilities"""
@@ -89,12 +111,162 @@ class EditorAgentA2A(GoogleA2AServer):
         
         self.register_capability(proofread_cap, self.handle_quick_proofread)
     
+    def _run_prepass(self, capability: str, content: str) -> Optional[PrepassResult]:
+        """Run the rule-based pre-pass if enabled for this capability and input size"""
+        if capability not in self.prepass_config.get("capabilities", []) or not content:
+            return None
+        if len(content) > self.prepass_config.get("max_chars", 1500):
+            return None
+        start = time.perf_counter()
+        result = self.prepass.run(content)
+        self.shared_metrics.incr("prepass.checked")
+        self.shared_metrics.incr("prepass.latency_ms_total", (time.perf_counter() - start) * 1000)
+        if result.score >= self.prepass_config.get("clean_threshold", 0.95):
+            self.shared_metrics.incr("prepass.fast_path")
+        else:
+            self.shared_metrics.incr("prepass.escalated")
+        return result
+    
+    def _check_size(self, text: str, what: str = "Content"):
+        tokens = estimate_tokens(text or "")
+        if tokens > self.max_content_tokens:
+            raise ValueError(
+                f"{what} is about {tokens} tokens; at most {self.max_content_tokens} can be edited in one model call. "
+                "Separate paragraphs with blank lines so the document is edited in chunks, or submit it in parts."
+            )
+    
+    def _is_clean(self, result: Optional[PrepassResult]) -> bool:
+        return result is not None and result.score >= self.prepass_config.get("clean_threshold", 0.95)
+    
+    @staticmethod
+    def _prepass_annotation(result: PrepassResult, fast_path: bool) -> Dict[str, Any]:
+        return {
+            "fast_path": fast_path,
+            "score": result.score,
+            "fixes": result.fixes,
+            "warnings": result.warnings,
+            "note": "Rule-based checks found no issues needing model review" if fast_path
+                    else "Rule-based fixes applied before model review"
+        }
+    
+    def _prepass_metrics(self) -> Dict[str, Any]:
+        counters = self.shared_metrics.snapshot()
+        checked = counters.get("prepass.checked", 0)
+        fast = counters.get("prepass.fast_path", 0)
+        return {
+            "checked": int(checked),
+            "fast_path": int(fast),
+            "escalated": int(counters.get("prepass.escalated", 0)),
+            "hit_rate": round(fast / checked, 3) if checked else None,
+            "avg_latency_ms": round(counters.get("prepass.latency_ms_total", 0) / checked, 3) if checked else None
+        }
+    
+    async def _incremental_edit(self, content: str, edit_focus: str, target_audience: str,
+                                latency_budget_ms: Optional[float]) -> Optional[Dict[str, Any]]:
+        """Edit only paragraphs without a cached edit; None means use the whole-document path"""
+        cfg = self.incremental_config
+        if not cfg.get("enabled", False) or not content:
+            return None
+        paragraphs = split_paragraphs(content)
+        if len(paragraphs) < cfg.get("min_paragraphs", 3):
+            return None
+        
+        keys = [paragraph_key(p, edit_focus, target_audience) for p in paragraphs]
+        # One hop to the cache's database thread for all lookups, keeping SQLite off the event loop
+        edited: Dict[int, Any] = await self.cache.run(lambda: {i: self.cache.get(key) for i, key in enumerate(keys)})
+        targets = [i for i, value in edited.items() if value is None]
+        retried: List[int] = []
+        
+        if targets:
+            for i in targets:
+                self._check_size(paragraphs[i], "A single paragraph")
+            # Chunks bounded by paragraph count and by tokens, so long documents fit each call
+            batch_size = cfg.get("batch_paragraphs", 20)
+            batch_tokens = cfg.get("batch_max_tokens", 3000)
+            batches: List[List[int]] = []
+            used = 0
+            for i in targets:
+                tokens = estimate_tokens(paragraphs[i])
+                if not batches or len(batches[-1]) >= batch_size or used + tokens > batch_tokens:
+                    batches.append([])
+                    used = 0
+                batches[-1].append(i)
+                used += tokens
+            
+            async def edit_batch(batch: List[int]) -> Dict[int, str]:
+                text = await self.router.generate(
+                    build_prompt(paragraphs, batch, edit_focus, target_audience),
+                    capability="comprehensive_edit",
+                    input_text="\n\n".join(paragraphs[i] for i in batch),
+                    latency_budget_ms=latency_budget_ms
+                )
+                return parse_edited(text, batch)
+            
+            results = await asyncio.gather(*(edit_batch(batch) for batch in batches))
+            fresh = {i: text for result in results for i, text in result.items()}
+            # Keep the batches that parsed; re-ask only for the paragraphs whose markers went missing
+            retried = [i for i in targets if i not in fresh]
+            if retried:
+                log_event("edit.incremental.retry", "warning", reason="paragraph markers missing from model output",
+                          paragraphs=len(retried))
+                self.shared_metrics.incr("incremental.paragraphs_retried", len(retried))
+                for result in await asyncio.gather(*(edit_batch([i]) for i in retried)):
+                    fresh.update(result)
+            ttl = cfg.get("ttl_seconds", 86400)
+            edited.update(fresh)
+            await self.cache.run(lambda: [self.cache.set(keys[i], text, ttl_seconds=ttl) for i, text in fresh.items()])
+        
+        # Paragraphs that failed twice stay as submitted (and uncached) rather than re-editing the whole document
+        unedited = [i for i in targets if edited[i] is None]
+        if unedited:
+            log_event("edit.incremental.unedited", "warning", paragraphs=unedited)
+            self.shared_metrics.incr("incremental.paragraphs_unedited", len(unedited))
+            for i in unedited:
+                edited[i] = paragraphs[i]
+        reused = len(paragraphs) - len(targets)
+        self.shared_metrics.incr("incremental.paragraphs_reused", reused)
+        self.shared_metrics.incr("incremental.paragraphs_edited", len(targets) - len(unedited))
+        return {
+            "text": "\n\n".join(edited[i] for i in range(len(paragraphs))),
+            "stats": {"paragraphs": len(paragraphs), "reused": reused, "edited": len(targets) - len(unedited),
+                      "retried": len(retried), "unedited": len(unedited)}
+        }
+    
     async def handle_comprehensive_edit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
        
         content = payload.get("content")
         edit_focus = payload.get("edit_focus", "general")
         target_audience = payload.get("target_audience", "general")
         
+        prepass = self._run_prepass("comprehensive_edit", content)
+        if self._is_clean(prepass):
+            return {
+                "edited_content": f"✏️ Edited by Emma Editor\n{'='*60}\n{prepass.text}",
+                "edit_focus": edit_focus,
+                "target_audience": target_audience,
+                "prepass": self._prepass_annotation(prepass, fast_path=True)
+            }
+        if prepass is not None:
+            content = prepass.text
+        
+        try:
+            incremental = await self._incremental_edit(
+                content, edit_focus, target_audience, payload.get("latency_budget_ms")
+            )
+        except Exception as e:
+            raise Exception(f"Content editing failed: {str(e)}")
+        if incremental is not None:
+            result = {
+                "edited_content": f"✏️ Edited by Emma Editor\n{'='*60}\n{incremental['text']}",
+                "edit_focus": edit_focus,
+                "target_audience": target_audience,
+                "incremental": incremental["stats"]
+            }
+            if prepass is not None:
+                result["prepass"] = self._prepass_annotation(prepass, fast_path=False)
+            return result
+        self._check_size(content)
+        
         prompt = f"""
         As Emma Editor, professionally edit and enhance this content:
         
@@ -114,12 +286,20 @@ class EditorAgentA2A(GoogleA2AServer):
         """
         
         try:
-            response = self.model.generate_content(prompt)
-            return {
-                "edited_content": f"✏️ Edited by Emma Editor\n{'='*60}\n{response.text}",
+            text = await self.router.generate(
+                prompt,
+                capability="comprehensive_edit",
+                input_text=content or "",
+                latency_budget_ms=payload.get("latency_budget_ms")
+            )
+            result = {
+                "edited_content": f"✏️ Edited by Emma Editor\n{'='*60}\n{text}",
                 "edit_focus": edit_focus,
                 "target_audience": target_audience
             }
+            if prepass is not None:
+                result["prepass"] = self._prepass_annotation(prepass, fast_path=False)
+            return result
         except Exception as e:
             raise Exception(f"Content editing failed: {str(e)}")
     
@@ -127,6 +307,16 @@ class EditorAgentA2A(GoogleA2AServer):
         """Handle quick proofreading requests"""
         content = payload.get("content")
         
+        prepass = self._run_prepass("quick_proofread", content)
+        if self._is_clean(prepass):
+            return {
+                "proofread_content": f"⚡ Quick Proofread by Emma Editor\n{'='*60}\n{prepass.text}",
+                "prepass": self._prepass_annotation(prepass, fast_path=True)
+            }
+        if prepass is not None:
+            content = prepass.text
+        self._check_size(content)
+        
         prompt = f"""
         As Emma Editor, perform a quick but thorough proofread:
         
@@ -141,22 +331,30 @@ class EditorAgentA2A(GoogleA2AServer):
         """
         
         try:
-            response = self.model.generate_content(prompt)
-            return {
-                "proofread_content": f"⚡ Quick Proofread by Emma Editor\n{'='*60}\n{response.text}"
+            text = await self.router.generate(
+                prompt,
+                capability="quick_proofread",
+                input_text=content or "",
+                latency_budget_ms=payload.get("latency_budget_ms")
+            )
+            result = {
+                "proofread_content": f"⚡ Quick Proofread by Emma Editor\n{'='*60}\n{text}"
             }
+            if prepass is not None:
+                result["prepass"] = self._prepass_annotation(prepass, fast_path=False)
+            return result
         except Exception as e:
             raise Exception(f"Proofreading failed: {str(e)}")
     
-    async def _execute_capability(self, capability: A2ACapability, payload: Dict[str, Any]):
-        """Execute capability handler"""
-        handler_name = f"handle_{capability.name}"
-        handler = getattr(self, handler_name)
-        return await handler(payload)
-if __name__ == "__main__":
+def create_app():
+    """App factory for uvicorn workers; each worker process builds its own agent"""
     from dotenv import load_dotenv
-    from Agent_Framework.google_a2a import run_server
 
     load_dotenv()
-    agent = EditorAgentA2A()
-    run_server(agent, host="0.0.0.0", port=8003)
\ No newline at end of file
+    return EditorAgentA2A().app
+
+if __name__ == "__main__":
+    from Agent_Framework.google_a2a import run_server
+
+    workers = int(os.getenv("A2A_WORKERS", "1"))
+    run_server("Editor_Agent.Editor:create_app", host="0.0.0.0", port=8003, workers=workers)
@@ -0,0 +1,78 @@
+# Editor_Agent/incremental_edit.py
+"""Paragraph-level incremental editing for the Editor agent.
+
+Edited paragraphs are cached under a hash of (paragraph, edit_focus,
+target_audience). When a document is resubmitted, only paragraphs without a
+cached edit are sent to the model, surrounded by their unchanged neighbours
+as read-only context, and the output is reassembled in document order.
+"""
+import re
+from typing import Dict, List, Sequence
+
+from utils.shared_store import SharedCache
+
+_PARAGRAPH_SPLIT_RE = re.compile(r"\n[ \t]*\n+")
+_MARKER_RE = re.compile(r"^[ \t]*<<<P(\d+)>>>[ \t]*$", re.MULTILINE)
+
+# Bump when the per-paragraph prompt changes so stale edits are not reused
+PROMPT_VERSION = 1
+
+
+def split_paragraphs(text: str) -> List[str]:
+    return [p.strip() for p in _PARAGRAPH_SPLIT_RE.split(text.strip()) if p.strip()]
+
+
+def paragraph_key(paragraph: str, edit_focus: str, target_audience: str) -> str:
+    return SharedCache.make_key("paragraph_edit", PROMPT_VERSION, paragraph, edit_focus, target_audience)
+
+
+def build_prompt(paragraphs: Sequence[str], targets: Sequence[int], edit_focus: str, target_audience: str) -> str:
+    """Prompt that asks for the target paragraphs only, with neighbours as context"""
+    targets = sorted(targets)
+    target_set = set(targets)
+    context = {n for i in targets for n in (i - 1, i + 1) if 0 <= n < len(paragraphs)} - target_set
+
+    blocks = []
+    previous = None
+    for i in sorted(target_set | context):
+        if previous is not None and i != previous + 1:
+            blocks.append("[...]")
+        if i in target_set:
+            blocks.append(f"<<<P{i}>>>\n{paragraphs[i]}")
+        else:
+            blocks.append(f"[CONTEXT - do not edit or repeat]\n{paragraphs[i]}")
+        previous = i
+    document = "\n\n".join(blocks)
+
+    return f"""
+        As Emma Editor, professionally edit the marked paragraphs of a larger document.
+
+        Edit focus: {edit_focus}
+        Target audience: {target_audience}
+
+        Editorial framework:
+        - Grammar, spelling, and punctuation perfection
+        - Sentence structure and clarity optimization
+        - Flow and readability enhancement, consistent with the surrounding context
+        - Consistency in tone and style
+        - Voice preservation while improving quality
+
+        Output format: for every marker below, output the marker line exactly as given
+        (e.g. <<<P{targets[0]}>>>) followed by the edited paragraph. Output nothing else:
+        no commentary, and no context paragraphs.
+
+        Document excerpt:
+        {document}
+        """
+
+
+def parse_edited(text: str, targets: Sequence[int]) -> Dict[int, str]:
+    """Split the model output on paragraph markers; targets missing from the output are left out"""
+    matches = list(_MARKER_RE.finditer(text))
+    edited: Dict[int, str] = {}
+    for n, match in enumerate(matches):
+        end = matches[n + 1].start() if n + 1 < len(matches) else len(text)
+        body = text[match.end():end].strip()
+        if body:
+            edited[int(match.group(1))] = body
+    return {i: edited[i] for i in targets if i in edited}
@@ -0,0 +1,171 @@
+# Editor_Agent/proofread_rules.py
+"""Rule-based proofreading pre-pass for the Editor agent.
+
+Fixes mechanical problems (spacing, repeated words, common misspellings,
+punctuation spacing) locally and scores how clean the result looks. Text
+that scores as confidently clean can be returned without a model call.
+Code, URLs and e-mail addresses are left exactly as written.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+_MISSPELLINGS_PATH = Path(__file__).parent / "misspellings.json"
+
+# Legitimate doubled words that must not be collapsed
+_ALLOWED_REPEATS = {"had", "that", "is", "can", "do", "bye", "no", "very", "so", "really", "ha"}
+
+_MULTI_SPACE_RE = re.compile(r"[ \t]{2,}")
+_TRAILING_SPACE_RE = re.compile(r"[ \t]+$", re.MULTILINE)
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+# Letter-only words repeated on one line ("the the"); never numbers ("555 555") or across line breaks
+_REPEATED_WORD_RE = re.compile(r"\b([^\W\d_]+)([ \t]+)\1\b", re.IGNORECASE)
+_SPACE_BEFORE_PUNCT_RE = re.compile(r"(?<=\w)[ \t]+([,.;:!?])(?=\s|$)")
+# Missing-space rules fire only between plain words: the word before starts the text or follows
+# whitespace/a quote (not "=", "(", "." as in URLs and code), and the word after ends in
+# whitespace or sentence punctuation (not "=", "(", "." as in "q=Test" or "node.Js")
+_PLAIN_BEFORE = r"(?<![^\s\"'“‘])"
+_PLAIN_AFTER = r"(?:[\s,;:!?)\"'”’]|\.(?:\s|$)|$)"
+_MISSING_SPACE_AFTER_RE = re.compile(_PLAIN_BEFORE + r"([A-Za-z]+[,;!?])(?=[A-Za-z]+" + _PLAIN_AFTER + ")")
+_MISSING_SPACE_SENTENCE_RE = re.compile(_PLAIN_BEFORE + r"([a-z0-9]{2,}\.)(?=[A-Z][a-z]{2,}" + _PLAIN_AFTER + ")")
+# Fenced code, inline code, URLs and e-mail addresses are never rewritten
+_PROTECTED_RE = re.compile(
+    r"(?s:```.*?```|~~~.*?~~~)|`[^`\n]+`|\b[A-Za-z][A-Za-z0-9+.-]*://\S+|\bwww\.\S+|[\w.+-]+@[\w-]+\.[\w.]+"
+)
+_LOWER_I_RE = re.compile(r"(?<![\w'’])i(?=[ \t,.;:!?'’]|$)", re.MULTILINE)
+_WORD_RE = re.compile(r"[A-Za-z']+")
+_WHITESPACE_FIXES = {"trailing whitespace", "extra spaces", "extra blank lines"}
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def _subn_prose(pattern, repl, text: str) -> Tuple[str, int]:
+    """pattern.subn applied only between protected spans (code, URLs, e-mail addresses)"""
+    parts: List[str] = []
+    total = 0
+    pos = 0
+    for match in _PROTECTED_RE.finditer(text):
+        prose, count = pattern.subn(repl, text[pos:match.start()])
+        parts += [prose, match.group(0)]
+        total += count
+        pos = match.end()
+    prose, count = pattern.subn(repl, text[pos:])
+    parts.append(prose)
+    return "".join(parts), total + count
+
+
+def _load_misspellings() -> Dict[str, str]:
+    with open(_MISSPELLINGS_PATH, "r") as f:
+        return {k.lower(): v for k, v in json.load(f).items()}
+
+
+@dataclass
+class PrepassResult:
+    text: str
+    score: float
+    fixes: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+
+class ProofreadPrepass:
+    """Applies deterministic fixes and scores the text's cleanliness in [0, 1]"""
+
+    def __init__(self, misspellings: Dict[str, str] = None):
+        self.misspellings = misspellings if misspellings is not None else _load_misspellings()
+        self._misspelling_re = re.compile(
+            r"\b(" + "|".join(re.escape(w) for w in sorted(self.misspellings, key=len, reverse=True)) + r")\b",
+            re.IGNORECASE,
+        ) if self.misspellings else None
+
+    def run(self, text: str) -> PrepassResult:
+        fixes: List[str] = []
+        language_fixes = 0
+
+        def apply(pattern, repl, label, value, prose_only=True):
+            nonlocal language_fixes
+            count = 0
+
+            def counted(match: re.Match) -> str:
+                # Only replacements that change the text count as fixes
+                nonlocal count
+                replacement = repl(match) if callable(repl) else match.expand(repl)
+                if replacement != match.group(0):
+                    count += 1
+                return replacement
+
+            if prose_only:
+                new_value, _ = _subn_prose(pattern, counted, value)
+            else:
+                new_value, _ = pattern.subn(counted, value)
+            if count:
+                fixes.append(f"{label} ({count})")
+                if label not in _WHITESPACE_FIXES:
+                    language_fixes += count
+            return new_value
+
+        fixed = text.strip()
+        fixed = apply(_TRAILING_SPACE_RE, "", "trailing whitespace", fixed, prose_only=False)
+        fixed = apply(_MULTI_SPACE_RE, " ", "extra spaces", fixed)
+        fixed = apply(_BLANK_LINES_RE, "\n\n", "extra blank lines", fixed, prose_only=False)
+        if self._misspelling_re is not None:
+            fixed = apply(self._misspelling_re, self._correct, "misspellings", fixed)
+        fixed = apply(_REPEATED_WORD_RE, self._dedupe_word, "repeated words", fixed)
+        fixed = apply(_MISSING_SPACE_AFTER_RE, r"\1 ", "missing space after punctuation", fixed)
+        fixed = apply(_SPACE_BEFORE_PUNCT_RE, r"\1", "space before punctuation", fixed)
+        fixed = apply(_MISSING_SPACE_SENTENCE_RE, r"\1 ", "missing space between sentences", fixed)
+        fixed = apply(_LOWER_I_RE, "I", "lowercase 'i'", fixed)
+
+        score, warnings = self._score(fixed, language_fixes)
+        return PrepassResult(text=fixed, score=score, fixes=fixes, warnings=warnings)
+
+    def _dedupe_word(self, match: re.Match) -> str:
+        word = match.group(1)
+        repeat = match.group(0)[-len(word):]
+        # "that that" is grammatical; "Walla Walla", "Bora Bora" are names
+        if word.lower() in _ALLOWED_REPEATS or (word[0].isupper() and repeat[0].isupper()):
+            return match.group(0)
+        return word
+
+    def _correct(self, match: re.Match) -> str:
+        word = match.group(0)
+        correction = self.misspellings[word.lower()]
+        if word.isupper() and len(word) > 1:
+            return correction.upper()
+        if word[0].isupper():
+            return correction[0].upper() + correction[1:]
+        return correction
+
+    def _score(self, text: str, fix_count: int):
+        """Heuristic cleanliness score; anything the rules cannot judge lowers it"""
+        warnings: List[str] = []
+        words = _WORD_RE.findall(text)
+        if not words:
+            return 0.0, ["no words"]
+        score = 1.0
+
+        # Spelling/punctuation slips suggest grammar errors the rules cannot see;
+        # whitespace clean-up does not count against the text
+        score -= min(0.5, 0.1 * fix_count)
+
+        sentences = [s.strip() for s in _SENTENCE_SPLIT_RE.split(text) if s.strip()]
+        for sentence in sentences:
+            first = next((c for c in sentence if c.isalpha()), "")
+            if first and first.islower():
+                warnings.append("sentence starts with lowercase letter")
+                score -= 0.1
+            if len(_WORD_RE.findall(sentence)) > 40:
+                warnings.append("very long sentence")
+                score -= 0.1
+        last = text.rstrip()[-1:]
+        if last and last not in ".!?\"')]*:`":
+            warnings.append("missing final punctuation")
+            score -= 0.15
+        for opener, closer in ("()", "[]"):
+            if text.count(opener) != text.count(closer):
+                warnings.append(f"unbalanced {opener}{closer}")
+                score -= 0.2
+        if text.count('"') % 2:
+            warnings.append("unbalanced quotes")
+            score -= 0.2
+        return max(0.0, round(score, 3)), warnings
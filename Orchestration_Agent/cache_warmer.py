@@ -0,0 +1,319 @@
+# Orchestration_Agent/cache_warmer.py
+"""Warm the agents' result caches with the topics users are likely to ask for next.
+
+Topics are mined from the workflow history store and/or JSON-lines event
+logs (``workflow.start`` events), scored by frequency with exponential
+decay so that trending topics rank high, and replayed as batch-priority
+requests through the normal orchestrator path. The agents therefore cache
+exactly the payloads live requests will send. The job runs only inside the
+configured off-peak windows, stops at its budget, leaves a share of the
+model rate limit to live traffic, and reports the projected and observed
+hit-rate uplift.
+
+Run from the project root, with the agents up:
+    python -m Orchestration_Agent.cache_warmer              # in an off-peak window, or --force
+    python -m Orchestration_Agent.cache_warmer --articles --max-jobs 20 --events logs/app.jsonl
+    python -m Orchestration_Agent.cache_warmer --report     # observed hit rate since the last run
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from Orchestration_Agent.scheduler import RequestContext
+from utils.deadlines import deadline_from_budget
+from utils.event_log import log_event
+from utils.history_store import HistoryStore
+from utils.prompt_budget import PromptBudgetManager
+from utils.rate_limiter import SharedRateLimiter
+from utils.shared_store import SharedCache, SharedMetrics, DEFAULT_STATE_DIR
+
+DEFAULT_CACHE_WARMING: Dict[str, Any] = {
+    "windows": ["01:00-06:00"],
+    "lookback_hours": 168,
+    "half_life_hours": 24,
+    "min_count": 2,
+    "max_jobs": 50,
+    "max_seconds": 3600,
+    "concurrency": 2,
+    "reserve_fraction": 0.5,
+    "ttl_seconds": 86400,
+    "articles": False,
+    "report_path": f"{DEFAULT_STATE_DIR}/cache_warm_report.json",
+}
+
+# Extra comprehensive_research payload fields each workflow sends (see orchestrator_a2a.py)
+RESEARCH_VARIANTS: Dict[str, Dict[str, Any]] = {
+    "research_only": {},
+    "write_with_research": {},
+    "full_workflow": {"focus_areas": "comprehensive analysis"},
+}
+
+_CAPABILITY = "comprehensive_research"
+
+
+def mine_event_logs(paths: Iterable[str], since: float) -> List[Tuple[str, str, float]]:
+    """(topic, workflow, unix time) from workflow.start lines of JSON event logs"""
+    events = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("event") != "workflow.start" or not record.get("topic"):
+                    continue
+                ts = datetime.fromisoformat(record["ts"]).timestamp() if record.get("ts") else time.time()
+                if ts >= since:
+                    events.append((record["topic"], record.get("workflow", "research_only"), ts))
+    return events
+
+
+def rank_topics(events: Iterable[Tuple[str, str, float]], half_life_hours: float, min_count: int,
+                now: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Score (topic, research variant) pairs by decayed request count, most valuable first.
+
+    A request an hour ago counts almost 1, one a half-life ago counts 0.5, so
+    a topic that is suddenly busy today outranks a steady one from last week.
+    """
+    now = now or time.time()
+    decay = math.log(2) / (half_life_hours * 3600)
+    table: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for topic, workflow, ts in events:
+        if workflow not in RESEARCH_VARIANTS:
+            continue  # edit-only traffic never reaches the research agent
+        entry = table.setdefault((topic, workflow), {"topic": topic, "workflow": workflow, "count": 0,
+                                                     "score": 0.0, "last_seen": 0.0})
+        entry["count"] += 1
+        entry["score"] += math.exp(-decay * max(0.0, now - ts))
+        entry["last_seen"] = max(entry["last_seen"], ts)
+    ranked = [entry for entry in table.values() if entry["count"] >= min_count]
+    ranked.sort(key=lambda entry: entry["score"], reverse=True)
+    for entry in ranked:
+        entry["score"] = round(entry["score"], 3)
+    return ranked
+
+
+def in_window(windows: List[str], when: Optional[datetime] = None) -> Optional[datetime]:
+    """End of the off-peak window containing `when` (local time), or None outside every window"""
+    when = when or datetime.now()
+    for window in windows:
+        start_s, end_s = window.split("-")
+        start = when.replace(hour=int(start_s[:2]), minute=int(start_s[3:5]), second=0, microsecond=0)
+        end = when.replace(hour=int(end_s[:2]), minute=int(end_s[3:5]), second=0, microsecond=0)
+        if end <= start:  # window crosses midnight, e.g. 22:00-04:00
+            if when >= start:
+                end += timedelta(days=1)
+            else:
+                start -= timedelta(days=1)
+        if start <= when < end:
+            return end
+    return None
+
+
+class CacheWarmer:
+    def __init__(self, orchestrator, config: Optional[Dict[str, Any]] = None,
+                 research_config: Optional[Dict[str, Any]] = None):
+        self.orchestrator = orchestrator
+        self.config = {**DEFAULT_CACHE_WARMING, **(config or {})}
+        if research_config is None:
+            with open(Path(__file__).parent.parent / "Research_Agent" / "config.json") as f:
+                research_config = json.load(f)
+        # Same files and key recipe as the research agent's GoogleA2AServer
+        self.agent_id = research_config["agent"]["agent_id"]
+        cache_path = research_config.get("cache", {}).get("path", f"{DEFAULT_STATE_DIR}/{self.agent_id}.sqlite3")
+        self.cache = SharedCache(cache_path)
+        self.metrics = SharedMetrics(cache_path)
+        self.prompt_budget = PromptBudgetManager(research_config.get("prompt_budget"))
+        rate_limit_config = dict(research_config.get("rate_limit", {}))
+        if os.getenv("A2A_RATE_LIMIT_ENABLED") is not None:
+            rate_limit_config["enabled"] = os.getenv("A2A_RATE_LIMIT_ENABLED") != "0"
+        self.limiter = SharedRateLimiter(**rate_limit_config)
+
+    def research_payload(self, topic: str, workflow: str) -> Dict[str, Any]:
+        return {"topic": topic, **RESEARCH_VARIANTS[workflow]}
+
+    def cache_key(self, topic: str, workflow: str) -> str:
+        payload, _ = self.prompt_budget.apply(_CAPABILITY, self.research_payload(topic, workflow))
+        return SharedCache.make_key(self.agent_id, _CAPABILITY, payload)
+
+    def is_cached(self, topic: str, workflow: str) -> bool:
+        return self.cache.get(self.cache_key(topic, workflow)) is not None
+
+    def projected_hit_rate(self, candidates: List[Dict[str, Any]]) -> Optional[float]:
+        """Share of the mined traffic (by decayed score) that would hit the cache right now"""
+        total = sum(c["score"] for c in candidates)
+        if not total:
+            return None
+        return round(sum(c["score"] for c in candidates if self.is_cached(c["topic"], c["workflow"])) / total, 4)
+
+    def observed_counters(self) -> Dict[str, float]:
+        counters = self.metrics.snapshot()
+        return {"hits": counters.get(f"cache_hits.{_CAPABILITY}", 0),
+                "misses": counters.get(f"cache_misses.{_CAPABILITY}", 0)}
+
+    async def wait_for_headroom(self, stop_at: float) -> bool:
+        """Hold off while live traffic is using more than (1 - reserve_fraction) of any model's RPM"""
+        reserve = self.config["reserve_fraction"]
+        while time.monotonic() < stop_at:
+            stats = await self.limiter.run(self.limiter.stats)
+            buckets = stats.get("buckets", {}) if stats.get("enabled") else {}
+            if all(b["requests_available"] >= reserve * b["rpm"] for b in buckets.values()):
+                return True
+            await asyncio.sleep(1.0)
+        return False
+
+    async def _warm_one(self, candidate: Dict[str, Any], articles: bool) -> str:
+        topic, workflow = candidate["topic"], candidate["workflow"]
+        timeout = self.orchestrator.config.get("request_timeouts", {}).get("batch", 900)
+        ctx = RequestContext(client_id="cache-warmer", priority="batch",
+                             deadline=deadline_from_budget(timeout * 1000))
+        if articles and workflow == "write_with_research":
+            result = await self.orchestrator._write_with_research_workflow(topic, ctx)
+        elif articles and workflow == "full_workflow":
+            result = await self.orchestrator._full_workflow(topic, ctx)
+        else:
+            response = await self.orchestrator._call_agent(
+                "research", "research-agent-001", _CAPABILITY, self.research_payload(topic, workflow), ctx
+            )
+            result = "" if response.success else f"failed: {response.error_message}"
+        if any(not stage["success"] for stage in ctx.stages) or result.startswith("failed:"):
+            return "failed"
+        # Keep warmed research until the next off-peak run, past the agent's default TTL
+        key = self.cache_key(topic, workflow)
+        value = await self.cache.run(self.cache.get, key)
+        if value is not None:
+            await self.cache.run(self.cache.set, key, value, self.config["ttl_seconds"])
+        return "warmed"
+
+    async def run(self, candidates: List[Dict[str, Any]], stop_at: float, articles: bool) -> Dict[str, Any]:
+        started = time.perf_counter()
+        before = self.projected_hit_rate(candidates)
+        outcomes = {"warmed": 0, "already_cached": 0, "failed": 0, "skipped_budget": 0}
+        jobs = []
+        for candidate in candidates:
+            if self.is_cached(candidate["topic"], candidate["workflow"]) and not articles:
+                outcomes["already_cached"] += 1
+            elif len(jobs) < self.config["max_jobs"]:
+                jobs.append(candidate)
+            else:
+                outcomes["skipped_budget"] += 1
+
+        semaphore = asyncio.Semaphore(self.config["concurrency"])
+
+        async def worker(candidate):
+            async with semaphore:
+                if time.monotonic() >= stop_at or not await self.wait_for_headroom(stop_at):
+                    outcomes["skipped_budget"] += 1
+                    return
+                outcome = await self._warm_one(candidate, articles)
+                outcomes[outcome] += 1
+                log_event("cache_warm.job", topic=candidate["topic"], workflow=candidate["workflow"],
+                          score=candidate["score"], outcome=outcome)
+
+        await asyncio.gather(*(worker(c) for c in jobs))
+        after = self.projected_hit_rate(candidates)
+        return {
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "candidates": len(candidates),
+            **outcomes,
+            "duration_s": round(time.perf_counter() - started, 2),
+            "projected_hit_rate_before": before,
+            "projected_hit_rate_after": after,
+            "projected_uplift": round(after - before, 4) if before is not None else None,
+            "counters_at_finish": self.observed_counters(),
+            "top_topics": [{k: c[k] for k in ("topic", "workflow", "count", "score")} for c in candidates[:10]],
+        }
+
+
+def observed_uplift(report: Dict[str, Any], counters: Dict[str, float],
+                    lifetime_before: Dict[str, float]) -> Dict[str, Any]:
+    """Hit rate of live comprehensive_research traffic since the warm run vs before it"""
+    def rate(hits, misses):
+        return round(hits / (hits + misses), 4) if hits + misses else None
+
+    at_finish = report["counters_at_finish"]
+    since = {k: counters[k] - at_finish[k] for k in ("hits", "misses")}
+    before = rate(lifetime_before["hits"], lifetime_before["misses"])
+    after = rate(since["hits"], since["misses"])
+    return {
+        "requests_since_warm": since["hits"] + since["misses"],
+        "hit_rate_before_warm": before,
+        "hit_rate_since_warm": after,
+        "uplift": round(after - before, 4) if before is not None and after is not None else None,
+    }
+
+
+async def main_async(args):
+    from Orchestration_Agent.orchestrator_a2a import GoogleA2AOrchestrator
+
+    orchestrator = GoogleA2AOrchestrator()
+    config = {**DEFAULT_CACHE_WARMING, **orchestrator.config.get("cache_warming", {})}
+    for name in ("max_jobs", "max_seconds", "concurrency"):
+        if getattr(args, name) is not None:
+            config[name] = getattr(args, name)
+    warmer = CacheWarmer(orchestrator, config)
+    report_path = Path(config["report_path"])
+
+    if args.report:
+        if not report_path.exists():
+            raise SystemExit(f"No warm report at {report_path}; run the warmer first")
+        report = json.loads(report_path.read_text())
+        print(json.dumps({**observed_uplift(report, warmer.observed_counters(), report["counters_before"]),
+                          "warmed_at": report["finished_at"]}, indent=2))
+        return
+
+    window_end = in_window(config["windows"])
+    if window_end is None and not args.force:
+        print(f"⏸️ Outside the off-peak windows {config['windows']}; use --force to warm now")
+        return
+    seconds = config["max_seconds"]
+    if window_end is not None:
+        seconds = min(seconds, (window_end - datetime.now()).total_seconds())
+    stop_at = time.monotonic() + seconds
+
+    since = time.time() - config["lookback_hours"] * 3600
+    events: List[Tuple[str, str, float]] = []
+    if not args.no_history:
+        history = HistoryStore(**orchestrator.config.get("history", {}))
+        events += [tuple(row) for row in history.topic_events(since)]
+    if args.events:
+        events += mine_event_logs(args.events, since)
+    candidates = rank_topics(events, config["half_life_hours"], config["min_count"])
+    print(f"🔥 {len(candidates)} candidate topics from {len(events)} requests; "
+          f"warming up to {config['max_jobs']} within {seconds:.0f}s")
+
+    counters_before = warmer.observed_counters()
+    report = await warmer.run(candidates, stop_at, articles=args.articles or config["articles"])
+    report["counters_before"] = counters_before
+    # A run that warmed nothing keeps the previous baseline for --report
+    if report["warmed"] or not report_path.exists():
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(report, indent=2))
+    print(f"✅ Warmed {report['warmed']}, already cached {report['already_cached']}, failed {report['failed']}, "
+          f"skipped {report['skipped_budget']} in {report['duration_s']}s")
+    print(f"📈 Projected hit rate on mined traffic: {report['projected_hit_rate_before']} -> "
+          f"{report['projected_hit_rate_after']} (report: {report_path})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", nargs="*", help="JSON-lines event logs to mine as well as the history store")
+    parser.add_argument("--no-history", action="store_true", help="Mine only the --events logs")
+    parser.add_argument("--articles", action="store_true", help="Also warm write/edit stages for article topics")
+    parser.add_argument("--max-jobs", type=int)
+    parser.add_argument("--max-seconds", type=float)
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--force", action="store_true", help="Run outside the off-peak windows")
+    parser.add_argument("--report", action="store_true", help="Show observed hit-rate uplift since the last run")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Orchestration_Agent/intent_router.py
+import re
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+# Used when Orchestration_Agent/config.json has no "intent_routing" section.
+# Workflows are checked in order; the first with any matching pattern wins.
+DEFAULT_INTENT_ROUTING: Dict[str, Any] = {
+    "workflows": [
+        {
+            "name": "edit_only",
+            "patterns": [r"edit.*?:", r"improve.*grammar", r"proofread", r"correct.*mistakes",
+                         r"fix.*spelling", r"enhance.*clarity"],
+            "param": "text",
+            "after": ":",
+        },
+        {
+            "name": "research_only",
+            "patterns": [r"^research\s+", r"find.*information", r"lookup.*data", r"investigate",
+                         r"analyze.*trends"],
+            "param": "topic",
+            "strip_prefix": r"^research\s+",
+        },
+        {
+            "name": "write_with_research",
+            "patterns": [r"^write.*article", r"create.*content.*about", r"compose.*piece", r"draft.*article"],
+            "param": "topic",
+            "strip_prefix": r"^write.*?about\s+",
+        },
+    ],
+    "long_text": {"min_chars": 200, "unless_words": ["research", "write", "create"], "workflow": "edit_only"},
+    "default": "full_workflow",
+}
+
+
+class IntentRouter:
+    """Precompiled, config-driven replacement for the per-request pattern loop.
+
+    Patterns are compiled once and kept separate rather than folded into one
+    alternation: a lone pattern keeps the regex engine's literal-prefix scan,
+    which is what makes the no-match case cheap on long inputs. Workflows are
+    tried in config order and the first with a matching pattern wins.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or DEFAULT_INTENT_ROUTING
+        self.workflows: List[Dict[str, Any]] = config["workflows"]
+        self.long_text = config.get("long_text")
+        self.default = config.get("default", "full_workflow")
+
+        self._compiled: List[Tuple[int, List[Pattern]]] = [
+            (i, [re.compile(p) for p in workflow["patterns"]]) for i, workflow in enumerate(self.workflows)
+        ]
+        self._strip = {
+            i: re.compile(w["strip_prefix"]) for i, w in enumerate(self.workflows) if w.get("strip_prefix")
+        }
+        self._long_text_words = tuple(self.long_text.get("unless_words", [])) if self.long_text else ()
+
+    def _params(self, index: int, user_input: str, user_lower: str) -> Dict[str, str]:
+        workflow = self.workflows[index]
+        if workflow.get("param") == "text":
+            separator = workflow.get("after")
+            if separator and separator in user_input:
+                return {"text": user_input.split(separator, 1)[1].strip()}
+            return {"text": user_input}
+        topic = user_lower
+        if index in self._strip:
+            topic = self._strip[index].sub("", user_lower, count=1)
+        return {"topic": topic.strip() or user_input.strip()}
+
+    def route(self, user_input: str) -> Tuple[str, Dict]:
+        user_lower = user_input.lower()
+        for index, patterns in self._compiled:
+            for pattern in patterns:
+                if pattern.search(user_lower):
+                    return self.workflows[index]["name"], self._params(index, user_input, user_lower)
+
+        if self.long_text and len(user_input) > self.long_text.get("min_chars", 200) \
+                and not any(word in user_lower for word in self._long_text_words):
+            return self.long_text.get("workflow", "edit_only"), {"text": user_input}
+        return self.default, {"topic": user_input}
@@ -1,165 +1,260 @@
 # orchestrator_a2a.py
 import asyncio
-import re
 import json
+import time
+import uuid
 from pathlib import Path
-from typing import Dict, Tuple
-from Agent_Framework.google_a2a import GoogleA2AClient
-from utils.export_utils import export_to_pdf, export_to_word  
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from Agent_Framework.google_a2a import GoogleA2AClient, A2AResponse
+from Agent_Framework.registry import RegistryView, registry_events
+from Orchestration_Agent.scheduler import FairScheduler, RequestContext
+from Orchestration_Agent.intent_router import IntentRouter, DEFAULT_INTENT_ROUTING
+from utils.export_utils import export_to_pdf, export_to_word, configure_export_store
+from utils.event_log import configure_event_log, log_event, timed_event
 
 class GoogleA2AOrchestrator:
     def __init__(self):
         config_path = Path(__file__).parent / "config.json"
         with open(config_path, "r") as f:
             config = json.load(f)
+        self.config = config
         self.agents = config["agents"]
+        configure_event_log(config.get("logging"), service="orchestrator")
+        configure_export_store(**config.get("exports", {}))
+        # Agent calls queue per agent by priority class and client
+        self.scheduler = FairScheduler(config.get("scheduler"))
+        # Workflow patterns are compiled once from config, not per request
+        self.intent_router = IntentRouter(config.get("intent_routing", DEFAULT_INTENT_ROUTING))
         self.agent_capabilities = {}
+        # Live instances pushed by the agent registry; config endpoints are the fallback
+        self.registry_view = RegistryView()
+        # Ready once every required agent has been discovered, directly or through the registry
+        self.required_agents = config.get("required_agents", list(self.agents))
+        self.initialized = False
         print("🤖 [Orchestrator] Loaded agent endpoints from config.json!")
         for name, endpoint in self.agents.items():
             print(f"🔗 {name.title()} Agent Endpoint: {endpoint}")
 
-    async def initialize(self):
+    def missing_agents(self) -> List[str]:
+        return [name for name in self.required_agents if name not in self.agent_capabilities]
+
+    def _update_ready(self):
+        if not self.initialized and not self.missing_agents():
+            self.initialized = True
+            print("✅ [Orchestrator] All required agents discovered; ready")
+
+    async def initialize(self, retry_seconds: float = 1.0, max_retry_seconds: float = 15.0):
+        """Discover agents until every required one answers, retrying with backoff"""
         print("🔍 Discovering agent capabilities...")
-        for agent_name, endpoint in self.agents.items():
+        attempt = 0
+        while True:
+            for agent_name in self.missing_agents():
+                try:
+                    discovery = await GoogleA2AClient.discover_agent(self.agents[agent_name])
+                    self.agent_capabilities[agent_name] = discovery
+                    print(f"✅ Discovered {discovery['agent']['name']} with {len(discovery['capabilities'])} capabilities!")
+                except Exception as e:
+                    # Agents often start after the API; report the first failure, then retry quietly
+                    if attempt == 0:
+                        print(f"❌ Failed to discover {agent_name}: {str(e)}; retrying in the background")
+                    log_event("discovery.failed", "warning", agent=agent_name, attempt=attempt + 1,
+                              error=f"{type(e).__name__}: {str(e)[:200]}")
+            self._update_ready()
+            if self.initialized:
+                return
+            attempt += 1
+            await asyncio.sleep(min(retry_seconds * 2 ** (attempt - 1), max_retry_seconds))
+
+    async def follow_registry(self, events: AsyncIterator[Dict[str, Any]]):
+        """Apply registry events to the routing table as they arrive"""
+        async for event in events:
+            added = self.registry_view.apply(event)
+            if event.get("event") == "snapshot":
+                for entry in self.registry_view.instances.values():
+                    self.agent_capabilities[entry["role"]] = entry["discovery"]
+            elif added:
+                self.agent_capabilities[added["role"]] = added["discovery"]
+                print(f"🛰️ [Orchestrator] {added['role']} available at {added['endpoint']}")
+            elif event.get("event") in ("deregister", "expire"):
+                instance = event.get("instance", {})
+                print(f"🛰️ [Orchestrator] {instance.get('role')} instance left ({event['event']}): "
+                      f"{instance.get('endpoint')}")
+            self._update_ready()
+
+    async def subscribe_registry(self, url: str):
+        """Follow a standalone registry over SSE, reconnecting with backoff"""
+        backoff = 1.0
+        while True:
             try:
-                discovery = await GoogleA2AClient.discover_agent(endpoint)
-                self.agent_capabilities[agent_name] = discovery
-                print(f"✅ Discovered {discovery['agent']['name']} with {len(discovery['capabilities'])} capabilities!")
+                print(f"🛰️ [Orchestrator] Subscribing to registry at {url}")
+                await self.follow_registry(registry_events(url))
+                backoff = 1.0
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                print(f"❌ Failed to discover {agent_name}: {str(e)}")
+                print(f"⚠️ [Orchestrator] Registry stream lost ({type(e).__name__}); retrying in {backoff:.0f}s")
+            self.registry_view.synced = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    def endpoint_for(self, agent_name: str) -> str:
+        """Least-loaded registered endpoint for an agent role, else the configured one"""
+        return self.registry_view.pick(agent_name) or self.agents[agent_name]
+
+    async def _call_agent(self, agent_name: str, recipient_id: str, capability_name: str,
+                          payload: Dict[str, Any], ctx: Optional[RequestContext] = None) -> A2AResponse:
+        """Invoke an agent capability once the scheduler grants a slot on that agent.
+
+        Time spent queueing and in earlier hops is subtracted from the request's
+        deadline; the remainder travels with the message as deadline_budget_ms.
+        """
+        ctx = ctx or RequestContext()
+        budget_ms = ctx.remaining_ms()
+        if budget_ms is not None and budget_ms <= 0:
+            return self._deadline_exceeded(agent_name, capability_name)
+
+        async def scheduled_call(event: Dict[str, Any]):
+            queued_at = time.perf_counter()
+            async with self.scheduler.slot(agent_name, ctx):
+                # Pick the endpoint only once a slot is free, so the load figures are current
+                endpoint = self.endpoint_for(agent_name)
+                event.update(endpoint=endpoint, queued_ms=round((time.perf_counter() - queued_at) * 1000, 2))
+                in_flight = self.registry_view.local_in_flight
+                in_flight[endpoint] = in_flight.get(endpoint, 0) + 1
+                try:
+                    response = await GoogleA2AClient.invoke_capability(
+                        endpoint=endpoint,
+                        capability_name=capability_name,
+                        payload=payload,
+                        sender_id="orchestrator",
+                        recipient_id=recipient_id,
+                        deadline_budget_ms=ctx.remaining_ms()
+                    )
+                finally:
+                    in_flight[endpoint] -= 1
+            if not response.success:
+                event.update(outcome=(response.error_code or "error").lower(), level="warning")
+            return response
+
+        started = time.perf_counter()
+        with timed_event("agent.call", stage=agent_name, capability=capability_name,
+                         priority=ctx.priority, client_id=ctx.client_id) as event:
+            try:
+                response = await asyncio.wait_for(scheduled_call(event),
+                                                  timeout=budget_ms / 1000 if budget_ms is not None else None)
+            except asyncio.TimeoutError:
+                event.update(outcome="deadline_exceeded", level="warning")
+                response = self._deadline_exceeded(agent_name, capability_name)
+        ctx.stages.append({
+            "stage": agent_name,
+            "capability": capability_name,
+            "success": response.success,
+            "error_code": response.error_code,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            "queued_ms": event.get("queued_ms"),
+            "output": response.result,
+        })
+        return response
+
+    @staticmethod
+    def _deadline_exceeded(agent_name: str, capability_name: str) -> A2AResponse:
+        log_event("agent.deadline_exceeded", "warning", stage=agent_name, capability=capability_name)
+        return A2AResponse(
+            message_id=str(uuid.uuid4()),
+            success=False,
+            error_code="DEADLINE_EXCEEDED",
+            error_message=f"Deadline exceeded before {capability_name} finished"
+        )
 
     def analyze_intent(self, user_input: str) -> Tuple[str, Dict]:
-        user_lower = user_input.lower()
-        patterns = {
-            'edit_only': [r'edit.*?:', r'improve.*grammar', r'proofread', r'correct.*mistakes', r'fix.*spelling', r'enhance.*clarity'],
-            'research_only': [r'^research\s+', r'find.*information', r'lookup.*data', r'investigate', r'analyze.*trends'],
-            'write_with_research': [r'^write.*article', r'create.*content.*about', r'compose.*piece', r'draft.*article']
-        }
-        for workflow, pattern_list in patterns.items():
-            if any(re.search(pattern, user_lower) for pattern in pattern_list):
-                if workflow == 'edit_only':
-                    text = user_input.split(':', 1)[1].strip() if ':' in user_input else user_input
-                    return workflow, {'text': text}
-                elif workflow == 'research_only':
-                    topic = re.sub(r'^research\s+', '', user_lower).strip()
-                    return workflow, {'topic': topic or user_input.strip()}
-                elif workflow == 'write_with_research':
-                    topic = re.sub(r'^write.*?about\s+', '', user_lower).strip()
-                    return workflow, {'topic': topic or user_input.strip()}
-
-        if len(user_input) > 200 and not any(word in user_lower for word in ['research', 'write', 'create']):
-            return 'edit_only', {'text': user_input}
-        else:
-            return 'full_workflow', {'topic': user_input}
+        return self.intent_router.route(user_input)
 
-    async def process_request(self, user_input: str) -> str:
+    async def process_request(self, user_input: str, ctx: Optional[RequestContext] = None) -> str:
         workflow_type, context = self.analyze_intent(user_input)
-        print(f"🎯 Detected workflow: {workflow_type}")
+        if ctx is not None:
+            ctx.workflow = workflow_type
+        log_event("workflow.detected", workflow=workflow_type)
         try:
             if workflow_type == 'edit_only':
-                return await self._edit_workflow(context['text'])
+                return await self._edit_workflow(context['text'], ctx)
             elif workflow_type == 'research_only':
-                return await self._research_workflow(context['topic'])
+                return await self._research_workflow(context['topic'], ctx)
             elif workflow_type == 'write_with_research':
-                return await self._write_with_research_workflow(context['topic'])
+                return await self._write_with_research_workflow(context['topic'], ctx)
             elif workflow_type == 'full_workflow':
-                return await self._full_workflow(context['topic'])
+                return await self._full_workflow(context['topic'], ctx)
         except Exception as e:
             return f"Workflow execution error: {str(e)}"
 
-    async def _research_workflow(self, topic: str) -> str:
-        print("📚 Executing research workflow...")
-        response = await GoogleA2AClient.invoke_capability(
-            endpoint=self.agents["research"],
-            capability_name="comprehensive_research",
-            payload={"topic": topic},
-            sender_id="orchestrator",
-            recipient_id="research-agent-001"
+    async def _research_workflow(self, topic: str, ctx: Optional[RequestContext] = None) -> str:
+        log_event("workflow.start", workflow="research_only", topic=topic)
+        response = await self._call_agent(
+            "research", "research-agent-001", "comprehensive_research",
+            {"topic": topic}, ctx
         )
         if response.success:
             return response.result.get("research_report", "Research completed")
         else:
             return f"Research failed: {response.error_message}"
 
-    async def _edit_workflow(self, text: str) -> str:
-        print("✏️ Executing editing workflow...")
-        response = await GoogleA2AClient.invoke_capability(
-            endpoint=self.agents["editor"],
-            capability_name="comprehensive_edit",
-            payload={"content": text},
-            sender_id="orchestrator",
-            recipient_id="editor-agent-001"
+    async def _edit_workflow(self, text: str, ctx: Optional[RequestContext] = None) -> str:
+        log_event("workflow.start", workflow="edit_only")
+        response = await self._call_agent(
+            "editor", "editor-agent-001", "comprehensive_edit",
+            {"content": text}, ctx
         )
         if response.success:
             return response.result.get("edited_content", "Editing completed")
         else:
             return f"Editing failed: {response.error_message}"
 
-    async def _write_with_research_workflow(self, topic: str) -> str:
-        print(" Executing Research → Write → Edit workflow...")
-        research_response = await GoogleA2AClient.invoke_capability(
-            endpoint=self.agents["research"],
-            capability_name="comprehensive_research",
-            payload={"topic": topic},
-            sender_id="orchestrator",
-            recipient_id="research-agent-001"
+    async def _write_with_research_workflow(self, topic: str, ctx: Optional[RequestContext] = None) -> str:
+        log_event("workflow.start", workflow="write_with_research", topic=topic)
+        research_response = await self._call_agent(
+            "research", "research-agent-001", "comprehensive_research",
+            {"topic": topic}, ctx
         )
         if not research_response.success:
             return f"Research phase failed: {research_response.error_message}"
         research_data = research_response.result.get("research_report", "")
 
-        write_response = await GoogleA2AClient.invoke_capability(
-            endpoint=self.agents["writer"],
-            capability_name="create_article",
-            payload={"topic": topic, "research_data": research_data},
-            sender_id="orchestrator",
-            recipient_id="writer-agent-001"
+        write_response = await self._call_agent(
+            "writer", "writer-agent-001", "create_article",
+            {"topic": topic, "research_data": research_data}, ctx
         )
         if not write_response.success:
             return f"Writing phase failed: {write_response.error_message}"
         article = write_response.result.get("article", "")
 
-        edit_response = await GoogleA2AClient.invoke_capability(
-            endpoint=self.agents["editor"],
-            capability_name="comprehensive_edit",
-            payload={"content": article},
-            sender_id="orchestrator",
-            recipient_id="editor-agent-001"
+        edit_response = await self._call_agent(
+            "editor", "editor-agent-001", "comprehensive_edit",
+            {"content": article}, ctx
         )
         if not edit_response.success:
             return f"Editing phase failed: {edit_response.error_message}"
         return edit_response.result.get("edited_content", "Full workflow completed")
 
-    async def _full_workflow(self, topic: str) -> str:
-        print(" Executing full content creation workflow...")
-        research_response = await GoogleA2AClient.invoke_capability(
-            endpoint=self.agents["research"],
-            capability_name="comprehensive_research",
-            payload={"topic": topic, "focus_areas": "comprehensive analysis"},
-            sender_id="orchestrator",
-            recipient_id="research-agent-001"
+    async def _full_workflow(self, topic: str, ctx: Optional[RequestContext] = None) -> str:
+        log_event("workflow.start", workflow="full_workflow", topic=topic)
+        research_response = await self._call_agent(
+            "research", "research-agent-001", "comprehensive_research",
+            {"topic": topic, "focus_areas": "comprehensive analysis"}, ctx
         )
         if not research_response.success:
             return f" Research phase failed: {research_response.error_message}"
         research_data = research_response.result.get("research_report", "")
 
-        write_response = await GoogleA2AClient.invoke_capability(
-            endpoint=self.agents["writer"],
-            capability_name="create_article",
-            payload={"topic": topic, "research_data": research_data, "tone": "professional", "length": "medium"},
-            sender_id="orchestrator",
-            recipient_id="writer-agent-001"
+        write_response = await self._call_agent(
+            "writer", "writer-agent-001", "create_article",
+            {"topic": topic, "research_data": research_data, "tone": "professional", "length": "medium"}, ctx
         )
         if not write_response.success:
             return f" Writing phase failed: {write_response.error_message}"
         article = write_response.result.get("article", "")
 
-        edit_response = await GoogleA2AClient.invoke_capability(
-            endpoint=self.agents["editor"],
-            capability_name="comprehensive_edit",
-            payload={"content": article, "edit_focus": "clarity and engagement", "target_audience": "general professional"},
-            sender_id="orchestrator",
-            recipient_id="editor-agent-001"
+        edit_response = await self._call_agent(
+            "editor", "editor-agent-001", "comprehensive_edit",
+            {"content": article, "edit_focus": "clarity and engagement", "target_audience": "general professional"}, ctx
         )
         if not edit_response.success:
             return f" Editing phase failed: {edit_response.error_message}"
@@ -167,6 +262,8 @@ class GoogleA2AOrchestrator:
 
         pdf_msg = export_to_pdf(final_content, topic)
         word_msg = export_to_word(final_content, topic)
+        if ctx is not None:
+            ctx.exports.update(pdf=pdf_msg, docx=word_msg)
 
         return f"""
 \U0001F389 COMPLETE CONTENT CREATION WORKFLOW FINISHED
@@ -184,7 +281,8 @@ Status: SUCCESS
     async def get_agent_status(self) -> Dict[str, str]:
         import aiohttp
         status = {}
-        for agent_name, endpoint in self.agents.items():
+        for agent_name in self.agents:
+            endpoint = self.endpoint_for(agent_name)
             try:
                 async with aiohttp.ClientSession() as session:
                     async with session.get(f"{endpoint}/a2a/health") as response:
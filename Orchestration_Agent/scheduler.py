@@ -0,0 +1,193 @@
+# Orchestration_Agent/scheduler.py
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+PRIORITY_CLASSES = ("interactive", "standard", "batch")
+DEFAULT_WEIGHTS = {"interactive": 8, "standard": 3, "batch": 1}
+
+
+@dataclass
+class RequestContext:
+    """Who is asking, how urgently and until when; threaded through every workflow"""
+    client_id: str = "anonymous"
+    priority: str = "standard"
+    # time.monotonic() value after which the caller no longer wants the result
+    deadline: Optional[float] = None
+    started_at: float = field(default_factory=time.perf_counter)
+    # Filled in as the workflow runs, for the history store
+    workflow: Optional[str] = None
+    stages: List[Dict[str, Any]] = field(default_factory=list)
+    exports: Dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if self.priority not in PRIORITY_CLASSES:
+            self.priority = "standard"
+
+    def remaining_ms(self) -> Optional[float]:
+        return (self.deadline - time.monotonic()) * 1000 if self.deadline is not None else None
+
+
+class _Waiter:
+    __slots__ = ("future", "client_id", "priority", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future, ctx: RequestContext):
+        self.future = future
+        self.client_id = ctx.client_id
+        self.priority = ctx.priority
+        self.enqueued_at = time.perf_counter()
+
+
+class _AgentLane:
+    """Concurrency slots for one downstream agent plus the requests waiting for them"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_flight = 0
+        self.client_in_flight: Dict[str, int] = {}
+        # priority -> client_id -> FIFO of waiters; clients are served round-robin
+        self.queues: Dict[str, "OrderedDict[str, Deque[_Waiter]]"] = {p: OrderedDict() for p in PRIORITY_CLASSES}
+        # Stride scheduling: the active class with the lowest pass value goes next
+        self.passes: Dict[str, float] = {p: 0.0 for p in PRIORITY_CLASSES}
+        self.virtual_time = 0.0
+
+    def queued(self, priority: str) -> int:
+        return sum(len(q) for q in self.queues[priority].values())
+
+
+class FairScheduler:
+    """Weighted fair queuing of agent calls across priority classes and clients.
+
+    Each agent gets ``max_concurrency_per_agent`` slots. When they are all
+    taken, callers queue by priority class; classes share freed slots in
+    proportion to their weights, clients within a class are served
+    round-robin, and no client holds more than its quota of one agent's slots.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.capacity = config.get("max_concurrency_per_agent", 8)
+        self.client_quota = config.get("client_quota", 4)
+        self.client_quotas = config.get("client_quotas", {})
+        self.weights = {**DEFAULT_WEIGHTS, **config.get("weights", {})}
+        self._lanes: Dict[str, _AgentLane] = {}
+        self._stats = {p: {"served": 0, "wait_ms_total": 0.0, "max_wait_ms": 0.0} for p in PRIORITY_CLASSES}
+
+    def _lane(self, agent: str) -> _AgentLane:
+        if agent not in self._lanes:
+            self._lanes[agent] = _AgentLane(self.capacity)
+        return self._lanes[agent]
+
+    def _quota(self, priority: str) -> int:
+        return self.client_quotas.get(priority, self.client_quota)
+
+    def _can_start(self, lane: _AgentLane, client_id: str, priority: str) -> bool:
+        return lane.client_in_flight.get(client_id, 0) < self._quota(priority)
+
+    def _grant(self, lane: _AgentLane, client_id: str, priority: str, waited_ms: float):
+        lane.in_flight += 1
+        lane.client_in_flight[client_id] = lane.client_in_flight.get(client_id, 0) + 1
+        lane.virtual_time = lane.passes[priority]
+        lane.passes[priority] += 1.0 / max(self.weights.get(priority, 1), 1e-6)
+        stats = self._stats[priority]
+        stats["served"] += 1
+        stats["wait_ms_total"] += waited_ms
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], waited_ms)
+
+    def _next_waiter(self, lane: _AgentLane) -> Optional[_Waiter]:
+        """Pop the next eligible waiter: lowest-pass class, then round-robin over its clients"""
+        candidates = []
+        for priority in PRIORITY_CLASSES:
+            for client_id, waiters in lane.queues[priority].items():
+                if waiters and self._can_start(lane, client_id, priority):
+                    candidates.append((lane.passes[priority], PRIORITY_CLASSES.index(priority), priority, client_id))
+                    break
+        if not candidates:
+            return None
+        _, _, priority, client_id = min(candidates)
+        clients = lane.queues[priority]
+        waiter = clients[client_id].popleft()
+        if clients[client_id]:
+            clients.move_to_end(client_id)
+        else:
+            del clients[client_id]
+        return waiter
+
+    def _dispatch(self, lane: _AgentLane):
+        while lane.in_flight < lane.capacity:
+            waiter = self._next_waiter(lane)
+            if waiter is None:
+                return
+            if waiter.future.done():
+                continue
+            self._grant(lane, waiter.client_id, waiter.priority, (time.perf_counter() - waiter.enqueued_at) * 1000)
+            waiter.future.set_result(None)
+
+    def _release(self, lane: _AgentLane, client_id: str):
+        lane.in_flight -= 1
+        remaining = lane.client_in_flight.get(client_id, 1) - 1
+        if remaining:
+            lane.client_in_flight[client_id] = remaining
+        else:
+            lane.client_in_flight.pop(client_id, None)
+        self._dispatch(lane)
+
+    def _remove(self, lane: _AgentLane, waiter: _Waiter):
+        clients = lane.queues[waiter.priority]
+        waiters = clients.get(waiter.client_id)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del clients[waiter.client_id]
+
+    @asynccontextmanager
+    async def slot(self, agent: str, ctx: Optional[RequestContext] = None):
+        """Hold one of the agent's concurrency slots for the duration of the block"""
+        ctx = ctx or RequestContext()
+        lane = self._lane(agent)
+        nobody_waiting = not any(lane.queues[p] for p in PRIORITY_CLASSES)
+        if nobody_waiting and lane.in_flight < lane.capacity and self._can_start(lane, ctx.client_id, ctx.priority):
+            self._grant(lane, ctx.client_id, ctx.priority, 0.0)
+        else:
+            waiter = _Waiter(asyncio.get_running_loop().create_future(), ctx)
+            clients = lane.queues[ctx.priority]
+            if not clients:
+                # A class returning from idle must not bank credit while it was away
+                lane.passes[ctx.priority] = max(lane.passes[ctx.priority], lane.virtual_time)
+            clients.setdefault(ctx.client_id, deque()).append(waiter)
+            # Waiters held back only by their own client's quota must not block others from free slots
+            self._dispatch(lane)
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if waiter.future.done() and not waiter.future.cancelled():
+                    self._release(lane, ctx.client_id)
+                else:
+                    self._remove(lane, waiter)
+                raise
+        try:
+            yield
+        finally:
+            self._release(lane, ctx.client_id)
+
+    def stats(self) -> Dict[str, Any]:
+        classes = {}
+        for priority, stats in self._stats.items():
+            served = stats["served"]
+            classes[priority] = {
+                "weight": self.weights.get(priority),
+                "client_quota": self._quota(priority),
+                "served": served,
+                "avg_wait_ms": round(stats["wait_ms_total"] / served, 2) if served else None,
+                "max_wait_ms": round(stats["max_wait_ms"], 2),
+                "queued": sum(lane.queued(priority) for lane in self._lanes.values()),
+            }
+        return {
+            "max_concurrency_per_agent": self.capacity,
+            "classes": classes,
+            "agents": {name: {"in_flight": lane.in_flight, "clients": dict(lane.client_in_flight)}
+                       for name, lane in self._lanes.items()},
+        }
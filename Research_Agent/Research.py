@@ -1,16 +1,14 @@
-import google.generativeai as genai
+import asyncio
 import os
 import json
 from pathlib import Path
 from Agent_Framework.google_a2a import GoogleA2AServer, A2AAgent, A2ACapability, SkillType
+from utils.model_router import ModelRouter, gemini_model_factory
+from utils.research_structurer import structure_research, render_markdown
 from typing import Dict, Any 
 
 class ResearchAgentA2A(GoogleA2AServer):
     def __init__(self):
-        # Initialize Google Gemini
-        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
-        
         # Load agent configuration from config.json
         config_path = Path(__file__).parent / "config.json"
         with open(config_path, "r") as f:
@@ -35,8 +33,18 @@ class ResearchAgentA2A(GoogleA2AServer):
             metadata=agent_config.get("metadata", {})
         )
         
-        super().__init__(agent)
+        super().__init__(agent, config=config)
+        
+        # Google Gemini is imported and configured lazily; the model for each call
+        # is picked by the routing policy and warmed up after the server starts
+        self.router = ModelRouter(
+            config.get("model_routing"), gemini_model_factory,
+            metrics=self.shared_metrics, rate_limiter=self.rate_limiter
+        )
+        self.add_startup_task("model", self.router.warm_up)
+        
         self._register_capabilities()
+        self.register_metrics("models", self.router.get_stats)
     
     def _register_capabilities(self):
         """Register research capabilities"""
@@ -107,7 +115,8 @@ class ResearchAgentA2A(GoogleA2AServer):
             output_schema={
                 "type": "object",
                 "properties": {
-                    "structured_research": {"type": "string", "description": "Structured/cleaned research content"}
+                    "structured_research": {"type": "string", "description": "Structured/cleaned research content"},
+                    "structure": {"type": "object", "description": "Sections, bullets, URLs and numeric facts"}
                 }
             },
             tags=["structure", "clean", "research"]
@@ -136,9 +145,14 @@ class ResearchAgentA2A(GoogleA2AServer):
         """
         
         try:
-            response = self.model.generate_content(prompt)
+            text = await self.router.generate(
+                prompt,
+                capability="comprehensive_research",
+                input_text=topic or "",
+                latency_budget_ms=payload.get("latency_budget_ms")
+            )
             return {
-                "research_report": f" Research Report by Dr. Research\n{'='*60}\n{response.text}",
+                "research_report": f" Research Report by Dr. Research\n{'='*60}\n{text}",
                 "topic": topic,
                 "focus_areas": focus_areas
             }
@@ -166,9 +180,14 @@ class ResearchAgentA2A(GoogleA2AServer):
         """
         
         try:
-            response = self.model.generate_content(prompt)
+            text = await self.router.generate(
+                prompt,
+                capability="trend_analysis",
+                input_text=domain or "",
+                latency_budget_ms=payload.get("latency_budget_ms")
+            )
             return {
-                "trend_report": f" Trend Analysis by Dr. Research\n{'='*60}\n{response.text}",
+                "trend_report": f" Trend Analysis by Dr. Research\n{'='*60}\n{text}",
                 "domain": domain,
                 "time_frame": time_frame
             }
@@ -178,19 +197,22 @@ class ResearchAgentA2A(GoogleA2AServer):
     async def handle_structure_research(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Handle structuring/cleaning user-provided research content"""
         raw = payload.get("raw_research", "")
-        # Placeholder: just wrap the input
-        structured = f"[Structured Research]\n{raw.strip()}"
-        return {"structured_research": structured}
+        # Local linear-time engine; no model call. Run off the event loop for large dumps.
+        structure = await asyncio.to_thread(structure_research, raw)
+        return {
+            "structured_research": render_markdown(structure),
+            "structure": structure
+        }
     
-    async def _execute_capability(self, capability: A2ACapability, payload: Dict[str, Any]):
-        """Execute capability handler"""
-        handler_name = f"handle_{capability.name}"
-        handler = getattr(self, handler_name)
-        return await handler(payload)
-if __name__ == "__main__":
+def create_app():
+    """App factory for uvicorn workers; each worker process builds its own agent"""
     from dotenv import load_dotenv
-    from Agent_Framework.google_a2a import run_server  # Ensure this is the same run_server from your google_a2a.py
 
     load_dotenv()
-    agent = ResearchAgentA2A()
-    run_server(agent, host="0.0.0.0", port=8001)
\ No newline at end of file
+    return ResearchAgentA2A().app
+
+if __name__ == "__main__":
+    from Agent_Framework.google_a2a import run_server
+
+    workers = int(os.getenv("A2A_WORKERS", "1"))
+    run_server("Research_Agent.Research:create_app", host="0.0.0.0", port=8001, workers=workers)
@@ -1,16 +1,16 @@
-import google.generativeai as genai
 import os
 import json
+import time
+import asyncio
 from pathlib import Path
 from Agent_Framework.google_a2a import GoogleA2AServer, A2AAgent, A2ACapability, SkillType
-from typing import Dict, Any 
+from utils.model_router import ModelRouter, gemini_model_factory
+from utils.event_log import log_event
+from Writer_Agent import long_form, copy_variants
+from typing import Dict, Any, List, Optional, Tuple
 
 class WriterAgentA2A(GoogleA2AServer):
     def __init__(self):
-        # Initialize Google Gemini
-        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
-        
         # Load agent configuration from config.json
         config_path = Path(__file__).parent / "config.json"
         with open(config_path, "r") as f:
@@ -35,8 +35,21 @@ class WriterAgentA2A(GoogleA2AServer):
             metadata=agent_config.get("metadata", {})
         )
         
-        super().__init__(agent)
+        super().__init__(agent, config=config)
+        
+        # Google Gemini is imported and configured lazily; the model for each call
+        # is picked by the routing policy and warmed up after the server starts
+        self.router = ModelRouter(
+            config.get("model_routing"), gemini_model_factory,
+            metrics=self.shared_metrics, rate_limiter=self.rate_limiter
+        )
+        self.add_startup_task("model", self.router.warm_up)
+        # Lengths written as outline + concurrent sections instead of one generation
+        self.long_form_config = config.get("long_form", {})
+        self.variants_config = config.get("marketing_variants", {})
+        
         self._register_capabilities()
+        self.register_metrics("models", self.router.get_stats)
     
     def _register_capabilities(self):
         """Register writing capabilities"""
@@ -52,7 +65,9 @@ class WriterAgentA2A(GoogleA2AServer):
                     "topic": {"type": "string", "description": "Article topic"},
                     "research_data": {"type": "string", "description": "Research foundation", "default": ""},
                     "tone": {"type": "string", "description": "Writing tone", "default": "professional"},
-                    "length": {"type": "string", "description": "Article length", "default": "medium"}
+                    "length": {"type": "string", "description": "Article length", "default": "medium"},
+                    "mode": {"type": "string", "description": "single or parallel (outline + concurrent sections); "
+                                                               "default depends on length"}
                 },
                 "required": ["topic"]
             },
@@ -76,15 +91,21 @@ class WriterAgentA2A(GoogleA2AServer):
                 "type": "object",
                 "properties": {
                     "product_service": {"type": "string", "description": "Product or service"},
-                    "target_audience": {"type": "string", "description": "Target audience"},
-                    "copy_type": {"type": "string", "description": "Type of copy", "default": "general"}
+                    "target_audience": {"type": ["string", "array"], "items": {"type": "string"},
+                                        "description": "Target audience, or a list of audiences"},
+                    "copy_type": {"type": ["string", "array"], "items": {"type": "string"},
+                                  "description": "Type of copy, or a list of types", "default": "general"},
+                    "variants": {"type": "integer", "description": "Versions per audience and copy type",
+                                 "default": 1}
                 },
                 "required": ["product_service", "target_audience"]
             },
             output_schema={
                 "type": "object",
                 "properties": {
-                    "marketing_copy": {"type": "string", "description": "Marketing copy content"}
+                    "marketing_copy": {"type": "string", "description": "Marketing copy content (best variant)"},
+                    "variants": {"type": "array", "description": "Distinct variants, best first"},
+                    "metadata": {"type": "object", "description": "Per-variant latency and dedup rate"}
                 }
             },
             tags=["marketing", "copywriting", "promotion"]
@@ -99,6 +120,21 @@ class WriterAgentA2A(GoogleA2AServer):
         tone = payload.get("tone", "professional")
         length = payload.get("length", "medium")
         
+        if self._use_long_form(length, payload.get("mode")):
+            try:
+                text, generation = await self._create_long_article(
+                    topic, research_data, tone, payload.get("latency_budget_ms")
+                )
+            except Exception as e:
+                raise Exception(f"Article creation failed: {str(e)}")
+            return {
+                "article": f"✍️ Article by Alex Writer\n{'='*60}\n{text}",
+                "topic": topic,
+                "tone": tone,
+                "length": length,
+                "generation": generation
+            }
+        
         word_targets = {
             "short": "400-600 words",
             "medium": "800-1200 words",
@@ -135,9 +171,14 @@ class WriterAgentA2A(GoogleA2AServer):
             """
         
         try:
-            response = self.model.generate_content(prompt)
+            text = await self.router.generate(
+                prompt,
+                capability="create_article",
+                input_text=research_data or "",
+                latency_budget_ms=payload.get("latency_budget_ms")
+            )
             return {
-                "article": f"✍️ Article by Alex Writer\n{'='*60}\n{response.text}",
+                "article": f"✍️ Article by Alex Writer\n{'='*60}\n{text}",
                 "topic": topic,
                 "tone": tone,
                 "length": length
@@ -145,11 +186,91 @@ class WriterAgentA2A(GoogleA2AServer):
         except Exception as e:
             raise Exception(f"Article creation failed: {str(e)}")
     
+    def _use_long_form(self, length: str, mode: Optional[str]) -> bool:
+        if mode in ("single", "parallel"):
+            return mode == "parallel"
+        return self.long_form_config.get("enabled", True) and length in self.long_form_config.get("lengths", ["long"])
+    
+    async def _create_long_article(self, topic: str, research_data: str, tone: str,
+                                   latency_budget_ms: Optional[float]) -> Tuple[str, Dict[str, Any]]:
+        """Outline, then every section concurrently, then introduction and conclusion; returns (text, timings)"""
+        cfg = self.long_form_config
+        sections = cfg.get("sections", 5)
+        started = time.perf_counter()
+        
+        def remaining_ms() -> Optional[float]:
+            if latency_budget_ms is None:
+                return None
+            return latency_budget_ms - (time.perf_counter() - started) * 1000
+        
+        async def generate(prompt: str) -> str:
+            return await self.router.generate(
+                prompt, capability="create_article", input_text=research_data or "", latency_budget_ms=remaining_ms()
+            )
+        
+        outline_text = await generate(long_form.build_outline_prompt(topic, tone, research_data, sections))
+        title, outline, parsed = long_form.parse_outline(outline_text, topic, sections)
+        if not parsed:
+            log_event("writer.long_form.generic_outline", "warning", topic=topic)
+        outline_ms = (time.perf_counter() - started) * 1000
+        
+        section_ms: List[float] = [0.0] * len(outline)
+        
+        async def write_section(index: int) -> str:
+            section_started = time.perf_counter()
+            text = await generate(long_form.build_section_prompt(
+                topic, tone, research_data, title, outline, index, cfg.get("section_words", 350)
+            ))
+            section_ms[index] = (time.perf_counter() - section_started) * 1000
+            return text
+        
+        tasks = [asyncio.ensure_future(write_section(i)) for i in range(len(outline))]
+        try:
+            section_texts = await asyncio.gather(*tasks)
+        except BaseException:
+            # One failed section fails the article; stop spending quota on the rest
+            for task in tasks:
+                task.cancel()
+            raise
+        sections_done = time.perf_counter()
+        
+        finish_text = await generate(long_form.build_finish_prompt(
+            topic, tone, title, outline, section_texts,
+            cfg.get("intro_words", 150), cfg.get("conclusion_words", 150)
+        ))
+        introduction, conclusion = long_form.parse_finish(finish_text)
+        finished = time.perf_counter()
+        
+        generation = {
+            "mode": "parallel",
+            "sections": len(outline),
+            "outline_parsed": parsed,
+            "timings_ms": {
+                "outline": round(outline_ms, 1),
+                "sections_wall": round((sections_done - started) * 1000 - outline_ms, 1),
+                "slowest_section": round(max(section_ms), 1),
+                "sections_sum": round(sum(section_ms), 1),
+                "finish": round((finished - sections_done) * 1000, 1),
+                "total": round((finished - started) * 1000, 1)
+            }
+        }
+        log_event("writer.long_form", topic=topic, sections=len(outline), **generation["timings_ms"])
+        return long_form.assemble(title, introduction, outline, section_texts, conclusion), generation
+    
     async def handle_create_marketing_copy(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Handle marketing copy creation requests"""
         product_service = payload.get("product_service")
         target_audience = payload.get("target_audience")
         copy_type = payload.get("copy_type", "general")
+        variants = max(1, int(payload.get("variants", 1)))
+        
+        if variants > 1 or isinstance(target_audience, list) or isinstance(copy_type, list):
+            try:
+                return await self._create_copy_variants(
+                    product_service, target_audience, copy_type, variants, payload.get("latency_budget_ms")
+                )
+            except Exception as e:
+                raise Exception(f"Marketing copy creation failed: {str(e)}")
         
         prompt = f"""
         As Alex Writer, create compelling marketing copy for: {product_service}
@@ -165,24 +286,103 @@ class WriterAgentA2A(GoogleA2AServer):
         """
         
         try:
-            response = self.model.generate_content(prompt)
+            text = await self.router.generate(
+                prompt,
+                capability="create_marketing_copy",
+                input_text=product_service or "",
+                latency_budget_ms=payload.get("latency_budget_ms")
+            )
             return {
-                "marketing_copy": f"📢 Marketing Copy by Alex Writer\n{'='*60}\n{response.text}",
+                "marketing_copy": f"📢 Marketing Copy by Alex Writer\n{'='*60}\n{text}",
                 "product_service": product_service,
                 "target_audience": target_audience
             }
         except Exception as e:
             raise Exception(f"Marketing copy creation failed: {str(e)}")
     
-    async def _execute_capability(self, capability: A2ACapability, payload: Dict[str, Any]):
-        """Execute capability handler"""
-        handler_name = f"handle_{capability.name}"
-        handler = getattr(self, handler_name)
-        return await handler(payload)
-if __name__ == "__main__":
+    async def _create_copy_variants(self, product_service: str, target_audience, copy_type, variants: int,
+                                    latency_budget_ms: Optional[float]) -> Dict[str, Any]:
+        """Generate every audience x copy type x variant concurrently, drop near-duplicates, rank the rest"""
+        cfg = self.variants_config
+        audiences = target_audience if isinstance(target_audience, list) else [target_audience]
+        copy_types = copy_type if isinstance(copy_type, list) else [copy_type]
+        for name, values in (("target_audience", audiences), ("copy_type", copy_types)):
+            if not values:
+                raise ValueError(f"{name} must list at least one value to generate variants for")
+        combos = copy_variants.combinations(audiences, copy_types, variants, cfg.get("max_variants", 12))
+        started = time.perf_counter()
+        
+        async def generate(combo: Dict[str, Any]) -> Dict[str, Any]:
+            call_started = time.perf_counter()
+            text = await self.router.generate(
+                copy_variants.build_variant_prompt(product_service, combo, variants),
+                capability="create_marketing_copy",
+                input_text=product_service or "",
+                latency_budget_ms=latency_budget_ms
+            )
+            latency_ms = round((time.perf_counter() - call_started) * 1000, 1)
+            return {**combo, "text": text.strip(), "latency_ms": latency_ms}
+        
+        # One failed variant should not sink the others
+        outcomes = await asyncio.gather(*(generate(combo) for combo in combos), return_exceptions=True)
+        generated = [outcome for outcome in outcomes if not isinstance(outcome, BaseException)]
+        errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        if not generated:
+            raise errors[0]
+        wall_ms = (time.perf_counter() - started) * 1000
+        # In request order; ranking reorders the candidates
+        per_variant = [{k: c[k] for k in ("target_audience", "copy_type", "variant", "latency_ms")} for c in generated]
+        
+        ranked = copy_variants.dedupe_and_rank(
+            generated, cfg.get("dedup_threshold", 0.6), cfg.get("shingle_size", 3)
+        )
+        duplicates = len(generated) - len(ranked)
+        latencies = [c["latency_ms"] for c in generated]
+        metadata = {
+            "requested": len(combos),
+            "generated": len(generated),
+            "failed": len(errors),
+            "duplicates_removed": duplicates,
+            "dedup_rate": round(duplicates / len(generated), 3),
+            "latency_ms": {
+                "per_variant": per_variant,
+                "wall": round(wall_ms, 1),
+                "sum": round(sum(latencies), 1),
+                "max": max(latencies)
+            }
+        }
+        if duplicates:
+            metadata["duplicates"] = [
+                {k: c[k] for k in ("target_audience", "copy_type", "variant", "duplicate_of", "similarity")}
+                for c in generated if "duplicate_of" in c
+            ]
+        if errors:
+            metadata["errors"] = sorted({f"{type(e).__name__}: {str(e)[:200]}" for e in errors})
+        if len(combos) < len(audiences) * len(copy_types) * variants:
+            metadata["capped_at"] = len(combos)
+        log_event("writer.copy_variants", requested=len(combos), generated=len(generated),
+                  duplicates_removed=duplicates, wall_ms=round(wall_ms, 1))
+        return {
+            "marketing_copy": f"📢 Marketing Copy by Alex Writer\n{'='*60}\n{ranked[0]['text']}",
+            "variants": [
+                {k: c[k] for k in ("rank", "target_audience", "copy_type", "variant", "text", "quality", "checks",
+                                   "distinctness", "latency_ms")}
+                for c in ranked
+            ],
+            "product_service": product_service,
+            "target_audience": target_audience,
+            "metadata": metadata
+        }
+    
+def create_app():
+    """App factory for uvicorn workers; each worker process builds its own agent"""
     from dotenv import load_dotenv
-    from Agent_Framework.google_a2a import run_server
 
     load_dotenv()
-    agent = WriterAgentA2A()
-    run_server(agent, host="localhost", port=8002)
\ No newline at end of file
+    return WriterAgentA2A().app
+
+if __name__ == "__main__":
+    from Agent_Framework.google_a2a import run_server
+
+    workers = int(os.getenv("A2A_WORKERS", "1"))
+    run_server("Writer_Agent.Writer:create_app", host="localhost", port=8002, workers=workers)
@@ -0,0 +1,122 @@
+# Writer_Agent/copy_variants.py
+"""Multi-variant marketing copy: prompts, near-duplicate removal and ranking.
+
+Every (audience, copy type, variant) combination is generated concurrently
+with its own angle hint. Outputs are compared as sets of word shingles, and
+a variant whose Jaccard similarity to a better-ranked one reaches the
+threshold is dropped. The survivors are ranked by cheap local checks, so no
+extra model call is spent on judging.
+"""
+import re
+from itertools import product
+from typing import Any, Dict, FrozenSet, List, Sequence
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_CTA_RE = re.compile(
+    r"\b(buy|shop|order|get|start|try|join|sign up|subscribe|book|download|discover|learn more|claim|call|"
+    r"contact|register|explore|request)\b",
+    re.IGNORECASE,
+)
+
+# Angle hints that push concurrent generations of the same combination apart
+ANGLES = [
+    "lead with the single biggest benefit",
+    "open with the problem the audience feels, then the solution",
+    "use social proof or a concrete result",
+    "create urgency with a time-bound reason to act",
+    "open with a curiosity-provoking question",
+    "lead with a bold, specific claim backed by one detail",
+]
+
+
+def combinations(audiences: Sequence[str], copy_types: Sequence[str], variants: int,
+                 max_variants: int) -> List[Dict[str, Any]]:
+    """Every audience x copy type x variant, capped at max_variants.
+
+    Every audience/copy type pair gets its first variant before any pair gets a second.
+    """
+    combos = [
+        {"target_audience": audience, "copy_type": copy_type, "variant": n + 1}
+        for n, (audience, copy_type) in product(range(variants), product(audiences, copy_types))
+    ]
+    return combos[:max_variants]
+
+
+def build_variant_prompt(product_service: str, combo: Dict[str, Any], total_for_combo: int) -> str:
+    angle = ""
+    if total_for_combo > 1:
+        angle = f"\n        Angle for this version: {ANGLES[(combo['variant'] - 1) % len(ANGLES)]}"
+    return f"""
+        As Alex Writer, create compelling marketing copy for: {product_service}
+        Target audience: {combo['target_audience']}
+        Copy type: {combo['copy_type']}{angle}
+
+        Marketing copy framework:
+        - Attention-grabbing headline
+        - Clear value proposition
+        - Audience-specific benefits
+        - Compelling call-to-action
+        - Persuasive yet authentic tone
+        """
+
+
+def shingles(text: str, size: int = 3) -> FrozenSet[str]:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return frozenset([" ".join(words)]) if words else frozenset()
+    return frozenset(" ".join(words[i:i + size]) for i in range(len(words) - size + 1))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def score_copy(text: str, audience: str) -> Dict[str, float]:
+    """Local quality checks in 0..1: headline, call to action, length, audience fit"""
+    lines = [line.strip(" #*") for line in text.splitlines() if line.strip(" #*")]
+    words = _WORD_RE.findall(text.lower())
+    audience_words = {w for w in _WORD_RE.findall(audience.lower()) if len(w) > 3}
+    checks = {
+        "headline": 1.0 if lines and len(lines[0].split()) <= 14 else 0.0,
+        "call_to_action": 1.0 if _CTA_RE.search(text) else 0.0,
+        # Full marks for 50-250 words, tapering outside
+        "length": min(1.0, len(words) / 50) if len(words) < 50 else min(1.0, 250 / len(words)),
+        "audience_fit": (len(audience_words & set(words)) / len(audience_words)) if audience_words else 1.0,
+    }
+    return {name: round(value, 3) for name, value in checks.items()}
+
+
+def dedupe_and_rank(candidates: List[Dict[str, Any]], threshold: float,
+                    shingle_size: int = 3) -> List[Dict[str, Any]]:
+    """Rank candidates ({"text", "target_audience", ...}) best first and mark near-duplicates.
+
+    Candidates are visited best first. Each one is dropped (``duplicate_of``
+    set to the rank of the kept variant it copies) if its similarity to a kept
+    variant reaches ``threshold``. Kept variants also get a ``distinctness``
+    score, 1 - their highest similarity to any other kept variant.
+    """
+    for candidate in candidates:
+        candidate["checks"] = score_copy(candidate["text"], candidate["target_audience"])
+        candidate["quality"] = round(sum(candidate["checks"].values()) / len(candidate["checks"]), 3)
+        candidate["_shingles"] = shingles(candidate["text"], shingle_size)
+    candidates.sort(key=lambda c: c["quality"], reverse=True)
+
+    kept: List[Dict[str, Any]] = []
+    for candidate in candidates:
+        similar = [(jaccard(candidate["_shingles"], k["_shingles"]), k) for k in kept]
+        best = max(similar, key=lambda pair: pair[0], default=(0.0, None))
+        if best[1] is not None and best[0] >= threshold:
+            candidate["duplicate_of"] = best[1]["rank"]
+            candidate["similarity"] = round(best[0], 3)
+            continue
+        candidate["rank"] = len(kept) + 1
+        kept.append(candidate)
+
+    for candidate in kept:
+        others = [jaccard(candidate["_shingles"], k["_shingles"]) for k in kept if k is not candidate]
+        candidate["distinctness"] = round(1 - max(others, default=0.0), 3)
+    for candidate in candidates:
+        del candidate["_shingles"]
+    return kept
@@ -0,0 +1,148 @@
+# Writer_Agent/long_form.py
+"""Outline-then-parallel-sections generation for long articles.
+
+A single 1500-2000 word generation takes as long as the model needs to emit
+every token in order. Instead, a short outline with one brief per section
+is generated first. The sections are then written concurrently, each
+seeing the topic, the research and the whole outline so they do not
+overlap. A last short call writes the introduction and conclusion from
+the section openings. Wall time is roughly outline + slowest section +
+finishing pass.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+_SECTION_LINE_RE = re.compile(r"^[ \t*#>-]*SECTION\s*\d*\s*:\s*(.+?)\s*(?:\|\s*(.+))?$",
+                              re.IGNORECASE | re.MULTILINE)
+_TITLE_LINE_RE = re.compile(r"^[ \t*#>-]*TITLE\s*:\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+_FINISH_MARKER_RE = re.compile(r"^[ \t]*<<<(INTRODUCTION|CONCLUSION)>>>[ \t]*$", re.MULTILINE)
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+# Used when the outline cannot be parsed, so the article is still written in parallel
+GENERIC_SECTIONS = [
+    ("Background and Context", "Where {topic} stands today and how it got here"),
+    ("Key Developments", "The most important recent developments and the evidence behind them"),
+    ("Challenges and Risks", "Obstacles, open questions and risks around {topic}"),
+    ("Opportunities and Applications", "Practical applications and who benefits, with concrete examples"),
+    ("Outlook", "What to expect next and what readers should watch for"),
+]
+
+
+def build_outline_prompt(topic: str, tone: str, research_data: str, sections: int) -> str:
+    research = f"\n        Research foundation:\n        {research_data}\n" if research_data else ""
+    return f"""
+        As Alex Writer, plan a long-form article about: {topic}
+        Tone: {tone}
+        {research}
+        Produce an outline of exactly {sections} body sections (no introduction or conclusion;
+        those are written separately). Each section needs a distinct angle so that sections
+        written independently do not repeat each other.
+
+        Output format, nothing else:
+        TITLE: <article title>
+        SECTION: <section heading> | <one or two sentence brief: what the section covers and which facts it uses>
+        """
+
+
+def parse_outline(text: str, topic: str, sections: int) -> Tuple[str, List[Dict[str, str]], bool]:
+    """(title, [{"heading", "brief"}], parsed); falls back to a generic outline if too few sections parse"""
+    title_match = _TITLE_LINE_RE.search(text)
+    title = title_match.group(1).strip().strip('"') if title_match else topic.strip().title()
+    parsed = [
+        {"heading": heading.strip(' "*'), "brief": (brief or "").strip()}
+        for heading, brief in _SECTION_LINE_RE.findall(text)
+        if heading.strip()
+    ][:sections]
+    if len(parsed) >= 2:
+        return title, parsed, True
+    generic = [{"heading": heading, "brief": brief.format(topic=topic)} for heading, brief in GENERIC_SECTIONS]
+    return title, generic[:sections], False
+
+
+def _outline_text(outline: List[Dict[str, str]]) -> str:
+    return "\n".join(f"{n}. {s['heading']}: {s['brief']}" for n, s in enumerate(outline, 1))
+
+
+def build_section_prompt(topic: str, tone: str, research_data: str, title: str,
+                         outline: List[Dict[str, str]], index: int, words: int) -> str:
+    section = outline[index]
+    research = (f"\n        Research foundation (shared by all sections):\n        {research_data}\n"
+                if research_data else "")
+    return f"""
+        As Alex Writer, write one section of the article "{title}" about: {topic}
+        Tone: {tone}
+        {research}
+        Full outline, for context (other sections are written separately; do not cover their ground):
+        {_outline_text(outline)}
+
+        Write section {index + 1} only: {section['heading']}
+        Brief: {section['brief']}
+
+        Specifications:
+        - About {words} words
+        - Detailed explanations with concrete examples and figures from the research where relevant
+        - Subheadings (###) only if they help; do not repeat the section heading
+        - No introduction or conclusion for the whole article
+        """
+
+
+def build_finish_prompt(topic: str, tone: str, title: str, outline: List[Dict[str, str]],
+                        section_texts: List[str], intro_words: int, conclusion_words: int) -> str:
+    openings = "\n".join(
+        f"{n}. {s['heading']}: {opening(text)}" for n, (s, text) in enumerate(zip(outline, section_texts), 1)
+    )
+    return f"""
+        As Alex Writer, finish the article "{title}" about: {topic}
+        Tone: {tone}
+
+        The body sections are written. Their headings and openings:
+        {openings}
+
+        Write:
+        - An introduction of about {intro_words} words with a compelling hook that previews the sections
+        - A strong, actionable conclusion of about {conclusion_words} words that ties the sections together
+
+        Output format, nothing else:
+        <<<INTRODUCTION>>>
+        <introduction>
+        <<<CONCLUSION>>>
+        <conclusion>
+        """
+
+
+def opening(text: str, sentences: int = 2) -> str:
+    """First sentences of a section, as a light summary for the finishing pass"""
+    flat = " ".join(line.strip() for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#"))
+    return " ".join(_SENTENCE_END_RE.split(flat)[:sentences])[:400]
+
+
+def parse_finish(text: str) -> Tuple[str, Optional[str]]:
+    """(introduction, conclusion); without markers the whole text is the introduction"""
+    parts: Dict[str, str] = {}
+    matches = list(_FINISH_MARKER_RE.finditer(text))
+    for n, match in enumerate(matches):
+        end = matches[n + 1].start() if n + 1 < len(matches) else len(text)
+        parts[match.group(1).upper()] = text[match.end():end].strip()
+    if not parts:
+        return text.strip(), None
+    return parts.get("INTRODUCTION", ""), parts.get("CONCLUSION") or None
+
+
+def strip_repeated_heading(text: str, heading: str) -> str:
+    """Drop a leading heading line that just repeats the section heading"""
+    lines = text.strip().splitlines()
+    if lines and lines[0].lstrip("#* ").rstrip("* ").strip().lower() == heading.lower():
+        lines = lines[1:]
+    return "\n".join(lines).strip()
+
+
+def assemble(title: str, introduction: str, outline: List[Dict[str, str]], section_texts: List[str],
+             conclusion: Optional[str]) -> str:
+    parts = [f"# {title}"]
+    if introduction:
+        parts.append(introduction)
+    for section, text in zip(outline, section_texts):
+        parts.append(f"## {section['heading']}\n\n{strip_repeated_heading(text, section['heading'])}")
+    if conclusion:
+        parts.append(f"## Conclusion\n\n{conclusion}")
+    return "\n\n".join(parts)
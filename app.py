@@ -1,14 +1,25 @@
 # app.py
-import uvicorn
 import asyncio
-from fastapi import FastAPI, UploadFile, File, Form
+import hmac
+from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, FileResponse, Response
+from pydantic import BaseModel, ValidationError
 from Orchestration_Agent.orchestrator_a2a import GoogleA2AOrchestrator
-from utils.export_utils import export_to_pdf, export_to_word
+from Orchestration_Agent.scheduler import RequestContext, PRIORITY_CLASSES
+from Agent_Framework.registry import AgentRegistry, registry_router, quiet_heartbeat_access_log
+from utils.deadlines import DeadlineExceeded, ClientDisconnected, deadline_from_budget, run_cancellable
+from utils import export_utils
+from utils.ingest import ArtifactStore, InvalidUpload, UploadTooLarge, UnsupportedFormat
+from utils import research_structurer
+from utils.event_log import bind_correlation_id, get_correlation_id, get_event_log, log_event, timed_event
+from utils.history_store import HistoryStore
+from utils.job_store import JobStore
 
 import os
-from typing import Optional
+import time
+import uuid
+from typing import Any, Dict, Optional
 import types
 
 app = FastAPI()
@@ -23,10 +34,148 @@ app.add_middleware(
 )
 
 orchestrator = GoogleA2AOrchestrator()
+artifacts = ArtifactStore(**orchestrator.config.get("ingest", {}))
+history = HistoryStore(**orchestrator.config.get("history", {}))
+jobs_config = dict(orchestrator.config.get("jobs", {}))
+jobs = JobStore(**{k: v for k, v in jobs_config.items() if k != "poll_interval_seconds"})
+# Background job tasks; holding them keeps them from being garbage collected mid-run
+running_jobs: set = set()
+
+# Agents push registrations and heartbeats to the registry. It is embedded here
+# unless A2A_REGISTRY_URL (or registry.url) points at a standalone one.
+registry_config = orchestrator.config.get("registry", {})
+registry_url = os.getenv("A2A_REGISTRY_URL", registry_config.get("url") or "")
+registry = None
+if not registry_url and registry_config.get("embedded", True):
+    registry = AgentRegistry(ttl_seconds=registry_config.get("ttl_seconds", 15))
+    app.include_router(registry_router(registry, token_env=registry_config.get("token_env", "A2A_REGISTRY_TOKEN")))
+    quiet_heartbeat_access_log()
+    if int(os.getenv("APP_WORKERS", "1")) > 1:
+        print("⚠️ Embedded registry with APP_WORKERS > 1: each worker sees only some heartbeats; "
+              "run `python -m Agent_Framework.registry` and set A2A_REGISTRY_URL instead")
+
+class CorrelationMiddleware:
+    """One correlation id per API request (X-Request-Id if the client sent one), echoed back.
+
+    Plain ASGI rather than @app.middleware("http"): BaseHTTPMiddleware hides client
+    disconnects from the endpoint, which run_workflow relies on to cancel work.
+    """
+
+    PROBE_PATHS = ("/health", "/registry/heartbeat", "/metrics")
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1") or str(uuid.uuid4())
+        path = scope["path"]
+        # Probes and heartbeats get their own event name so they can be sampled out
+        name = "http.probe" if path.startswith(self.PROBE_PATHS) else "http.request"
+
+        with bind_correlation_id(request_id), timed_event(name, method=scope["method"], path=path) as event:
+            async def send_with_id(message):
+                if message["type"] == "http.response.start":
+                    event["status"] = message["status"]
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode())]
+                await send(message)
+
+            await self.app(scope, receive, send_with_id)
+            if event.get("status", 200) >= 500:
+                event["level"] = "warning"
+
+app.add_middleware(CorrelationMiddleware)
 
 @app.on_event("startup")
 async def startup_event():
-    await orchestrator.initialize()
+    # Discover agents in the background so liveness answers right away
+    asyncio.create_task(orchestrator.initialize())
+    if registry is not None:
+        registry.start()
+        asyncio.create_task(orchestrator.follow_registry(registry.subscribe()))
+    elif registry_url:
+        asyncio.create_task(orchestrator.subscribe_registry(registry_url))
+
+@app.get("/health/live")
+async def liveness():
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    ready = orchestrator.initialized
+    body = {"status": "ready" if ready else "starting", "agents": list(orchestrator.agent_capabilities),
+            "missing": orchestrator.missing_agents()}
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+@app.get("/metrics")
+async def metrics():
+    body = {"scheduler": orchestrator.scheduler.stats(), "routing": orchestrator.registry_view.stats(),
+            "event_log": get_event_log().stats(), "history": history.stats(), "artifacts": artifacts.stats(),
+            "jobs": {**jobs.stats(), "running_here": len(running_jobs)}}
+    if registry is not None:
+        body["registry"] = registry.stats()
+    return body
+
+def client_identity(request: Request) -> str:
+    """X-Client-Id, falling back to the peer address.
+
+    The header is whatever the caller sends, so it separates well-behaved clients (scheduling, history,
+    jobs) but is not an authentication boundary; put the API behind a gateway that sets it if that matters.
+    """
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "anonymous")
+
+def request_context(request: Request, default_priority: str) -> RequestContext:
+    """Client identity from X-Client-Id (falling back to the peer address), priority from the endpoint's
+    class (X-Priority can only lower it) and deadline from X-Request-Timeout (seconds) or the configured
+    default for the priority class"""
+    client_id = client_identity(request)
+    priority = request.headers.get("x-priority", default_priority).lower()
+    # PRIORITY_CLASSES runs from highest to lowest; clients may demote their own work, never promote it
+    if priority not in PRIORITY_CLASSES or PRIORITY_CLASSES.index(priority) < PRIORITY_CLASSES.index(default_priority):
+        priority = default_priority
+    timeouts = orchestrator.config.get("request_timeouts", {})
+    timeout = timeouts.get(priority)
+    try:
+        timeout = float(request.headers["x-request-timeout"])
+    except (KeyError, ValueError):
+        pass
+    if timeout is not None and "max_seconds" in timeouts:
+        timeout = min(timeout, timeouts["max_seconds"])
+    deadline = deadline_from_budget(timeout * 1000 if timeout is not None else None)
+    return RequestContext(client_id=client_id, priority=priority, deadline=deadline)
+
+async def run_workflow(request: Request, ctx: RequestContext, work):
+    """Run a workflow, cancelling its agent calls if the client leaves or the deadline passes"""
+    try:
+        return await run_cancellable(request, work, ctx.deadline)
+    except DeadlineExceeded:
+        raise HTTPException(status_code=504, detail="Request deadline exceeded")
+    except ClientDisconnected:
+        log_event("http.client_disconnected", "warning", client_id=ctx.client_id, priority=ctx.priority)
+        raise HTTPException(status_code=499, detail="Client closed request")
+
+async def record_history(ctx: RequestContext, workflow: str, topic: str, result: str) -> Optional[str]:
+    """Persist a finished workflow off the event loop; history problems never fail the request"""
+    if not history.enabled:
+        return None
+    try:
+        return await asyncio.to_thread(
+            history.record,
+            workflow=ctx.workflow or workflow,
+            # Edit requests have no topic; the opening of the text stands in for one
+            topic=topic if len(topic) <= 200 else topic[:200].rsplit(" ", 1)[0] + "…",
+            result=result or "",
+            stages=ctx.stages,
+            exports=ctx.exports,
+            duration_ms=(time.perf_counter() - ctx.started_at) * 1000,
+            client_id=ctx.client_id,
+            correlation_id=get_correlation_id(),
+        )
+    except Exception as e:
+        log_event("history.record_failed", "warning", error=f"{type(e).__name__}: {str(e)[:200]}")
+        return None
 
 class UserInput(BaseModel):
     user_input: str
@@ -35,63 +184,275 @@ class ResearchRequest(BaseModel):
     topic: str
 
 class EditRequest(BaseModel):
-    content: str
+    content: Optional[str] = None
+    artifact_id: Optional[str] = None
 
 class WriteRequest(BaseModel):
     topic: str
     research: Optional[str] = None
+    research_artifact_id: Optional[str] = None
 
 class FullWorkflowRequest(BaseModel):
     topic: str
 
 class StructureResearchRequest(BaseModel):
-    research: str
+    research: Optional[str] = None
+    artifact_id: Optional[str] = None
+
+def resolve_text(text: Optional[str], artifact_id: Optional[str], required: bool = True) -> Optional[str]:
+    """Use inline text if given, otherwise load the text of an ingested artifact"""
+    if text:
+        return text
+    if artifact_id:
+        loaded = artifacts.load_text(artifact_id)
+        if loaded is None:
+            raise HTTPException(status_code=404, detail=f"Artifact '{artifact_id}' not found")
+        return loaded
+    if required:
+        raise HTTPException(status_code=422, detail="Provide either inline text or an artifact_id")
+    return None
+
+@app.post("/ingest")
+async def ingest_endpoint(request: Request):
+    """Stream an uploaded txt/docx/pdf (multipart field "file") to disk and extract its text into an artifact.
+
+    The body is parsed as it arrives rather than spooled first, so an
+    oversized upload is refused from Content-Length or at the limit.
+    """
+    if artifacts.content_length_too_large(request.headers.get("content-length")):
+        raise HTTPException(status_code=413, detail=f"Upload exceeds the {artifacts.max_bytes} byte limit")
+    try:
+        artifact = await artifacts.ingest_stream(request.headers.get("content-type", ""), request.stream())
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedFormat as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except InvalidUpload as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Text extraction failed: {str(e)}")
+    return artifact
+
+# Workflow plans: validated request -> (work, workflow name, topic). The plain
+# endpoints await the work; /jobs runs it in the background and reports progress.
+def plan_process(payload: UserInput, ctx: RequestContext):
+    return orchestrator.process_request(payload.user_input, ctx), "process", payload.user_input
+
+def plan_research(payload: ResearchRequest, ctx: RequestContext):
+    return orchestrator._research_workflow(payload.topic, ctx), "research_only", payload.topic
+
+def plan_edit(payload: EditRequest, ctx: RequestContext):
+    content = resolve_text(payload.content, payload.artifact_id)
+    return orchestrator._edit_workflow(content, ctx), "edit_only", content
+
+def plan_write(payload: WriteRequest, ctx: RequestContext):
+    # If research is provided, pass it to the writer agent, else run research first
+    research = resolve_text(payload.research, payload.research_artifact_id, required=False)
+    if research:
+        # Simulate writing with provided research
+        # (You may want to add a new orchestrator method for this in the future)
+        return orchestrator._edit_workflow(research, ctx), "edit_only", payload.topic
+    return orchestrator._write_with_research_workflow(payload.topic, ctx), "write_with_research", payload.topic
+
+def plan_full_workflow(payload: FullWorkflowRequest, ctx: RequestContext):
+    return orchestrator._full_workflow(payload.topic, ctx), "full_workflow", payload.topic
+
+# Job kind -> (request model, default priority, plan)
+WORKFLOWS = {
+    "process": (UserInput, "standard", plan_process),
+    "research": (ResearchRequest, "standard", plan_research),
+    "edit": (EditRequest, "interactive", plan_edit),
+    "write": (WriteRequest, "standard", plan_write),
+    "full_workflow": (FullWorkflowRequest, "batch", plan_full_workflow),
+}
+
+async def run_endpoint(request: Request, kind: str, payload: BaseModel):
+    _, priority, plan = WORKFLOWS[kind]
+    ctx = request_context(request, priority)
+    work, workflow, topic = plan(payload, ctx)
+    result = await run_workflow(request, ctx, work)
+    return {"result": result, "history_id": await record_history(ctx, workflow, topic, result)}
 
 @app.post("/process")
-async def process_request(payload: UserInput):
-    result = await orchestrator.process_request(payload.user_input)
-    return {"result": result}
+async def process_request(payload: UserInput, request: Request):
+    return await run_endpoint(request, "process", payload)
 
 @app.post("/research")
-async def research_endpoint(payload: ResearchRequest):
-    result = await orchestrator._research_workflow(payload.topic)
-    return {"result": result}
+async def research_endpoint(payload: ResearchRequest, request: Request):
+    return await run_endpoint(request, "research", payload)
 
 @app.post("/edit")
-async def edit_endpoint(payload: EditRequest):
-    result = await orchestrator._edit_workflow(payload.content)
-    return {"result": result}
+async def edit_endpoint(payload: EditRequest, request: Request):
+    return await run_endpoint(request, "edit", payload)
 
 @app.post("/write")
-async def write_endpoint(payload: WriteRequest):
-    # If research is provided, pass it to the writer agent, else run research first
-    if payload.research:
-        # Simulate writing with provided research
-        # (You may want to add a new orchestrator method for this in the future)
-        result = await orchestrator._edit_workflow(payload.research)
-    else:
-        result = await orchestrator._write_with_research_workflow(payload.topic)
-    return {"result": result}
+async def write_endpoint(payload: WriteRequest, request: Request):
+    return await run_endpoint(request, "write", payload)
 
 @app.post("/full_workflow")
-async def full_workflow_endpoint(payload: FullWorkflowRequest):
-    result = await orchestrator._full_workflow(payload.topic)
-    return {"result": result}
+async def full_workflow_endpoint(payload: FullWorkflowRequest, request: Request):
+    return await run_endpoint(request, "full_workflow", payload)
 
-# Standalone structuring/cleaning function
+# Agent calls each workflow makes, for job progress; "process" learns its workflow once routed
+STAGES_PER_WORKFLOW = {"research_only": 1, "edit_only": 1, "write_with_research": 3, "full_workflow": 3}
+# Main text field of each stage's output, shown as the job's partial result
+STAGE_TEXT_FIELDS = ("edited_content", "article", "research_report")
+
+def stage_progress(ctx: RequestContext) -> Dict[str, Any]:
+    stages = [{k: v for k, v in stage.items() if k != "output"} for stage in ctx.stages]
+    progress: Dict[str, Any] = {"stages": stages, "exports": ctx.exports}
+    if ctx.workflow in STAGES_PER_WORKFLOW:
+        progress.update(workflow=ctx.workflow, stages_total=STAGES_PER_WORKFLOW[ctx.workflow])
+    if ctx.stages and isinstance(ctx.stages[-1].get("output"), dict):
+        output = ctx.stages[-1]["output"]
+        text = next((output[field] for field in STAGE_TEXT_FIELDS if isinstance(output.get(field), str)), None)
+        if text is not None:
+            progress["partial_result"] = text
+    return progress
+
+async def run_job(job_id: str, ctx: RequestContext, work, workflow: str, topic: str):
+    """Run a submitted workflow, writing progress to the job store until it finishes, fails or is cancelled"""
+    poll = jobs_config.get("poll_interval_seconds", 1.0)
+    task = asyncio.ensure_future(work)
+    status, fields = "failed", {}
+    try:
+        await asyncio.to_thread(jobs.update, job_id, status="running")
+        reported = 0
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll)
+            if len(ctx.stages) != reported or not done:
+                reported = len(ctx.stages)
+                await asyncio.to_thread(jobs.update, job_id, **stage_progress(ctx))
+            if done:
+                result = task.result()
+                history_id = await record_history(ctx, workflow, topic, result)
+                fields = {"result": result, "history_id": history_id}
+                failed = [stage for stage in ctx.stages if not stage["success"]]
+                if failed:
+                    fields["error"] = f"{failed[-1]['stage']} stage failed ({failed[-1]['error_code']})"
+                else:
+                    status = "completed"
+                break
+            if ctx.deadline is not None and time.monotonic() >= ctx.deadline:
+                fields = {"error": "Request deadline exceeded"}
+                break
+            if await asyncio.to_thread(jobs.cancel_requested, job_id):
+                status = "cancelled"
+                break
+    except Exception as e:
+        fields = {"error": f"{type(e).__name__}: {str(e)[:500]}"}
+    finally:
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except BaseException:
+                pass
+        log_event("job.finished", "info" if status == "completed" else "warning", job_id=job_id,
+                  workflow=ctx.workflow or workflow, status=status)
+        await asyncio.to_thread(jobs.update, job_id, status=status, **stage_progress(ctx), **fields)
+
+@app.post("/jobs/{kind}", status_code=202)
+async def submit_job(kind: str, body: Dict[str, Any], request: Request):
+    """Start a workflow in the background (same body as the matching endpoint); poll GET /jobs/{id}"""
+    if kind not in WORKFLOWS:
+        raise HTTPException(status_code=404, detail=f"Unknown workflow '{kind}'; expected one of {list(WORKFLOWS)}")
+    model, priority, plan = WORKFLOWS[kind]
+    try:
+        payload = model.model_validate(body)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    ctx = request_context(request, priority)
+    work, workflow, topic = plan(payload, ctx)
+    job_id = await asyncio.to_thread(jobs.create, kind, workflow, topic[:200],
+                                     STAGES_PER_WORKFLOW.get(workflow), ctx.client_id)
+    # create_task copies the context, so the job's events keep this request's correlation id
+    task = asyncio.create_task(run_job(job_id, ctx, work, workflow, topic))
+    running_jobs.add(task)
+    task.add_done_callback(running_jobs.discard)
+    return {"job_id": job_id, "status": "queued", "poll_url": f"/jobs/{job_id}"}
+
+async def scoped_job(job_id: str, request: Request) -> Dict[str, Any]:
+    """The caller's job; another client's job reads as missing, like history entries"""
+    client_id = history_scope(request)
+    job = await asyncio.to_thread(jobs.get, job_id)
+    if job is None or (client_id is not None and job["client_id"] != client_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str, request: Request):
+    """Status, finished stages, the latest stage's output and, once completed, the result"""
+    return await scoped_job(job_id, request)
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str, request: Request):
+    await scoped_job(job_id, request)
+    if not await asyncio.to_thread(jobs.request_cancel, job_id):
+        raise HTTPException(status_code=409, detail="Job not found or already finished")
+    return {"job_id": job_id, "cancel_requested": True}
+
+def history_scope(request: Request) -> Optional[str]:
+    """Client whose history and jobs the caller may read; None (every client) with the admin token"""
+    expected = os.getenv(history.admin_token_env)
+    token = request.headers.get("x-history-token")
+    if token is not None:
+        if not expected or not hmac.compare_digest(token, expected):
+            raise HTTPException(status_code=401, detail="Invalid history token")
+        return None
+    return client_identity(request)
+
+@app.get("/history/search")
+async def history_search(request: Request, q: str = "", workflow: Optional[str] = None,
+                         status: Optional[str] = None, page: int = 1, page_size: int = 20):
+    """The caller's past workflows matching q (all words, last one as a prefix), best match first; newest first without q"""
+    client_id = history_scope(request)
+    return await asyncio.to_thread(history.search, q, workflow, status, page, page_size, client_id)
+
+@app.get("/history/{history_id}")
+async def history_entry(history_id: str, request: Request, include_stages: bool = True):
+    """A stored workflow of the caller's with its result, exports, timings and (optionally) per-stage outputs"""
+    client_id = history_scope(request)
+    entry = await asyncio.to_thread(history.get, history_id)
+    # Another client's entry reads as missing, so ids cannot be probed
+    if entry is None or (client_id is not None and entry["client_id"] != client_id):
+        raise HTTPException(status_code=404, detail="History entry not found")
+    if not include_stages:
+        entry["stages"] = [{k: v for k, v in stage.items() if k != "output"} for stage in entry["stages"]]
+    return entry
+
+# Standalone structuring/cleaning function (local engine, no agent round-trip)
 async def structure_research(research: str) -> str:
-    # Placeholder: just return the input for now
-    return f"[Structured Research]\n{research.strip()}"
+    structure = await asyncio.to_thread(research_structurer.structure_research, research)
+    return research_structurer.render_markdown(structure)
 
 @app.post("/structure_research")
 async def structure_research_endpoint(payload: StructureResearchRequest):
-    result = await structure_research(payload.research)
+    research = resolve_text(payload.research, payload.artifact_id)
+    result = await structure_research(research)
     return {"result": result}
 
-# Serve outputs folder for download
+# Serve exported files for download. Names are content-addressed, so a file
+# never changes once written and clients may cache it indefinitely.
 os.makedirs("outputs", exist_ok=True)
-from fastapi.staticfiles import StaticFiles
-app.mount("/outputs", StaticFiles(directory="outputs"), name="outputs")
+
+@app.get("/outputs/{filename}")
+async def download_export(filename: str, request: Request):
+    store = export_utils.export_store
+    filepath = store.resolve(filename)
+    if filepath is None:
+        raise HTTPException(status_code=404, detail="Export not found")
+    etag = store.etag_for(filename)
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(filepath, headers=headers, filename=filename)
 
 if __name__ == "__main__":
-    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
+    import uvicorn
+
+    # APP_WORKERS > 1 is the production mode: several processes, no auto-reload.
+    # Each worker imports this module and builds its own orchestrator after forking.
+    workers = int(os.getenv("APP_WORKERS", "1"))
+    reload = workers == 1 and os.getenv("APP_RELOAD", "1") != "0"
+    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=reload, workers=workers)
@@ -0,0 +1,96 @@
+# benchmarks/docx_bench.py
+"""Streaming DOCX writer vs the previous python-docx export path.
+
+Reports wall time, peak Python memory (tracemalloc) and file size for
+markdown documents of increasing length. tracemalloc does not see lxml's
+C allocations, so the python-docx memory figure is a lower bound.
+python-docx must be installed to run the baseline.
+
+Run from the project root:
+    python -m benchmarks.docx_bench --lines 1000,10000,50000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from utils.docx_stream import write_docx_stream
+
+
+def legacy_python_docx(filepath: str, content: str, topic: str):
+    """The export_to_word implementation before the streaming writer"""
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading(topic, 0)
+    for line in content.split("\n"):
+        doc.add_paragraph(line)
+    doc.save(filepath)
+
+
+def streaming(filepath: str, content: str, topic: str):
+    write_docx_stream(filepath, content, title=topic)
+
+
+def make_document(lines: int) -> str:
+    block = [
+        "## Section heading",
+        "This paragraph has **bold findings** and a statistic: 42% of teams adopted it in 2024.",
+        "- A bullet point with *emphasis*",
+        "- Another bullet point",
+        "1. First numbered step",
+        "2. Second numbered step",
+        "",
+        "A longer closing paragraph that explains the implications in more detail for the reader.",
+    ]
+    out = []
+    while len(out) < lines:
+        out.extend(block)
+    return "\n".join(out[:lines])
+
+
+def measure(fn, content: str, topic: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.docx")
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn(path, content, topic)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {"seconds": elapsed, "peak_mb": peak / 1e6, "file_kb": os.path.getsize(path) / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", default="1000,10000,50000")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = []
+    for lines in (int(n) for n in args.lines.split(",")):
+        content = make_document(lines)
+        row = {"lines": lines, "streaming": measure(streaming, content, "Benchmark")}
+        try:
+            row["python_docx"] = measure(legacy_python_docx, content, "Benchmark")
+        except ImportError:
+            row["python_docx"] = None
+        report.append(row)
+
+        base = row["python_docx"]
+        s = row["streaming"]
+        line = f"{lines:>7} lines | stream {s['seconds']*1000:8.1f} ms {s['peak_mb']:7.2f} MB"
+        if base:
+            line += (f" | python-docx {base['seconds']*1000:8.1f} ms {base['peak_mb']:7.2f} MB"
+                     f" | speedup {base['seconds'] / s['seconds']:5.1f}x")
+        print(line)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
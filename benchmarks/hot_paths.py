@@ -0,0 +1,215 @@
+# benchmarks/hot_paths.py
+"""Microbenchmarks for the per-request hot paths, legacy vs current.
+
+Covers intent routing (the old per-call pattern loop vs IntentRouter), A2A
+message encode/decode (dict round-trip vs pydantic JSON), capability
+dispatch (getattr on a formatted name vs the handler dict) and export
+rendering (DOCX and PDF), each at several payload sizes. Intent routing
+also checks that both versions agree on a fixed corpus before timing.
+
+Run from the project root:
+    python -m benchmarks.hot_paths --sizes 1000,100000,1000000 --output hot_paths.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from Agent_Framework.google_a2a import A2AMessage, A2AResponse, MessageType
+from Orchestration_Agent.intent_router import IntentRouter
+from utils.export_utils import _render_pdf, _render_word
+
+_WORDS = ("market", "growth", "the", "analysis", "quarterly", "team", "remote", "data", "climate",
+          "policy", "and", "of", "energy", "customer", "strategy", "risk", "model", "report")
+
+CORPUS = [
+    "Edit this text: teh quick brown fox",
+    "Please proofread my essay about dogs",
+    "research quantum computing",
+    "Research   the history of Rome",
+    "find information on solar panels",
+    "analyze the trends in AI funding",
+    "write an article about climate change",
+    "Write a blog article about remote work",
+    "create some content about electric cars",
+    "draft an article on productivity",
+    "machine learning in healthcare",
+    "",
+    "x" * 250,
+    "a long story " * 30 + "with research in it",
+    "Improve the grammar: me and him goes",
+]
+
+
+def legacy_analyze_intent(user_input: str) -> Tuple[str, Dict]:
+    """GoogleA2AOrchestrator.analyze_intent before IntentRouter"""
+    user_lower = user_input.lower()
+    patterns = {
+        'edit_only': [r'edit.*?:', r'improve.*grammar', r'proofread', r'correct.*mistakes', r'fix.*spelling', r'enhance.*clarity'],
+        'research_only': [r'^research\s+', r'find.*information', r'lookup.*data', r'investigate', r'analyze.*trends'],
+        'write_with_research': [r'^write.*article', r'create.*content.*about', r'compose.*piece', r'draft.*article']
+    }
+    for workflow, pattern_list in patterns.items():
+        if any(re.search(pattern, user_lower) for pattern in pattern_list):
+            if workflow == 'edit_only':
+                text = user_input.split(':', 1)[1].strip() if ':' in user_input else user_input
+                return workflow, {'text': text}
+            elif workflow == 'research_only':
+                topic = re.sub(r'^research\s+', '', user_lower).strip()
+                return workflow, {'topic': topic or user_input.strip()}
+            elif workflow == 'write_with_research':
+                topic = re.sub(r'^write.*?about\s+', '', user_lower).strip()
+                return workflow, {'topic': topic or user_input.strip()}
+
+    if len(user_input) > 200 and not any(word in user_lower for word in ['research', 'write', 'create']):
+        return 'edit_only', {'text': user_input}
+    else:
+        return 'full_workflow', {'topic': user_input}
+
+
+def make_text(size: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    words: List[str] = []
+    total = 0
+    while total < size:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        total += len(word) + 1
+    # Newlines every ~12 words so exports produce realistic line counts
+    return "\n".join(" ".join(words[i:i + 12]) for i in range(0, len(words), 12))[:size]
+
+
+def best_of(fn: Callable[[], Any], repeat: int, min_seconds: float = 0.05) -> float:
+    """Best per-call time in microseconds; each repeat loops until min_seconds have passed"""
+    best = float("inf")
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            fn()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_seconds:
+                break
+        best = min(best, elapsed / calls)
+    return best * 1e6
+
+
+def row(group: str, size: int, legacy_us: float, current_us: float) -> Dict[str, Any]:
+    result = {"benchmark": group, "size": size, "legacy_us": round(legacy_us, 2),
+              "current_us": round(current_us, 2),
+              "speedup": round(legacy_us / current_us, 2) if current_us else None}
+    print(f"{group:<16} | {size:>9} | legacy {legacy_us:12.2f} µs | current {current_us:12.2f} µs | "
+          f"{result['speedup']}x")
+    return result
+
+
+def bench_intent(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    router = IntentRouter()
+    for text in CORPUS + [make_text(n) for n in sizes]:
+        assert router.route(text) == legacy_analyze_intent(text), f"Routers disagree on {text[:60]!r}"
+    results = [row("intent/corpus", len(CORPUS),
+                   best_of(lambda: [legacy_analyze_intent(t) for t in CORPUS], repeat),
+                   best_of(lambda: [router.route(t) for t in CORPUS], repeat))]
+    for size in sizes:
+        # Worst case: no workflow matches, so every pattern scans the whole input
+        text = make_text(size)
+        results.append(row("intent/no-match", size,
+                           best_of(lambda: legacy_analyze_intent(text), repeat),
+                           best_of(lambda: router.route(text), repeat)))
+    return results
+
+
+def bench_messages(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    for size in sizes:
+        message = A2AMessage(message_type=MessageType.REQUEST, sender_id="orchestrator",
+                             recipient_id="editor-agent-001", capability_name="comprehensive_edit",
+                             payload={"content": make_text(size)}, correlation_id="bench")
+        response = A2AResponse(message_id="bench", success=True,
+                               result={"edited_content": make_text(size, seed=8), "metadata": {"size": size}})
+        body = response.model_dump_json().encode()
+
+        def legacy():
+            json.dumps(message.model_dump())
+            A2AResponse(**json.loads(body))
+
+        def current():
+            message.model_dump_json()
+            A2AResponse.model_validate_json(body)
+
+        results.append(row("message/json", size, best_of(legacy, repeat), best_of(current, repeat)))
+    return results
+
+
+class _Agent:
+    async def handle_comprehensive_edit(self, payload):
+        return payload
+
+
+def bench_dispatch(repeat: int) -> List[Dict[str, Any]]:
+    agent = _Agent()
+    handlers = {"comprehensive_edit": agent.handle_comprehensive_edit}
+    name = "comprehensive_edit"
+    payload: Dict[str, Any] = {}
+    loop = asyncio.new_event_loop()
+
+    async def legacy(n: int):
+        for _ in range(n):
+            await getattr(agent, f"handle_{name}")(payload)
+
+    async def current(n: int):
+        for _ in range(n):
+            await handlers[name](payload)
+
+    n = 1000
+    try:
+        results = [row("dispatch", n,
+                       best_of(lambda: loop.run_until_complete(legacy(n)), repeat) / n,
+                       best_of(lambda: loop.run_until_complete(current(n)), repeat) / n)]
+    finally:
+        loop.close()
+    return results
+
+
+def bench_exports(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    """Absolute render times; there is no legacy variant, so both columns are the same renderer"""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            content = make_text(size)
+            for kind, render in (("docx", _render_word), ("pdf", _render_pdf)):
+                path = os.path.join(tmp, f"bench.{kind}")
+                us = best_of(lambda: render(content, "Benchmark", path), repeat, min_seconds=0)
+                results.append({"benchmark": f"export/{kind}", "size": size, "current_us": round(us, 2),
+                                "output_bytes": os.path.getsize(path)})
+                print(f"{'export/' + kind:<16} | {size:>9} | {us / 1000:12.2f} ms | "
+                      f"{os.path.getsize(path)} bytes")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Payload sizes in characters")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-exports", action="store_true")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    report = bench_intent(sizes, args.repeat) + bench_messages(sizes, args.repeat) + bench_dispatch(args.repeat)
+    if not args.skip_exports:
+        report += bench_exports(sizes, min(args.repeat, 3))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+# benchmarks/load_test.py
+"""End-to-end load test of app.py with a configurable request mix.
+
+Open loop (--mode open) sends Poisson arrivals at each rate in --rates and
+measures latency from the scheduled send time, so a saturated server cannot
+hide queueing delay. Closed loop (--mode closed) runs each user count in
+--users, and every user waits for its previous response before sending again.
+Each step reports throughput, error rate and p50/p95/p99 latency per
+endpoint. Together the steps form a saturation curve.
+
+With --spawn the stack is started through supervisor.py. The agents use the
+simulated model backend (A2A_SIMULATED_MODEL_LATENCY_MS) and the shared
+rate limiter is switched off, unless --keep-rate-limit is given.
+
+Run from the project root:
+    python -m benchmarks.load_test --spawn --mode open --rates 1,2,4,8 --duration 30 --output load.json
+    python -m benchmarks.load_test --mode closed --users 1,4,16 --baseline load.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+DEFAULT_MIX = "edit=0.4,research=0.25,write=0.25,full_workflow=0.1"
+
+_EDIT_TEXT = (
+    "Remote work has changed how teams collaborate. Many companys now rely on asynchronous "
+    "communication, and and managers must learn new ways to measure productivity.\n\n"
+    "The shift also affects hiring, since candidates can live anywhere. This widens the talent "
+    "pool but it also increases competition for the best people"
+)
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - {"edit", "research", "write", "full_workflow"}
+    if unknown:
+        raise ValueError(f"Unknown endpoints in mix: {sorted(unknown)}")
+    return mix
+
+
+def make_request(endpoint: str, n: int) -> Dict[str, Any]:
+    """Unique topics so results come from the agents, not their caches"""
+    topic = f"load test topic {n} {random.random():.6f}"
+    if endpoint == "edit":
+        return {"content": f"{_EDIT_TEXT} ({n})."}
+    return {"topic": topic}
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))], 1)
+
+
+def summarize(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    def block(rows):
+        latencies = [r["latency_ms"] for r in rows if r["ok"]]
+        errors = sum(1 for r in rows if not r["ok"])
+        return {
+            "requests": len(rows),
+            "errors": errors,
+            "error_rate": round(errors / len(rows), 4) if rows else 0.0,
+            "throughput_rps": round(len(rows) / elapsed, 3) if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+        }
+
+    endpoints = sorted({r["endpoint"] for r in results})
+    statuses: Dict[str, int] = {}
+    for r in results:
+        statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+    return {
+        "overall": block(results),
+        "endpoints": {name: block([r for r in results if r["endpoint"] == name]) for name in endpoints},
+        "statuses": statuses,
+    }
+
+
+class LoadGenerator:
+    def __init__(self, base_url: str, mix: Dict[str, float], timeout: float, seed: int = 1):
+        self.base_url = base_url.rstrip("/")
+        self.endpoints = list(mix)
+        self.weights = [mix[e] for e in self.endpoints]
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.sent = 0
+
+    async def _send(self, session, client_id: str, scheduled: float) -> Dict[str, Any]:
+        endpoint = self.rng.choices(self.endpoints, self.weights)[0]
+        self.sent += 1
+        body = make_request(endpoint, self.sent)
+        status, ok = 0, False
+        try:
+            async with session.post(f"{self.base_url}/{endpoint}", json=body,
+                                    headers={"X-Client-Id": client_id}) as response:
+                payload = await response.json(content_type=None)
+                status = response.status
+                result = payload.get("result", "") if isinstance(payload, dict) else ""
+                # Workflows report agent failures in-band as text
+                ok = status == 200 and isinstance(result, str) and "failed:" not in result[:200]
+        except asyncio.TimeoutError:
+            status = "timeout"
+        except Exception as e:
+            status = type(e).__name__
+        return {"endpoint": endpoint, "status": status, "ok": ok,
+                "latency_ms": (time.perf_counter() - scheduled) * 1000}
+
+    async def open_loop(self, session, rate: float, duration: float) -> List[Dict[str, Any]]:
+        tasks = []
+        start = time.perf_counter()
+        next_at = start
+        n = 0
+        while next_at - start < duration:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self._send(session, f"open-{n % 50}", next_at)))
+            n += 1
+            next_at += self.rng.expovariate(rate)
+        return list(await asyncio.gather(*tasks))
+
+    async def closed_loop(self, session, users: int, duration: float, think_time: float) -> List[Dict[str, Any]]:
+        end = time.perf_counter() + duration
+        results: List[Dict[str, Any]] = []
+
+        async def user(i: int):
+            while time.perf_counter() < end:
+                results.append(await self._send(session, f"user-{i}", time.perf_counter()))
+                if think_time:
+                    await asyncio.sleep(self.rng.expovariate(1 / think_time))
+
+        await asyncio.gather(*(user(i) for i in range(users)))
+        return results
+
+    async def run(self, mode: str, levels: List[float], duration: float, think_time: float) -> List[Dict[str, Any]]:
+        import aiohttp
+
+        steps = []
+        connector = aiohttp.TCPConnector(limit=0)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            for level in levels:
+                start = time.perf_counter()
+                if mode == "open":
+                    results = await self.open_loop(session, level, duration)
+                else:
+                    results = await self.closed_loop(session, int(level), duration, think_time)
+                elapsed = time.perf_counter() - start
+                step = {"mode": mode, "level": level, "elapsed_s": round(elapsed, 2), **summarize(results, elapsed)}
+                steps.append(step)
+                o = step["overall"]
+                label = f"{level:g} rps" if mode == "open" else f"{int(level)} users"
+                print(f"{label:>10} | {o['requests']:5} req | {o['throughput_rps']:6.2f} rps | "
+                      f"err {o['error_rate']:6.1%} | p50 {o['p50_ms']} ms | p95 {o['p95_ms']} ms | p99 {o['p99_ms']} ms")
+        return steps
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Regressions in p95 latency or error rate versus a previous report, step by step"""
+    problems = []
+    previous = {(s["mode"], s["level"]): s for s in baseline.get("steps", [])}
+    for step in report["steps"]:
+        old = previous.get((step["mode"], step["level"]))
+        if old is None:
+            continue
+        for endpoint, now in step["endpoints"].items():
+            before = old["endpoints"].get(endpoint)
+            if not before:
+                continue
+            if before["p95_ms"] and now["p95_ms"] and now["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+                problems.append(f"{endpoint} @ {step['level']:g}: p95 {before['p95_ms']} -> {now['p95_ms']} ms")
+            if now["error_rate"] > before["error_rate"] + 0.01:
+                problems.append(f"{endpoint} @ {step['level']:g}: error rate "
+                                f"{before['error_rate']:.1%} -> {now['error_rate']:.1%}")
+    return problems
+
+
+def wait_ready(url: str, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except Exception:
+            pass
+        time.sleep(0.25)
+    return False
+
+
+def spawn_stack(args) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "A2A_SIMULATED_MODEL_LATENCY_MS": str(args.model_latency_ms),
+        "A2A_SIMULATED_MODEL_JITTER_MS": str(args.model_jitter_ms),
+    }
+    if not args.keep_rate_limit:
+        env["A2A_RATE_LIMIT_ENABLED"] = "0"
+    proc = subprocess.Popen([sys.executable, "supervisor.py", "--log-file", args.stack_log], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not wait_ready(f"{args.base_url.rstrip('/')}/health/ready", timeout=120):
+        proc.send_signal(signal.SIGTERM)
+        raise SystemExit(f"Stack did not become ready; see {args.stack_log}")
+    return proc
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--mode", choices=["open", "closed"], default="open")
+    parser.add_argument("--rates", default="1,2,4,8", help="Open loop: arrivals per second for each step")
+    parser.add_argument("--users", default="1,4,16", help="Closed loop: concurrent users for each step")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per step")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Closed loop: mean pause between requests")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--timeout", type=float, default=300, help="Per-request client timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--spawn", action="store_true", help="Start the stack with a simulated model backend")
+    parser.add_argument("--model-latency-ms", type=float, default=800)
+    parser.add_argument("--model-jitter-ms", type=float, default=200)
+    parser.add_argument("--keep-rate-limit", action="store_true")
+    parser.add_argument("--stack-log", default="load_test_stack.log")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed relative p95 increase")
+    args = parser.parse_args()
+
+    levels = [float(x) for x in (args.rates if args.mode == "open" else args.users).split(",")]
+    generator = LoadGenerator(args.base_url, parse_mix(args.mix), args.timeout, seed=args.seed)
+    stack = spawn_stack(args) if args.spawn else None
+    try:
+        steps = asyncio.run(generator.run(args.mode, levels, args.duration, args.think_time))
+    finally:
+        if stack is not None:
+            stack.send_signal(signal.SIGTERM)
+            stack.wait(timeout=30)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "mode": args.mode, "levels": levels, "duration_s": args.duration, "mix": parse_mix(args.mix),
+            "simulated_model_latency_ms": args.model_latency_ms if args.spawn else None,
+        },
+        "steps": steps,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(report, json.load(f), args.max_regression)
+        for problem in problems:
+            print(f"❌ Regression: {problem}")
+        if problems:
+            raise SystemExit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/long_form_bench.py
+"""Single-shot vs outline + parallel sections for long articles in the Writer agent.
+
+Calls WriterAgentA2A.handle_create_article in-process with length="long",
+once per mode per run, and reports median wall time, the parallel mode's
+phase timings and the speedup. The model is simulated by default: a fixed
+time to first token plus decode time for the number of words each prompt
+asks for. With --gemini the real model is called (needs GOOGLE_API_KEY
+and spends quota).
+
+Run from the project root:
+    python -m benchmarks.long_form_bench --runs 3
+    python -m benchmarks.long_form_bench --ttft-ms 800 --tokens-per-second 90 --output long_form.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+RESEARCH = (
+    "Utility-scale solar capacity grew 24% last year. Battery storage paired with solar farms now "
+    "shifts midday output into the evening peak. Grid interconnection queues are the main bottleneck, "
+    "with average waits above four years. Agrivoltaics lets farmland host panels and crops together."
+)
+
+
+async def run(args):
+    from Writer_Agent.Writer import WriterAgentA2A
+
+    agent = WriterAgentA2A()
+    report = {"backend": "gemini" if args.gemini else "simulated", "runs": args.runs, "modes": {}}
+    if not args.gemini:
+        report.update(ttft_ms=args.ttft_ms, tokens_per_second=args.tokens_per_second)
+
+    for mode in ("single", "parallel"):
+        walls, words, generations = [], [], []
+        for n in range(args.runs):
+            payload = {"topic": f"{args.topic} ({n})", "research_data": RESEARCH, "length": "long", "mode": mode}
+            start = time.perf_counter()
+            result = await agent.handle_create_article(payload)
+            walls.append((time.perf_counter() - start) * 1000)
+            words.append(len(result["article"].split()))
+            if "generation" in result:
+                generations.append(result["generation"]["timings_ms"])
+        row = {"median_ms": round(statistics.median(walls), 1), "min_ms": round(min(walls), 1),
+               "words": round(statistics.median(words))}
+        if generations:
+            row["phases_median_ms"] = {k: round(statistics.median(g[k] for g in generations), 1)
+                                       for k in generations[0]}
+        report["modes"][mode] = row
+        print(f"{mode:>8} | median {row['median_ms']:8.1f} ms | min {row['min_ms']:8.1f} ms | ~{row['words']} words")
+
+    report["speedup"] = round(report["modes"]["single"]["median_ms"] / report["modes"]["parallel"]["median_ms"], 2)
+    phases = report["modes"]["parallel"]["phases_median_ms"]
+    print(f"parallel phases: outline {phases['outline']} ms, sections {phases['sections_wall']} ms "
+          f"(slowest {phases['slowest_section']}, sum {phases['sections_sum']}), finish {phases['finish']} ms")
+    print(f"speedup: {report['speedup']}x")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--topic", default="The future of solar farms")
+    parser.add_argument("--ttft-ms", type=float, default=600, help="Simulated time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=120, help="Simulated decode speed")
+    parser.add_argument("--gemini", action="store_true", help="Call the real model instead of the simulator")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    if not args.gemini:
+        os.environ["A2A_SIMULATED_MODEL_LATENCY_MS"] = str(args.ttft_ms)
+        os.environ["A2A_SIMULATED_MODEL_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+        # Measure generation, not the shared per-minute quota
+        os.environ.setdefault("A2A_RATE_LIMIT_ENABLED", "0")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
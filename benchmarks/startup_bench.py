@@ -0,0 +1,131 @@
+# benchmarks/startup_bench.py
+"""Cold-start benchmark for every service.
+
+Measures, in fresh interpreters:
+  * import time of the service module
+  * time until /live answers 200 (process is serving)
+  * time until /ready answers 200 (deferred initialisation finished)
+
+Run from the project root:
+    python -m benchmarks.startup_bench --runs 3 --output startup.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+SERVICES = {
+    "api": {
+        "module": "app",
+        "uvicorn": ["app:app"],
+        "live": "/health/live",
+        "ready": "/health/ready",
+    },
+    "research": {
+        "module": "Research_Agent.Research",
+        "uvicorn": ["Research_Agent.Research:create_app", "--factory"],
+        "live": "/a2a/health/live",
+        "ready": "/a2a/health/ready",
+    },
+    "writer": {
+        "module": "Writer_Agent.Writer",
+        "uvicorn": ["Writer_Agent.Writer:create_app", "--factory"],
+        "live": "/a2a/health/live",
+        "ready": "/a2a/health/ready",
+    },
+    "editor": {
+        "module": "Editor_Agent.Editor",
+        "uvicorn": ["Editor_Agent.Editor:create_app", "--factory"],
+        "live": "/a2a/health/live",
+        "ready": "/a2a/health/ready",
+    },
+}
+
+
+def measure_import(module: str) -> float:
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - t)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _status(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except Exception:
+        return 0
+
+
+def measure_first_healthy(service: dict, port: int, timeout: float) -> dict:
+    cmd = [sys.executable, "-m", "uvicorn", *service["uvicorn"], "--port", str(port), "--log-level", "warning"]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    live = ready = None
+    try:
+        while time.perf_counter() - start < timeout:
+            elapsed = time.perf_counter() - start
+            if live is None and _status(f"http://127.0.0.1:{port}{service['live']}") == 200:
+                live = elapsed
+            if live is not None and _status(f"http://127.0.0.1:{port}{service['ready']}") == 200:
+                ready = time.perf_counter() - start
+                break
+            time.sleep(0.02)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return {"live_s": live, "ready_s": ready}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--services", default=",".join(SERVICES))
+    parser.add_argument("--base-port", type=int, default=18000)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {"python": sys.version.split()[0], "runs": args.runs, "services": {}}
+    for i, name in enumerate(args.services.split(",")):
+        service = SERVICES[name]
+        imports, lives, readies = [], [], []
+        for _ in range(args.runs):
+            imports.append(measure_import(service["module"]))
+            result = measure_first_healthy(service, args.base_port + i, args.timeout)
+            if result["live_s"] is not None:
+                lives.append(result["live_s"])
+            if result["ready_s"] is not None:
+                readies.append(result["ready_s"])
+        report["services"][name] = {
+            "import_s": statistics.median(imports),
+            "time_to_live_s": statistics.median(lives) if lives else None,
+            "time_to_ready_s": statistics.median(readies) if readies else None,
+        }
+        print(f"{name:>9}: import {report['services'][name]['import_s']*1000:7.1f} ms | "
+              f"live {_fmt(report['services'][name]['time_to_live_s'])} | "
+              f"ready {_fmt(report['services'][name]['time_to_ready_s'])}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+def _fmt(seconds):
+    return "   n/a   " if seconds is None else f"{seconds*1000:7.1f} ms"
+
+
+if __name__ == "__main__":
+    main()
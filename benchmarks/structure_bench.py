@@ -0,0 +1,81 @@
+# benchmarks/structure_bench.py
+"""Throughput of the local structure_research engine.
+
+Generates synthetic research dumps (headings, bullets, statistics, URLs and
+repeated paragraphs) of increasing size and reports seconds and MB/s for
+structure_research + render_markdown. Time should grow linearly with size.
+
+Run from the project root:
+    python -m benchmarks.structure_bench --sizes-mb 1,5,20
+"""
+import argparse
+import json
+import random
+import time
+
+from utils.research_structurer import structure_research, render_markdown
+
+_WORDS = (
+    "market growth adoption patients revenue model data cloud analysis risk "
+    "regulation privacy outcomes clinical investment startups efficiency"
+).split()
+
+
+def make_dump(target_bytes: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    blocks = []
+    size = 0
+    i = 0
+    while size < target_bytes:
+        kind = i % 7
+        if kind == 0:
+            block = f"## Section {i}"
+        elif kind == 1:
+            block = "- " + " ".join(rng.choices(_WORDS, k=8))
+        elif kind == 2:
+            block = f"In {2000 + i % 25}, revenue grew {i % 90}% to ${i % 50}.5 billion, see https://example.com/{i}."
+        elif kind == 4:
+            block = "This paragraph is repeated verbatim across the dump and should be removed."
+        else:
+            block = " ".join(rng.choices(_WORDS, k=30)) + ". " + " ".join(rng.choices(_WORDS, k=12)) + "."
+        blocks.append(block)
+        blocks.append("")
+        size += len(block) + 2
+        i += 1
+    return "\n".join(blocks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes-mb", default="1,5,20")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = []
+    for size_mb in (float(s) for s in args.sizes_mb.split(",")):
+        raw = make_dump(int(size_mb * 1024 * 1024))
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            structured = structure_research(raw)
+            render_markdown(structured)
+            best = min(best, time.perf_counter() - start)
+        row = {
+            "input_mb": len(raw) / (1024 * 1024),
+            "seconds": best,
+            "mb_per_second": len(raw) / (1024 * 1024) / best,
+            "stats": structured["stats"],
+        }
+        report.append(row)
+        print(f"{row['input_mb']:6.1f} MB | {best * 1000:8.1f} ms | {row['mb_per_second']:6.1f} MB/s | "
+              f"{structured['stats']['sections']} sections, "
+              f"{structured['stats']['duplicate_blocks_removed']} duplicates removed")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
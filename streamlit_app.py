@@ -1,19 +1,188 @@
-import streamlit as st
+import hashlib
+import os
+import time
+import uuid
+
 import requests
-import io
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Base URL of the API (app.py); set A2A_API_URL when it is not on this machine
+API_URL = os.getenv("A2A_API_URL", "http://localhost:8000").rstrip("/")
+# (connect, read) seconds. Long workflows run as jobs, so no call waits on a model.
+TIMEOUT = (3.05, 30)
+UPLOAD_TIMEOUT = (3.05, 120)
+POLL_SECONDS = 1.0
+
+RESULT_STYLE = "background:#222;padding:1em;border-radius:8px;color:#fff"
+
+
+@st.cache_resource
+def http_session() -> requests.Session:
+    """One pooled keep-alive session for every browser session of this Streamlit server"""
+    session = requests.Session()
+    # Retry only idempotent calls (status polls, downloads), never job submissions
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def api(method: str, path: str, timeout=TIMEOUT, **kwargs) -> requests.Response:
+    headers = {"X-Client-Id": st.session_state.client_id, **kwargs.pop("headers", {})}
+    return http_session().request(method, f"{API_URL}{path}", headers=headers, timeout=timeout, **kwargs)
+
+
+def error_text(resp: requests.Response) -> str:
+    try:
+        return str(resp.json().get("detail", resp.text))
+    except ValueError:
+        return resp.text
+
+
+def ingest_file(uploaded_file):
+    """Upload a file to /ingest once per session and return its text artifact id (None if nothing uploaded)"""
+    if uploaded_file is None:
+        return None
+    data = uploaded_file.getvalue()
+    digest = hashlib.sha256(data).hexdigest()
+    artifacts = st.session_state.artifacts
+    if digest not in artifacts:
+        resp = api("POST", "/ingest", timeout=UPLOAD_TIMEOUT,
+                   files={"file": (uploaded_file.name, data, uploaded_file.type or "application/octet-stream")})
+        if not resp.ok:
+            st.error(f"Upload failed: {error_text(resp)}")
+            return None
+        artifacts[digest] = resp.json()["artifact_id"]
+    return artifacts[digest]
+
+
+def submit_job(view: str, kind: str, payload: dict):
+    """Start a workflow as a background job, unless the same request is already running or done"""
+    request_key = (kind, tuple(sorted(payload.items())))
+    job = st.session_state.jobs.get(view)
+    if job and job["request_key"] == request_key and job["status"] not in ("failed", "cancelled"):
+        return
+    try:
+        resp = api("POST", f"/jobs/{kind}", json=payload)
+    except requests.RequestException as e:
+        st.error(f"Request failed: {e}")
+        return
+    if not resp.ok:
+        st.error(f"Error: {error_text(resp)}")
+        return
+    st.session_state.jobs[view] = {"request_key": request_key, **resp.json()}
+
 
-def read_file_as_text(uploaded_file):
-    if uploaded_file is not None:
-        content = uploaded_file.read()
+def refresh_job(view: str) -> dict:
+    job = st.session_state.jobs[view]
+    if job["status"] in ("queued", "running"):
         try:
-            return content.decode("utf-8")
-        except Exception:
-            return content.decode(errors="ignore")
-    return ""
+            resp = api("GET", f"/jobs/{job['job_id']}")
+            if resp.ok:
+                job.update(resp.json())
+            elif resp.status_code == 404:
+                job.update(status="failed", error="The API no longer knows this job")
+        except requests.RequestException as e:
+            job["poll_error"] = str(e)
+    return job
+
+
+def show_result(label: str, result: str):
+    st.success(label)
+    st.markdown(f"<div style='{RESULT_STYLE}'>{result}</div>", unsafe_allow_html=True)
+
+
+def show_downloads(exports: dict):
+    """Download buttons for exported files, fetched once per session"""
+    for fmt, path in (exports or {}).items():
+        filename = os.path.basename(path)
+        files = st.session_state.downloads
+        if filename not in files:
+            try:
+                resp = api("GET", f"/outputs/{filename}", timeout=UPLOAD_TIMEOUT)
+            except requests.RequestException:
+                continue
+            if not resp.ok:
+                continue
+            files[filename] = resp.content
+        st.download_button(f"Download {'PDF' if fmt == 'pdf' else 'Word'}", files[filename], file_name=filename,
+                           key=f"download-{filename}")
+
+
+def render_job(view: str, label: str):
+    """Progress of the view's job while it runs, then its result; kept across reruns"""
+    if view not in st.session_state.jobs:
+        return
+    job = refresh_job(view)
+    status = job["status"]
+    stages = job.get("stages") or []
+    total = job.get("stages_total")
+
+    if status in ("queued", "running"):
+        done = len(stages)
+        st.progress(done / total if total else 0.0,
+                    text=f"{status.capitalize()}: {done}/{total or '?'} stages finished")
+        if job.get("poll_error"):
+            st.caption(f"Could not reach the API ({job['poll_error']}); retrying")
+        if st.button("Cancel", key=f"cancel-{view}"):
+            try:
+                api("DELETE", f"/jobs/{job['job_id']}")
+            except requests.RequestException as e:
+                st.error(f"Cancel failed: {e}")
+    for stage in stages:
+        icon = "✅" if stage["success"] else "❌"
+        st.caption(f"{icon} {stage['stage']} · {stage['capability']} · {stage['duration_ms'] / 1000:.1f}s")
+    if status in ("queued", "running"):
+        if job.get("partial_result"):
+            with st.expander("Latest stage output", expanded=True):
+                st.markdown(job["partial_result"])
+    elif status == "completed":
+        show_result(label, job.get("result") or "No result returned.")
+        if job.get("history_id"):
+            st.caption(f"History id: {job['history_id']}")
+        show_downloads(job.get("exports"))
+    elif status == "cancelled":
+        st.info("Job cancelled.")
+    else:
+        st.error(f"Job failed: {job.get('error') or 'unknown error'}")
+        if job.get("result"):
+            st.markdown(job["result"])
+
+
+def job_panel(view: str, label: str):
+    """Draw the job; while it runs, redraw just this panel every POLL_SECONDS without blocking the page"""
+    if hasattr(st, "fragment"):
+        active = view in st.session_state.jobs and st.session_state.jobs[view]["status"] in ("queued", "running")
+
+        @st.fragment(run_every=POLL_SECONDS if active else None)
+        def panel():
+            render_job(view, label)
+            job = st.session_state.jobs.get(view)
+            if active and job and job["status"] not in ("queued", "running"):
+                st.rerun()  # finished: stop polling
+        panel()
+    else:
+        render_job(view, label)
+        job = st.session_state.jobs.get(view)
+        if job and job["status"] in ("queued", "running"):
+            time.sleep(POLL_SECONDS)
+            st.rerun()
+
 
 st.set_page_config(page_title="AI Research Companion", layout="centered")
+
+# Per-browser-session state; survives reruns, so finished work is never repeated
+for name, default in (("client_id", lambda: f"streamlit-{uuid.uuid4().hex[:12]}"), ("artifacts", dict),
+                      ("jobs", dict), ("results", dict), ("downloads", dict)):
+    if name not in st.session_state:
+        st.session_state[name] = default()
+
 st.title("AI Research Companion")
 st.markdown("Draft, Edit, and Generate PDFs using Agent-to-Agent Protocol")
+st.caption(f"API: {API_URL}")
 st.markdown("---")
 
 workflow = st.radio(
@@ -35,39 +204,24 @@ if workflow == "Research Only":
         if not topic.strip():
             st.warning("Please enter a topic.")
         else:
-            with st.spinner("Researching..."):
-                try:
-                    resp = requests.post("http://localhost:8000/research", json={"topic": topic.strip()})
-                    if resp.ok:
-                        result = resp.json().get("result", "No result returned.")
-                        st.success("Research Result:")
-                        st.markdown(f"<div style='background:#222;padding:1em;border-radius:8px;color:#fff'>{result}</div>", unsafe_allow_html=True)
-                    else:
-                        st.error(f"Error: {resp.text}")
-                except Exception as e:
-                    st.error(f"Request failed: {e}")
+            submit_job("research", "research", {"topic": topic.strip()})
+    job_panel("research", "Research Result:")
 
 elif workflow == "Edit Only":
     st.header("Edit Only")
     st.write("Paste your content or upload a file to edit.")
     content = st.text_area("Paste content here:", height=150)
     uploaded = st.file_uploader("Or upload a file (txt, docx, pdf):", type=["txt", "docx", "pdf"])
-    edit_content = content.strip() or read_file_as_text(uploaded)
     if st.button("Edit Content", use_container_width=True):
-        if not edit_content:
+        if not content.strip() and uploaded is None:
             st.warning("Please paste or upload content to edit.")
+        elif content.strip():
+            submit_job("edit", "edit", {"content": content.strip()})
         else:
-            with st.spinner("Editing content..."):
-                try:
-                    resp = requests.post("http://localhost:8000/edit", json={"content": edit_content})
-                    if resp.ok:
-                        result = resp.json().get("result", "No result returned.")
-                        st.success("Edited Content:")
-                        st.markdown(f"<div style='background:#222;padding:1em;border-radius:8px;color:#fff'>{result}</div>", unsafe_allow_html=True)
-                    else:
-                        st.error(f"Error: {resp.text}")
-                except Exception as e:
-                    st.error(f"Request failed: {e}")
+            artifact_id = ingest_file(uploaded)
+            if artifact_id:
+                submit_job("edit", "edit", {"artifact_id": artifact_id})
+    job_panel("edit", "Edited Content:")
 
 elif workflow == "Write (with Research)":
     st.header("Write (with Research)")
@@ -75,25 +229,19 @@ elif workflow == "Write (with Research)":
     st.write("(Optional) Paste or upload research content to guide the writing.")
     research = st.text_area("Paste research here:", height=100)
     uploaded = st.file_uploader("Or upload research file (txt, docx, pdf):", type=["txt", "docx", "pdf"])
-    research_content = research.strip() or read_file_as_text(uploaded)
     if st.button("Draft Article", use_container_width=True):
         if not topic.strip():
             st.warning("Please enter a topic.")
         else:
-            with st.spinner("Drafting article..."):
-                try:
-                    payload = {"topic": topic.strip()}
-                    if research_content:
-                        payload["research"] = research_content
-                    resp = requests.post("http://localhost:8000/write", json=payload)
-                    if resp.ok:
-                        result = resp.json().get("result", "No result returned.")
-                        st.success("Drafted Article:")
-                        st.markdown(f"<div style='background:#222;padding:1em;border-radius:8px;color:#fff'>{result}</div>", unsafe_allow_html=True)
-                    else:
-                        st.error(f"Error: {resp.text}")
-                except Exception as e:
-                    st.error(f"Request failed: {e}")
+            payload = {"topic": topic.strip()}
+            if research.strip():
+                payload["research"] = research.strip()
+            elif uploaded is not None:
+                # ingest_file has already shown the upload error; don't draft without the research
+                payload["research_artifact_id"] = ingest_file(uploaded)
+            if payload.get("research_artifact_id", "") is not None:
+                submit_job("write", "write", payload)
+    job_panel("write", "Drafted Article:")
 
 elif workflow == "Full Workflow (Research → Write → Edit → Export)":
     st.header("Full Workflow: Research → Write → Edit → Export")
@@ -102,60 +250,38 @@ elif workflow == "Full Workflow (Research → Write → Edit → Export)":
         if not topic.strip():
             st.warning("Please enter a topic.")
         else:
-            with st.spinner("Running full workflow..."):
-                try:
-                    resp = requests.post("http://localhost:8000/full_workflow", json={"topic": topic.strip()})
-                    if resp.ok:
-                        data = resp.json()
-                        result = data.get("result", "No result returned.")
-                        st.success("Final Content:")
-                        st.markdown(f"<div style='background:#222;padding:1em;border-radius:8px;color:#fff'>{result}</div>", unsafe_allow_html=True)
-                        # Show download links if available
-                        pdf_url = data.get("pdf_url")
-                        docx_url = data.get("docx_url")
-                        if pdf_url or docx_url:
-                            st.markdown("---")
-                            st.subheader("Download Files:")
-                            if pdf_url:
-                                st.markdown(f"[Download PDF]({pdf_url})", unsafe_allow_html=True)
-                            if docx_url:
-                                st.markdown(f"[Download Word]({docx_url})", unsafe_allow_html=True)
-                    else:
-                        st.error(f"Error: {resp.text}")
-                except Exception as e:
-                    st.error(f"Request failed: {e}")
+            submit_job("full_workflow", "full_workflow", {"topic": topic.strip()})
+    job_panel("full_workflow", "Final Content:")
 
 elif workflow == "Structure/Clean Uploaded Research":
     st.header("Structure or Clean Uploaded Research")
     st.write("Upload a research file or paste your research content below. The system will organize and clean it for you.")
     uploaded = st.file_uploader("Upload research file (txt, docx, pdf)", type=["txt", "docx", "pdf"])
     pasted = st.text_area("Or paste your research content here:", height=200)
-    research_content = ""
-    if uploaded:
-        research_content = read_file_as_text(uploaded)
-    elif pasted.strip():
-        research_content = pasted.strip()
     submit_col, _ = st.columns([1, 3])
     with submit_col:
-        if st.button("Structure Research", use_container_width=True):
-            if not research_content:
-                st.warning("Please upload or paste research content.")
+        clicked = st.button("Structure Research", use_container_width=True)
+    if clicked:
+        if uploaded is None and not pasted.strip():
+            st.warning("Please upload or paste research content.")
+        else:
+            # Structuring runs locally in the API and is quick, so it stays a plain call, cached per input
+            if uploaded is not None:
+                payload = {"artifact_id": ingest_file(uploaded)}
             else:
+                payload = {"research": pasted.strip()}
+            key = hashlib.sha256(repr(sorted(payload.items())).encode()).hexdigest()
+            results = st.session_state.results
+            if None not in payload.values() and key not in results:
                 with st.spinner("Structuring research..."):
                     try:
-                        resp = requests.post(
-                            "http://localhost:8000/structure_research",
-                            json={"research": research_content}
-                        )
+                        resp = api("POST", "/structure_research", json=payload, timeout=UPLOAD_TIMEOUT)
                         if resp.ok:
-                            result = resp.json().get("result", "No result returned.")
-                            st.success("Structured Research Output:")
-                            st.markdown(f"<div style='background:#222;padding:1em;border-radius:8px;color:#fff'>{result}</div>", unsafe_allow_html=True)
+                            results[key] = resp.json().get("result", "No result returned.")
                         else:
-                            st.error(f"Error: {resp.text}")
-                    except Exception as e:
+                            st.error(f"Error: {error_text(resp)}")
+                    except requests.RequestException as e:
                         st.error(f"Request failed: {e}")
-
-# Remove the following lines at the end:
-# if __name__ == "__main__":
-#     main() 
\ No newline at end of file
+            results["structure"] = results.get(key)
+    if st.session_state.results.get("structure"):
+        show_result("Structured Research Output:", st.session_state.results["structure"])
@@ -0,0 +1,207 @@
+# supervisor.py
+"""Start and supervise the whole stack on Linux (or any OS) without Terminal tabs.
+
+Launches the research, writer and editor agents in parallel, waits until each
+reports ready on /a2a/health, then starts the API server. Crashed services are
+restarted with exponential backoff, and all output is interleaved on stdout
+(and optionally a log file) with a per-service prefix.
+
+    python supervisor.py
+    python supervisor.py --workers research=2,app=4 --log-file logs/stack.log
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+_COLORS = {"research": "\033[36m", "writer": "\033[35m", "editor": "\033[33m", "app": "\033[34m"}
+_RESET = "\033[0m"
+
+
+@dataclass
+class Service:
+    name: str
+    command: List[str]
+    health_url: str
+    workers_env: str
+    workers: int = 1
+    depends_on: List[str] = field(default_factory=list)
+    env: Dict[str, str] = field(default_factory=dict)
+
+
+def default_services() -> Dict[str, Service]:
+    python = sys.executable
+    return {
+        "research": Service("research", [python, "-m", "Research_Agent.Research"],
+                            "http://localhost:8001/a2a/health", "A2A_WORKERS"),
+        "writer": Service("writer", [python, "-m", "Writer_Agent.Writer"],
+                          "http://localhost:8002/a2a/health", "A2A_WORKERS"),
+        "editor": Service("editor", [python, "-m", "Editor_Agent.Editor"],
+                          "http://localhost:8003/a2a/health", "A2A_WORKERS"),
+        # The API discovers agents at startup, so it waits for them to be ready
+        "app": Service("app", [python, "app.py"], "http://localhost:8000/health/ready", "APP_WORKERS",
+                       depends_on=["research", "writer", "editor"], env={"APP_RELOAD": "0"}),
+    }
+
+
+def _probe(url: str, timeout: float = 2.0) -> bool:
+    """True once the service answers 200 and, for agents, reports ready"""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            if response.status != 200:
+                return False
+            body = json.loads(response.read() or b"{}")
+            return body.get("ready", True) is not False
+    except Exception:
+        return False
+
+
+class Supervisor:
+    def __init__(self, services: Dict[str, Service], log_file: Optional[str] = None,
+                 ready_timeout: float = 120, max_backoff: float = 30, stable_after: float = 60):
+        self.services = services
+        self.ready_timeout = ready_timeout
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.log = open(log_file, "a", buffering=1) if log_file else None
+        self.processes: Dict[str, asyncio.subprocess.Process] = {}
+        self.ready: Dict[str, asyncio.Event] = {name: asyncio.Event() for name in services}
+        self.restarts: Dict[str, int] = {name: 0 for name in services}
+        self.stopping = asyncio.Event()
+        self.started_at = time.perf_counter()
+
+    def emit(self, name: str, line: str):
+        stamp = time.strftime("%H:%M:%S")
+        color = _COLORS.get(name, "") if sys.stdout.isatty() else ""
+        print(f"{color}{stamp} [{name:>8}]{_RESET if color else ''} {line}", flush=True)
+        if self.log:
+            self.log.write(f"{stamp} [{name}] {line}\n")
+
+    async def _pump(self, name: str, stream: asyncio.StreamReader):
+        while True:
+            line = await stream.readline()
+            if not line:
+                return
+            self.emit(name, line.decode("utf-8", errors="replace").rstrip())
+
+    async def _spawn(self, service: Service) -> asyncio.subprocess.Process:
+        env = {**os.environ, **service.env, "PYTHONUNBUFFERED": "1", service.workers_env: str(service.workers)}
+        process = await asyncio.create_subprocess_exec(
+            *service.command, env=env,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            start_new_session=True,  # own process group, so uvicorn workers stop with it
+        )
+        self.processes[service.name] = process
+        asyncio.create_task(self._pump(service.name, process.stdout))
+        return process
+
+    async def _wait_ready(self, service: Service, process: asyncio.subprocess.Process, launched: float) -> bool:
+        deadline = time.monotonic() + self.ready_timeout
+        while time.monotonic() < deadline and process.returncode is None and not self.stopping.is_set():
+            if await asyncio.to_thread(_probe, service.health_url):
+                self.emit("supervisor", f"✅ {service.name} ready in {time.perf_counter() - launched:.2f}s "
+                                        f"({service.workers} worker{'s' if service.workers != 1 else ''})")
+                self.ready[service.name].set()
+                return True
+            await asyncio.sleep(0.2)
+        return False
+
+    async def run_service(self, service: Service):
+        """Start a service once its dependencies are ready and keep it running"""
+        for dependency in service.depends_on:
+            await self.ready[dependency].wait()
+        backoff = 1.0
+        while not self.stopping.is_set():
+            launched = time.perf_counter()
+            self.emit("supervisor", f"🟢 Starting {service.name}: {' '.join(service.command[1:])}")
+            process = await self._spawn(service)
+            if not await self._wait_ready(service, process, launched) and process.returncode is None \
+                    and not self.stopping.is_set():
+                self.emit("supervisor", f"⚠️ {service.name} not ready after {self.ready_timeout:.0f}s; restarting")
+                await self._terminate(service.name)
+            returncode = await process.wait()
+            if self.stopping.is_set():
+                return
+            if time.perf_counter() - launched >= self.stable_after:
+                backoff = 1.0
+            self.restarts[service.name] += 1
+            self.emit("supervisor", f"💥 {service.name} exited with code {returncode}; restarting in {backoff:.0f}s")
+            try:
+                await asyncio.wait_for(self.stopping.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def report_startup(self):
+        await asyncio.gather(*(event.wait() for event in self.ready.values()))
+        self.emit("supervisor", f"🚀 Stack ready in {time.perf_counter() - self.started_at:.2f}s")
+
+    async def _terminate(self, name: str, grace: float = 10):
+        process = self.processes.get(name)
+        if process is None or process.returncode is not None:
+            return
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            await asyncio.wait_for(process.wait(), timeout=grace)
+        except asyncio.TimeoutError:
+            os.killpg(process.pid, signal.SIGKILL)
+            await process.wait()
+        except ProcessLookupError:
+            pass
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stopping.set)
+        tasks = [asyncio.create_task(self.run_service(s)) for s in self.services.values()]
+        reporter = asyncio.create_task(self.report_startup())
+        await self.stopping.wait()
+        self.emit("supervisor", f"🛑 Shutting down (restarts: {json.dumps(self.restarts)})...")
+        await asyncio.gather(*(self._terminate(name) for name in self.services))
+        reporter.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.log:
+            self.log.close()
+
+
+def parse_workers(spec: str) -> Dict[str, int]:
+    workers = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, count = item.partition("=")
+        workers[name.strip()] = int(count)
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="", help="Per-service worker counts, e.g. research=2,app=4")
+    parser.add_argument("--only", default="", help="Comma-separated subset of services to run")
+    parser.add_argument("--log-file", help="Also append aggregated logs to this file")
+    parser.add_argument("--ready-timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    services = default_services()
+    if args.only:
+        wanted = {name.strip() for name in args.only.split(",")}
+        services = {name: s for name, s in services.items() if name in wanted}
+        for service in services.values():
+            service.depends_on = [d for d in service.depends_on if d in services]
+    for name, count in parse_workers(args.workers).items():
+        if name not in services:
+            parser.error(f"Unknown service '{name}' (expected one of {', '.join(services)})")
+        services[name].workers = count
+
+    os.makedirs("outputs", exist_ok=True)
+    if args.log_file:
+        os.makedirs(os.path.dirname(args.log_file) or ".", exist_ok=True)
+    asyncio.run(Supervisor(services, log_file=args.log_file, ready_timeout=args.ready_timeout).run())
+
+
+if __name__ == "__main__":
+    main()
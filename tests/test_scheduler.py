@@ -0,0 +1,45 @@
+# tests/test_scheduler.py
+import asyncio
+import time
+
+from Orchestration_Agent.scheduler import FairScheduler, RequestContext
+
+
+async def _timed_call(scheduler: FairScheduler, ctx: RequestContext, seconds: float, started: list):
+    async with scheduler.slot("research", ctx):
+        started.append((ctx.client_id, ctx.priority, time.perf_counter()))
+        await asyncio.sleep(seconds)
+
+
+def test_over_quota_client_does_not_block_others_from_free_slots():
+    async def scenario():
+        scheduler = FairScheduler({"max_concurrency_per_agent": 8, "client_quota": 2})
+        started: list = []
+        t0 = time.perf_counter()
+        batch = [asyncio.create_task(_timed_call(scheduler, RequestContext("a", "batch"), 0.5, started))
+                 for _ in range(3)]
+        await asyncio.sleep(0.01)
+        other = [asyncio.create_task(_timed_call(scheduler, RequestContext("b", priority), 0.01, started))
+                 for priority in ("standard", "interactive")]
+        await asyncio.gather(*batch, *other)
+        return t0, started
+
+    t0, started = asyncio.run(scenario())
+    waits = {(client, priority): start - t0 for client, priority, start in started if client == "b"}
+    # Client a's third call waits on a's quota; b's calls take idle slots straight away
+    assert waits[("b", "standard")] < 0.2
+    assert waits[("b", "interactive")] < 0.2
+    a_starts = sorted(start - t0 for client, _, start in started if client == "a")
+    assert a_starts[2] >= 0.45
+
+
+def test_quota_waiter_starts_when_its_client_frees_a_slot():
+    async def scenario():
+        scheduler = FairScheduler({"max_concurrency_per_agent": 8, "client_quota": 1})
+        started: list = []
+        await asyncio.gather(*(_timed_call(scheduler, RequestContext("a"), 0.05, started) for _ in range(3)))
+        return scheduler, started
+
+    scheduler, started = asyncio.run(scenario())
+    assert len(started) == 3
+    assert scheduler.stats()["agents"]["research"]["in_flight"] == 0
@@ -0,0 +1,53 @@
+#  utils/deadlines.py
+
+import asyncio
+import time
+from typing import Any, Awaitable, Optional
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+def deadline_from_budget(budget_ms: Optional[float]) -> Optional[float]:
+    """Monotonic deadline for a budget in milliseconds (None means no deadline)"""
+    return time.monotonic() + budget_ms / 1000 if budget_ms is not None else None
+
+
+def remaining_ms(deadline: Optional[float]) -> Optional[float]:
+    """Milliseconds left before a monotonic deadline; None when there is no deadline"""
+    return (deadline - time.monotonic()) * 1000 if deadline is not None else None
+
+
+async def run_cancellable(request, work: Awaitable[Any], deadline: Optional[float] = None,
+                          poll_interval: float = 0.25) -> Any:
+    """Await work, cancelling it if the HTTP client disconnects or the deadline passes.
+
+    Starlette does not cancel a handler when its client goes away, so the
+    connection is polled while the work runs.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            timeout = poll_interval
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise DeadlineExceeded("Request deadline exceeded")
+                timeout = min(timeout, left)
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if done:
+                return task.result()
+            if request is not None and await request.is_disconnected():
+                raise ClientDisconnected("Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except BaseException:
+                pass
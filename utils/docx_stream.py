@@ -0,0 +1,282 @@
+#  utils/docx_stream.py
+
+import re
+import zipfile
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from xml.sax.saxutils import escape
+
+# Minimal OOXML package written part by part. word/document.xml is streamed
+# one paragraph at a time, so memory use does not grow with document length.
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/word/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>
+<Override PartName="/word/numbering.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.numbering+xml"/>
+<Override PartName="/docProps/core.xml" ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>
+</Types>"""
+
+_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties" Target="docProps/core.xml"/>
+</Relationships>"""
+
+_DOCUMENT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/numbering" Target="numbering.xml"/>
+</Relationships>"""
+
+_CORE_PROPS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+<dc:title>{title}</dc:title>
+<dc:creator>A2A Content Suite</dc:creator>
+<dcterms:created xsi:type="dcterms:W3CDTF">{created}</dcterms:created>
+</cp:coreProperties>"""
+
+
+def _style(style_id: str, name: str, size: int, bold: bool = False, color: Optional[str] = None,
+           space_before: int = 0, based_on: str = "Normal", extra_ppr: str = "") -> str:
+    rpr = f'<w:sz w:val="{size}"/>'
+    if bold:
+        rpr = "<w:b/>" + rpr
+    if color:
+        rpr += f'<w:color w:val="{color}"/>'
+    return (
+        f'<w:style w:type="paragraph" w:styleId="{style_id}"><w:name w:val="{name}"/>'
+        f'<w:basedOn w:val="{based_on}"/><w:next w:val="Normal"/><w:qFormat/>'
+        f'<w:pPr><w:keepNext/><w:spacing w:before="{space_before}" w:after="80"/>{extra_ppr}</w:pPr>'
+        f"<w:rPr>{rpr}</w:rPr></w:style>"
+    )
+
+
+_HEADING_SIZES = {1: 32, 2: 28, 3: 26, 4: 24, 5: 22, 6: 22}
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<w:styles xmlns:w="{_W_NS}">'
+    '<w:docDefaults><w:rPrDefault><w:rPr><w:rFonts w:ascii="Calibri" w:hAnsi="Calibri" w:cs="Calibri"/>'
+    '<w:sz w:val="22"/></w:rPr></w:rPrDefault>'
+    '<w:pPrDefault><w:pPr><w:spacing w:after="120" w:line="264" w:lineRule="auto"/></w:pPr></w:pPrDefault></w:docDefaults>'
+    '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/><w:qFormat/></w:style>'
+    + _style("Title", "Title", 52, color="17365D", based_on="Normal")
+    + "".join(
+        _style(f"Heading{level}", f"heading {level}", size, bold=True, color="365F91", space_before=240,
+               extra_ppr=f'<w:outlineLvl w:val="{level - 1}"/>')
+        for level, size in _HEADING_SIZES.items()
+    )
+    + '<w:style w:type="paragraph" w:styleId="ListBullet"><w:name w:val="List Bullet"/><w:basedOn w:val="Normal"/>'
+    '<w:pPr><w:spacing w:after="40"/></w:pPr></w:style>'
+    '<w:style w:type="paragraph" w:styleId="ListNumber"><w:name w:val="List Number"/><w:basedOn w:val="Normal"/>'
+    '<w:pPr><w:spacing w:after="40"/></w:pPr></w:style>'
+    '<w:style w:type="paragraph" w:styleId="Quote"><w:name w:val="Quote"/><w:basedOn w:val="Normal"/>'
+    '<w:pPr><w:ind w:left="720"/></w:pPr><w:rPr><w:i/><w:color w:val="404040"/></w:rPr></w:style>'
+    "</w:styles>"
+)
+
+_BULLET_ABSTRACT_ID = 0
+_NUMBER_ABSTRACT_ID = 1
+_BULLET_NUM_ID = 1
+
+
+def _abstract_num(abstract_id: int, fmt: str) -> str:
+    levels = []
+    for ilvl in range(3):
+        if fmt == "bullet":
+            text, num_fmt = ["•", "◦", "▪"][ilvl], "bullet"
+        else:
+            text, num_fmt = f"%{ilvl + 1}.", ["decimal", "lowerLetter", "lowerRoman"][ilvl]
+        levels.append(
+            f'<w:lvl w:ilvl="{ilvl}"><w:start w:val="1"/><w:numFmt w:val="{num_fmt}"/>'
+            f'<w:lvlText w:val="{text}"/><w:lvlJc w:val="left"/>'
+            f'<w:pPr><w:ind w:left="{720 * (ilvl + 1)}" w:hanging="360"/></w:pPr></w:lvl>'
+        )
+    return f'<w:abstractNum w:abstractNumId="{abstract_id}">{"".join(levels)}</w:abstractNum>'
+
+
+def _numbering_parts(numbered_lists: int) -> Iterator[str]:
+    # numId 1 is the shared bullet list; each numbered list gets its own numId
+    # (2, 3, ...) so numbering restarts at 1 for every list.
+    yield (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<w:numbering xmlns:w="{_W_NS}">'
+        + _abstract_num(_BULLET_ABSTRACT_ID, "bullet")
+        + _abstract_num(_NUMBER_ABSTRACT_ID, "number")
+    )
+    yield f'<w:num w:numId="{_BULLET_NUM_ID}"><w:abstractNumId w:val="{_BULLET_ABSTRACT_ID}"/></w:num>'
+    for i in range(numbered_lists):
+        yield (
+            f'<w:num w:numId="{i + 2}"><w:abstractNumId w:val="{_NUMBER_ABSTRACT_ID}"/>'
+            '<w:lvlOverride w:ilvl="0"><w:startOverride w:val="1"/></w:lvlOverride></w:num>'
+        )
+    yield "</w:numbering>"
+
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_BULLET_RE = re.compile(r"^(\s*)[-*+•]\s+(.*)$")
+_NUMBERED_RE = re.compile(r"^(\s*)\d+[.)]\s+(.*)$")
+_RULE_RE = re.compile(r"^\s*([-*_=])(\s*\1){2,}\s*$")
+_QUOTE_RE = re.compile(r"^\s*>\s?(.*)$")
+_INLINE_RE = re.compile(r"(\*\*.+?\*\*|__.+?__|\*[^*\s][^*]*?\*|`[^`]+`)")
+_INVALID_XML_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _run(text: str, bold: bool = False, italic: bool = False, code: bool = False) -> str:
+    rpr = ""
+    if bold:
+        rpr += "<w:b/>"
+    if italic:
+        rpr += "<w:i/>"
+    if code:
+        rpr += '<w:rFonts w:ascii="Consolas" w:hAnsi="Consolas"/>'
+    rpr = f"<w:rPr>{rpr}</w:rPr>" if rpr else ""
+    text = escape(_INVALID_XML_RE.sub("", text))
+    return f'<w:r>{rpr}<w:t xml:space="preserve">{text}</w:t></w:r>'
+
+
+def _runs(text: str, bold: bool = False) -> str:
+    """Convert **bold**, *italic* and `code` spans into Word runs"""
+    out = []
+    for part in _INLINE_RE.split(text):
+        if not part:
+            continue
+        if (part.startswith("**") and part.endswith("**") and len(part) > 4) or \
+                (part.startswith("__") and part.endswith("__") and len(part) > 4):
+            out.append(_run(part[2:-2], bold=True))
+        elif part.startswith("`") and part.endswith("`") and len(part) > 2:
+            out.append(_run(part[1:-1], bold=bold, code=True))
+        elif part.startswith("*") and part.endswith("*") and len(part) > 2:
+            out.append(_run(part[1:-1], bold=bold, italic=True))
+        else:
+            out.append(_run(part, bold=bold))
+    return "".join(out)
+
+
+def _paragraph(text: str, style: Optional[str] = None, num: Optional[Tuple[int, int]] = None) -> str:
+    ppr = ""
+    if style:
+        ppr += f'<w:pStyle w:val="{style}"/>'
+    if num:
+        ppr += f'<w:numPr><w:ilvl w:val="{num[1]}"/><w:numId w:val="{num[0]}"/></w:numPr>'
+    ppr = f"<w:pPr>{ppr}</w:pPr>" if ppr else ""
+    return f"<w:p>{ppr}{_runs(text)}</w:p>"
+
+
+def iter_lines(chunks: Union[str, Iterable[str]]) -> Iterator[str]:
+    """Yield complete lines from text chunks with arbitrary boundaries"""
+    if isinstance(chunks, str):
+        # Slice line by line instead of split() so no second copy of the text is built
+        start = 0
+        while start < len(chunks):
+            end = chunks.find("\n", start)
+            if end == -1:
+                end = len(chunks)
+            yield chunks[start:end].rstrip("\r")
+            start = end + 1
+        return
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    if pending:
+        yield pending.rstrip("\r")
+
+
+class _MarkdownToOOXML:
+    """Stateful line-by-line converter (tracks numbered list restarts)"""
+
+    def __init__(self):
+        self.numbered_lists = 0
+        self._in_numbered_list = False
+
+    def convert(self, line: str) -> str:
+        if not line.strip() or _RULE_RE.match(line):
+            return ""
+
+        numbered = _NUMBERED_RE.match(line)
+        if not numbered:
+            self._in_numbered_list = False
+
+        heading = _HEADING_RE.match(line)
+        if heading:
+            level = len(heading.group(1))
+            return _paragraph(heading.group(2), style=f"Heading{level}")
+
+        bullet = _BULLET_RE.match(line)
+        if bullet:
+            return _paragraph(bullet.group(2), style="ListBullet", num=(_BULLET_NUM_ID, self._level(bullet.group(1))))
+
+        if numbered:
+            if not self._in_numbered_list:
+                self.numbered_lists += 1
+                self._in_numbered_list = True
+            num_id = self.numbered_lists + 1
+            return _paragraph(numbered.group(2), style="ListNumber", num=(num_id, self._level(numbered.group(1))))
+
+        quote = _QUOTE_RE.match(line)
+        if quote:
+            return _paragraph(quote.group(1), style="Quote")
+
+        # A line that is entirely bold reads as a section heading in Gemini output
+        stripped = line.strip()
+        if stripped.startswith("**") and stripped.rstrip(":").endswith("**") and stripped.count("**") == 2:
+            return _paragraph(stripped.rstrip(":").strip("*").strip(), style="Heading3")
+
+        return _paragraph(stripped)
+
+    @staticmethod
+    def _level(indent: str) -> int:
+        return min(len(indent.expandtabs(4)) // 2, 2)
+
+
+def write_docx_stream(filepath: str, chunks: Union[str, Iterable[str]], title: Optional[str] = None,
+                      flush_every: int = 64):
+    """Write markdown-ish text to a .docx file, streaming word/document.xml"""
+    converter = _MarkdownToOOXML()
+    with zipfile.ZipFile(filepath, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("word/_rels/document.xml.rels", _DOCUMENT_RELS)
+        zf.writestr("word/styles.xml", _STYLES)
+        zf.writestr("docProps/core.xml", _CORE_PROPS.format(
+            title=escape(title or ""),
+            created=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        ))
+
+        with zf.open("word/document.xml", "w", force_zip64=True) as part:
+            part.write(
+                f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                f'<w:document xmlns:w="{_W_NS}" xmlns:r="{_R_NS}"><w:body>'.encode("utf-8")
+            )
+            if title:
+                part.write(_paragraph(title, style="Title").encode("utf-8"))
+            buffer: List[str] = []
+            for line in iter_lines(chunks):
+                xml = converter.convert(line)
+                if xml:
+                    buffer.append(xml)
+                if len(buffer) >= flush_every:
+                    part.write("".join(buffer).encode("utf-8"))
+                    buffer.clear()
+            if buffer:
+                part.write("".join(buffer).encode("utf-8"))
+            part.write(
+                b'<w:sectPr><w:pgSz w:w="12240" w:h="15840"/>'
+                b'<w:pgMar w:top="1440" w:right="1440" w:bottom="1440" w:left="1440" '
+                b'w:header="720" w:footer="720" w:gutter="0"/></w:sectPr></w:body></w:document>'
+            )
+
+        # Numbering depends on how many numbered lists the stream contained
+        with zf.open("word/numbering.xml", "w", force_zip64=True) as part:
+            for xml in _numbering_parts(converter.numbered_lists):
+                part.write(xml.encode("utf-8"))
@@ -0,0 +1,210 @@
+#  utils/event_log.py
+
+"""Structured JSON-lines event log that never writes on the event loop.
+
+Request-path code calls ``log_event``/``timed_event``. That only checks
+the level and sample rate and puts the record on a bounded queue. A
+QueueListener thread formats each record as one JSON line and writes it.
+If the queue is full the record is dropped and counted, so logging
+cannot stall a request. Every record carries the correlation id bound to
+the current context (see ``bind_correlation_id``).
+
+Settings come from the "logging" section of each config.json:
+
+    {"level": "INFO", "levels": {"model": "DEBUG"}, "sample_rates": {"a2a.invoke": 0.1},
+     "path": null, "queue_size": 10000}
+
+``levels`` and ``sample_rates`` match the event name or any dotted prefix of it,
+and the longest match wins. Warnings and errors are never sampled out.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+_correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+
+_LEVELS = {"debug": logging.DEBUG, "info": logging.INFO, "warning": logging.WARNING, "error": logging.ERROR}
+
+
+def get_correlation_id() -> Optional[str]:
+    return _correlation_id.get()
+
+
+@contextmanager
+def bind_correlation_id(correlation_id: Optional[str]) -> Iterator[Optional[str]]:
+    """Tag every event logged in this context (and tasks it starts) with a correlation id"""
+    token = _correlation_id.set(correlation_id)
+    try:
+        yield correlation_id
+    finally:
+        _correlation_id.reset(token)
+
+
+class _JsonLineFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        body = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "event": record.getMessage(),
+            **getattr(record, "fields", {}),
+        }
+        return json.dumps(body, default=str, ensure_ascii=False)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue without blocking or formatting; formatting happens on the listener thread"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class EventLog:
+    def __init__(self, config: Optional[Dict[str, Any]] = None, service: str = "a2a"):
+        config = config or {}
+        self.service = service
+        self.level = _LEVELS.get(str(config.get("level", "INFO")).lower(), logging.INFO)
+        self.levels = {prefix: _LEVELS.get(str(level).lower(), logging.INFO)
+                       for prefix, level in config.get("levels", {}).items()}
+        self.sample_rates: Dict[str, float] = dict(config.get("sample_rates", {}))
+        self.emitted = 0
+        self.sampled_out = 0
+        self._pid = os.getpid()
+        # Per-event resolution of prefix rules, computed once per event name
+        self._rules: Dict[str, tuple] = {}
+        self._closed = False
+
+        if config.get("path"):
+            os.makedirs(os.path.dirname(config["path"]) or ".", exist_ok=True)
+            target: logging.Handler = logging.FileHandler(config["path"], encoding="utf-8")
+        else:
+            target = logging.StreamHandler(sys.stderr if config.get("stream") == "stderr" else sys.stdout)
+        target.setFormatter(_JsonLineFormatter())
+        self._queue: queue.Queue = queue.Queue(maxsize=config.get("queue_size", 10000))
+        self._handler = _DroppingQueueHandler(self._queue)
+        self._listener = logging.handlers.QueueListener(self._queue, target)
+        self._target = target
+        self.logger = logging.getLogger(f"a2a.events.{id(self)}")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.addHandler(self._handler)
+        self._listener.start()
+
+    @staticmethod
+    def _longest_prefix(event: str, table: Dict[str, Any]) -> Optional[Any]:
+        name = event
+        while name:
+            if name in table:
+                return table[name]
+            name = name.rpartition(".")[0]
+        return None
+
+    def _rule(self, event: str) -> tuple:
+        rule = self._rules.get(event)
+        if rule is None:
+            level = self._longest_prefix(event, self.levels)
+            rate = self._longest_prefix(event, self.sample_rates)
+            rule = (self.level if level is None else level, 1.0 if rate is None else float(rate))
+            self._rules[event] = rule
+        return rule
+
+    def log(self, event: str, level: str = "info", **fields):
+        numeric = _LEVELS.get(level, logging.INFO)
+        min_level, rate = self._rule(event)
+        if numeric < min_level:
+            return
+        if numeric < logging.WARNING and rate < 1.0:
+            if random.random() >= rate:
+                self.sampled_out += 1
+                return
+            fields["sample_rate"] = rate
+        self.emitted += 1
+        record_fields = {"service": self.service, "pid": self._pid, "correlation_id": _correlation_id.get(), **fields}
+        self.logger.log(numeric, event, extra={"fields": record_fields})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "emitted": self.emitted,
+            "sampled_out": self.sampled_out,
+            "dropped": self._handler.dropped,
+            "queued": self._queue.qsize(),
+        }
+
+    def close(self):
+        """Flush queued records and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._listener.stop()
+        self.logger.removeHandler(self._handler)
+        self._target.close()
+
+
+_event_log: Optional[EventLog] = None
+
+
+def configure_event_log(config: Optional[Dict[str, Any]] = None, service: str = "a2a") -> EventLog:
+    """Replace the process-wide event log settings; the previous writer is flushed and stopped"""
+    global _event_log
+    if _event_log is not None:
+        _event_log.close()
+    _event_log = EventLog(config, service=service)
+    return _event_log
+
+
+def get_event_log() -> EventLog:
+    global _event_log
+    if _event_log is None:
+        _event_log = EventLog()
+    return _event_log
+
+
+def log_event(event: str, level: str = "info", **fields):
+    get_event_log().log(event, level, **fields)
+
+
+@contextmanager
+def timed_event(event: str, level: str = "info", **fields) -> Iterator[Dict[str, Any]]:
+    """Log one event with duration_ms when the block ends; add fields to the yielded dict.
+
+    Setting "level" in the dict changes the level the event is logged at.
+    An exception is logged as outcome "error" at warning level and re-raised.
+    """
+    start = time.perf_counter()
+    try:
+        yield fields
+    except BaseException as e:
+        fields.pop("level", None)
+        fields.setdefault("outcome", "cancelled" if not isinstance(e, Exception) else "error")
+        fields.setdefault("error", f"{type(e).__name__}: {e}")
+        log_event(event, "warning", duration_ms=round((time.perf_counter() - start) * 1000, 2), **fields)
+        raise
+    # The block may raise the level, e.g. for a call that returned an error response
+    level = fields.pop("level", level)
+    fields.setdefault("outcome", "ok")
+    log_event(event, level, duration_ms=round((time.perf_counter() - start) * 1000, 2), **fields)
+
+
+@atexit.register
+def _flush_on_exit():
+    if _event_log is not None:
+        _event_log.close()
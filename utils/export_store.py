@@ -0,0 +1,138 @@
+#  utils/export_store.py
+
+import hashlib
+import os
+import re
+import time
+import uuid
+from typing import Callable, Optional, Tuple
+
+_SAFE_NAME_RE = re.compile(r"^[\w.-]+_([0-9a-f]{16})\.(pdf|docx)$")
+
+
+class ExportStore:
+    """Content-addressed storage for exported PDF/Word files.
+
+    The file name carries a hash of (format, topic, content), so rendering
+    the same article twice is a cache hit. Files are written to a temporary
+    name and renamed into place, which keeps concurrent workers safe. A
+    periodic sweep removes files older than ``max_age_seconds`` and then the
+    least recently served files until the directory fits in ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        directory: str = "outputs",
+        max_bytes: int = 512 * 1024 * 1024,
+        max_age_seconds: float = 7 * 24 * 3600,
+        evict_interval_seconds: float = 60,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.evict_interval_seconds = evict_interval_seconds
+        self._last_eviction = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    @staticmethod
+    def content_key(content: str, topic: str, fmt: str) -> str:
+        digest = hashlib.sha256()
+        for part in (fmt, topic, content):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def filename_for(self, content: str, topic: str, fmt: str) -> str:
+        safe_topic = re.sub(r"[^\w.-]+", "_", topic).strip("_")[:60] or "Untitled"
+        return f"{safe_topic}_{self.content_key(content, topic, fmt)[:16]}.{fmt}"
+
+    def get_or_render(self, content: str, topic: str, fmt: str, render: Callable[[str], None]) -> Tuple[str, bool]:
+        """Return (relative path, cache hit), calling render(path) only on a miss"""
+        os.makedirs(self.directory, exist_ok=True)
+        filename = self.filename_for(content, topic, fmt)
+        filepath = os.path.join(self.directory, filename)
+
+        if os.path.exists(filepath):
+            self.hits += 1
+            self._touch(filepath)
+            return f"{self.directory}/{filename}", True
+
+        self.misses += 1
+        tmp_path = os.path.join(self.directory, f".{filename}.{uuid.uuid4().hex}.tmp")
+        try:
+            render(tmp_path)
+            os.replace(tmp_path, filepath)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.maybe_evict()
+        return f"{self.directory}/{filename}", False
+
+    def resolve(self, filename: str) -> Optional[str]:
+        """Absolute path of a stored export, or None for unknown/unsafe names"""
+        if not _SAFE_NAME_RE.match(filename):
+            return None
+        filepath = os.path.join(self.directory, filename)
+        if not os.path.isfile(filepath):
+            return None
+        self._touch(filepath)
+        return filepath
+
+    @staticmethod
+    def etag_for(filename: str) -> Optional[str]:
+        match = _SAFE_NAME_RE.match(filename)
+        return f'"{match.group(1)}"' if match else None
+
+    @staticmethod
+    def _touch(filepath: str):
+        # Record the access time for LRU eviction but keep mtime as Last-Modified
+        try:
+            stat = os.stat(filepath)
+            os.utime(filepath, (time.time(), stat.st_mtime))
+        except OSError:
+            pass
+
+    def maybe_evict(self):
+        if time.time() - self._last_eviction >= self.evict_interval_seconds:
+            self.evict()
+
+    def evict(self) -> int:
+        """Apply the age and size limits; returns the number of files removed"""
+        self._last_eviction = time.time()
+        now = time.time()
+        entries = []
+        removed = 0
+        try:
+            scan = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return 0
+        for entry in scan:
+            if not entry.is_file() or not _SAFE_NAME_RE.match(entry.name):
+                continue
+            stat = entry.stat()
+            if now - stat.st_mtime > self.max_age_seconds:
+                removed += self._remove(entry.path)
+            else:
+                entries.append((stat.st_atime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            removed += self._remove(path)
+            total -= size
+        self.evicted += removed
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evicted": self.evicted}
@@ -1,37 +1,29 @@
 #  utils/export_utils.py
 
-import os
-import datetime
-from docx import Document
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from utils.export_store import ExportStore
+from utils.docx_stream import write_docx_stream
+from utils.event_log import timed_event
 
-def export_to_word(content: str, topic: str = "Untitled") -> str:
-    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-    safe_topic = topic.replace(' ', '_').replace('/', '_')
-    filename = f"{safe_topic}_{timestamp}.docx"
-    output_dir = "outputs"
-    os.makedirs(output_dir, exist_ok=True)
-    filepath = os.path.join(output_dir, filename)
+# reportlab is imported inside the PDF renderer: it is only needed when a
+# workflow actually exports, not to start the API.
 
-    doc = Document()
-    doc.add_heading(topic, 0)
-    for line in content.split("\n"):
-        doc.add_paragraph(line)
+# Shared content-addressed store; the orchestrator applies its config.json limits
+export_store = ExportStore()
 
-    print(f"Saving Word file to: {filepath}")
-    doc.save(filepath)
+def configure_export_store(**settings) -> ExportStore:
+    """Replace the default export store settings (directory, max_bytes, max_age_seconds, ...)"""
+    global export_store
+    export_store = ExportStore(**settings)
+    return export_store
 
-    # ✅ No auto-open here!
-    return f"outputs/{filename}"
+def _render_word(content: str, topic: str, filepath: str):
+    # Streams OOXML paragraph by paragraph and maps markdown headings, lists
+    # and bold text onto Word styles (see utils/docx_stream.py)
+    write_docx_stream(filepath, content, title=topic)
 
-def export_to_pdf(content: str, topic: str = "Untitled") -> str:
-    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-    safe_topic = topic.replace(' ', '_').replace('/', '_')
-    filename = f"{safe_topic}_{timestamp}.pdf"
-    output_dir = "outputs"
-    os.makedirs(output_dir, exist_ok=True)
-    filepath = os.path.join(output_dir, filename)
+def _render_pdf(content: str, topic: str, filepath: str):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
 
     c = canvas.Canvas(filepath, pagesize=letter)
     width, height = letter
@@ -47,8 +39,24 @@ def export_to_pdf(content: str, topic: str = "Untitled") -> str:
         c.drawString(50, y, line[:120])
         y -= 15
 
-    print(f"Saving PDF file to: {filepath}")
     c.save()
 
+def export_to_word(content: str, topic: str = "Untitled") -> str:
+    with timed_event("export", format="docx", chars=len(content)) as event:
+        path, hit = export_store.get_or_render(
+            content, topic, "docx", lambda filepath: _render_word(content, topic, filepath)
+        )
+        event.update(path=path, reused=hit)
+
+    # ✅ No auto-open here!
+    return path
+
+def export_to_pdf(content: str, topic: str = "Untitled") -> str:
+    with timed_event("export", format="pdf", chars=len(content)) as event:
+        path, hit = export_store.get_or_render(
+            content, topic, "pdf", lambda filepath: _render_pdf(content, topic, filepath)
+        )
+        event.update(path=path, reused=hit)
+
     # ✅ No auto-open here!
-    return f"outputs/{filename}"
+    return path
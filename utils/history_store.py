@@ -0,0 +1,203 @@
+#  utils/history_store.py
+
+import json
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from utils.shared_store import _SQLiteBacked, DEFAULT_STATE_DIR
+
+
+class HistoryStore(_SQLiteBacked):
+    """Completed workflows with their stage outputs, exports and timings, full-text indexed.
+
+    Topic and final result are indexed with FTS5 (external content, kept in
+    sync by triggers), so a search is an index lookup rather than a scan.
+    Every API worker writes to the same file.
+    """
+
+    _schema = """
+    CREATE TABLE IF NOT EXISTS workflows (
+        id TEXT PRIMARY KEY,
+        workflow TEXT NOT NULL,
+        topic TEXT NOT NULL,
+        status TEXT NOT NULL,
+        result TEXT NOT NULL,
+        stages TEXT NOT NULL,
+        exports TEXT NOT NULL,
+        client_id TEXT,
+        correlation_id TEXT,
+        created_at REAL NOT NULL,
+        duration_ms REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS workflows_created ON workflows(created_at);
+    CREATE INDEX IF NOT EXISTS workflows_type_created ON workflows(workflow, created_at);
+    CREATE INDEX IF NOT EXISTS workflows_client_created ON workflows(client_id, created_at);
+    CREATE VIRTUAL TABLE IF NOT EXISTS workflows_fts USING fts5(
+        topic, result, content='workflows', content_rowid='rowid', tokenize='porter unicode61',
+        prefix='2 3 4'
+    );
+    CREATE TRIGGER IF NOT EXISTS workflows_ai AFTER INSERT ON workflows BEGIN
+        INSERT INTO workflows_fts(rowid, topic, result) VALUES (new.rowid, new.topic, new.result);
+    END;
+    CREATE TRIGGER IF NOT EXISTS workflows_ad AFTER DELETE ON workflows BEGIN
+        INSERT INTO workflows_fts(workflows_fts, rowid, topic, result) VALUES ('delete', old.rowid, old.topic, old.result);
+    END;
+    """
+
+    _SUMMARY_COLUMNS = "w.id, w.workflow, w.topic, w.status, w.created_at, w.duration_ms, w.exports"
+
+    def __init__(self, path: str = f"{DEFAULT_STATE_DIR}/history.sqlite3", max_entries: int = 100000,
+                 store_stage_outputs: bool = True, enabled: bool = True, max_candidates: int = 2000,
+                 admin_token_env: str = "A2A_HISTORY_TOKEN"):
+        super().__init__(path)
+        # Callers presenting $admin_token_env read every client's history; everyone else only their own
+        self.admin_token_env = admin_token_env
+        self.max_entries = max_entries
+        self.max_candidates = max_candidates
+        self.store_stage_outputs = store_stage_outputs
+        self.enabled = enabled
+        self._writes = 0
+
+    def record(self, workflow: str, topic: str, result: str, stages: List[Dict[str, Any]],
+               exports: Dict[str, str], duration_ms: float, client_id: Optional[str] = None,
+               correlation_id: Optional[str] = None) -> str:
+        """Persist one finished workflow; returns its history id"""
+        history_id = uuid.uuid4().hex
+        failed = any(not stage.get("success", True) for stage in stages)
+        if not self.store_stage_outputs:
+            stages = [{k: v for k, v in stage.items() if k != "output"} for stage in stages]
+        self._execute(
+            "INSERT INTO workflows (id, workflow, topic, status, result, stages, exports, client_id, "
+            "correlation_id, created_at, duration_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (history_id, workflow, topic, "failed" if failed else "completed", result or "",
+             json.dumps(stages, ensure_ascii=False, default=str), json.dumps(exports, ensure_ascii=False),
+             client_id, correlation_id, time.time(), round(duration_ms, 2)),
+        )
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self.prune()
+        return history_id
+
+    def get(self, history_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._execute(
+            "SELECT id, workflow, topic, status, result, stages, exports, client_id, correlation_id, "
+            "created_at, duration_ms FROM workflows WHERE id = ?", (history_id,)
+        )
+        if not rows:
+            return None
+        (id_, workflow, topic, status, result, stages, exports, client_id, correlation_id,
+         created_at, duration_ms) = rows[0]
+        return {
+            "id": id_, "workflow": workflow, "topic": topic, "status": status, "result": result,
+            "stages": json.loads(stages), "exports": json.loads(exports), "client_id": client_id,
+            "correlation_id": correlation_id, "created_at": created_at, "duration_ms": duration_ms,
+        }
+
+    @staticmethod
+    def match_expression(query: str) -> Optional[str]:
+        """FTS5 query from free text: every word must match, the last one as a prefix"""
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return None
+        terms = [f'"{word}"' for word in words]
+        # Very short prefixes expand to most of the vocabulary
+        if len(words[-1]) >= 3:
+            terms[-1] += "*"
+        return " ".join(terms)
+
+    def search(self, query: str = "", workflow: Optional[str] = None, status: Optional[str] = None,
+               page: int = 1, page_size: int = 20, client_id: Optional[str] = None) -> Dict[str, Any]:
+        """One page of matches (best first), or of the newest entries when the query is empty.
+
+        Only the newest ``max_candidates`` matches are ranked. FTS5 reads those
+        cheaply in rowid order, while ranking every match of a common word would
+        touch the whole table. ``total_capped`` says when more exist. With
+        ``client_id``, only that client's entries are searched.
+        """
+        page, page_size = max(page, 1), min(max(page_size, 1), 100)
+        where, params = [], []
+        if client_id is not None:
+            where.append("w.client_id = ?")
+            params.append(client_id)
+        if workflow:
+            where.append("w.workflow = ?")
+            params.append(workflow)
+        if status:
+            where.append("w.status = ?")
+            params.append(status)
+        match = self.match_expression(query)
+
+        if match:
+            if client_id is not None:
+                # The candidate cap applies to this client's matches, not everyone's
+                hits = ("WITH hits AS (SELECT workflows_fts.rowid AS rowid, bm25(workflows_fts, 10.0, 1.0) AS score "
+                        "FROM workflows_fts JOIN workflows c ON c.rowid = workflows_fts.rowid "
+                        "WHERE workflows_fts MATCH ? AND c.client_id = ? ORDER BY workflows_fts.rowid DESC LIMIT ?) ")
+                params = [match, client_id, self.max_candidates] + params
+            else:
+                hits = ("WITH hits AS (SELECT rowid, bm25(workflows_fts, 10.0, 1.0) AS score FROM workflows_fts "
+                        "WHERE workflows_fts MATCH ? ORDER BY rowid DESC LIMIT ?) ")
+                params = [match, self.max_candidates] + params
+            source = "hits JOIN workflows w ON w.rowid = hits.rowid"
+            # Topic hits outrank hits deep in a long result
+            order = "hits.score"
+        else:
+            hits, source, order = "", "workflows w", "w.created_at DESC"
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+
+        # For searches, COUNT(*) OVER () gives the total in the same pass as the page;
+        # the newest-first listing counts through the created_at index instead
+        count = "COUNT(*) OVER ()" if match else "NULL"
+        rows = self._execute(
+            f"{hits}SELECT {count}, w.rowid, {self._SUMMARY_COLUMNS} FROM {source} {clause} "
+            f"ORDER BY {order} LIMIT ? OFFSET ?",
+            tuple(params) + (page_size, (page - 1) * page_size),
+        )
+        if match and rows:
+            total = rows[0][0]
+        else:
+            total = self._execute(f"{hits}SELECT COUNT(*) FROM {source} {clause}", tuple(params))[0][0]
+        snippets = self._snippets(match, [row[1] for row in rows])
+        items = [
+            {"id": id_, "workflow": wf, "topic": topic, "status": st, "created_at": created_at,
+             "duration_ms": duration_ms, "exports": json.loads(exports), "snippet": snippets.get(rowid, "")}
+            for _, rowid, id_, wf, topic, st, created_at, duration_ms, exports in rows
+        ]
+        return {
+            "query": query, "page": page, "page_size": page_size, "total": total,
+            "total_capped": bool(match) and total >= self.max_candidates,
+            "has_more": page * page_size < total, "items": items,
+        }
+
+    def _snippets(self, match: Optional[str], rowids: List[int]) -> Dict[int, str]:
+        """Highlighted excerpts for one page of results only"""
+        if not rowids:
+            return {}
+        marks = ",".join("?" * len(rowids))
+        if match:
+            sql = (f"SELECT rowid, snippet(workflows_fts, 1, '[', ']', ' … ', 24) FROM workflows_fts "
+                   f"WHERE workflows_fts MATCH ? AND rowid IN ({marks})")
+            return dict(self._execute(sql, (match, *rowids)))
+        return dict(self._execute(f"SELECT rowid, substr(result, 1, 200) FROM workflows WHERE rowid IN ({marks})",
+                                  tuple(rowids)))
+
+    def topic_events(self, since: float) -> List[tuple]:
+        """(topic, workflow, created_at) of completed workflows since a unix time, for traffic mining"""
+        return self._execute(
+            "SELECT topic, workflow, created_at FROM workflows WHERE created_at >= ? AND status = 'completed'",
+            (since,),
+        )
+
+    def prune(self):
+        """Trim to max_entries, oldest first"""
+        self._execute(
+            "DELETE FROM workflows WHERE id IN "
+            "(SELECT id FROM workflows ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        rows = self._execute("SELECT COUNT(*) FROM workflows")
+        return {"entries": rows[0][0], "path": self.path}
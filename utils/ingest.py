@@ -0,0 +1,343 @@
+#  utils/ingest.py
+
+import asyncio
+import codecs
+import hashlib
+import os
+import re
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from xml.etree.ElementTree import iterparse
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from utils.shared_store import DEFAULT_STATE_DIR
+
+SUPPORTED_FORMATS = {"txt", "md", "docx", "pdf"}
+_ARTIFACT_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+# Room for multipart boundaries, part headers and small form fields around the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UnsupportedFormat(Exception):
+    pass
+
+
+class InvalidUpload(Exception):
+    pass
+
+
+class MultipartFileReader:
+    """Pulls one file field out of a streamed multipart/form-data body.
+
+    ``chunks()`` yields the field's bytes as they arrive, so the caller can
+    stop reading the request as soon as it is too large; ``filename`` is
+    set once the field's headers have been parsed.
+    """
+
+    def __init__(self, content_type: str, stream: AsyncIterator[bytes], field: str = "file"):
+        kind, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+        if kind != b"multipart/form-data" or not boundary:
+            raise InvalidUpload("Expected a multipart/form-data upload")
+        self.stream = stream
+        self.field = field
+        self.filename: Optional[str] = None
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+        self._in_file = False
+        self._done = False
+        self._pending: List[bytes] = []
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, params = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = params.get(b"name", b"").decode("utf-8", "replace")
+        self._in_file = name == self.field and b"filename" in params and not self._done
+        if self._in_file:
+            self.filename = params[b"filename"].decode("utf-8", "replace")
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self._pending.append(data[start:end])
+
+    def _on_part_end(self):
+        if self._in_file:
+            self._in_file = False
+            self._done = True
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        async for data in self.stream:
+            self._parser.write(data)
+            if self._pending:
+                chunk = b"".join(self._pending)
+                self._pending.clear()
+                yield chunk
+        self._parser.finalize()
+        if self.filename is None:
+            raise InvalidUpload(f"No '{self.field}' file field in the upload")
+
+
+# --- Extractors (run in worker processes; keep them top-level and picklable) ---
+
+def _extract_txt(src: str, out) -> None:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(src, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            out.write(decoder.decode(block))
+        out.write(decoder.decode(b"", final=True))
+
+
+def _extract_docx(src: str, out) -> None:
+    # Parse word/document.xml incrementally, one paragraph at a time
+    with zipfile.ZipFile(src) as zf, zf.open("word/document.xml") as xml:
+        for _, elem in iterparse(xml, events=("end",)):
+            if elem.tag != f"{_W}p":
+                continue
+            parts = []
+            style = elem.find(f"{_W}pPr/{_W}pStyle")
+            style_id = style.get(f"{_W}val", "") if style is not None else ""
+            for node in elem.iter():
+                if node.tag == f"{_W}t" and node.text:
+                    parts.append(node.text)
+                elif node.tag == f"{_W}tab":
+                    parts.append("\t")
+                elif node.tag in (f"{_W}br", f"{_W}cr"):
+                    parts.append("\n")
+            text = "".join(parts)
+            if style_id.startswith("Heading") and style_id[7:].isdigit() and text.strip():
+                text = "#" * min(int(style_id[7:]), 6) + " " + text
+            elif style_id == "Title" and text.strip():
+                text = "# " + text
+            elif style_id.startswith("List") and text.strip():
+                text = "- " + text
+            out.write(text + "\n")
+            elem.clear()
+
+
+def _extract_pdf(src: str, out) -> None:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("PDF extraction requires the 'pypdf' package")
+    reader = PdfReader(src)
+    for page in reader.pages:
+        out.write((page.extract_text() or "") + "\n\n")
+
+
+_EXTRACTORS = {"txt": _extract_txt, "md": _extract_txt, "docx": _extract_docx, "pdf": _extract_pdf}
+
+
+def extract_to_artifact(src: str, fmt: str, dest: str) -> int:
+    """Extract text from src into dest; returns the size of the text artifact in bytes"""
+    tmp = f"{dest}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as out:
+            _EXTRACTORS[fmt](src, out)
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return os.path.getsize(dest)
+
+
+class ArtifactStore:
+    """Stores uploads and their extracted text under a content-derived artifact id.
+
+    The id is a hash of the uploaded bytes, so uploading the same file twice
+    reuses the earlier extraction instead of parsing it again. Like the export
+    store, a periodic sweep removes artifacts unused for ``max_age_seconds``
+    and then the least recently used ones until the directory fits in
+    ``max_total_bytes``.
+    """
+
+    def __init__(self, directory: str = f"{DEFAULT_STATE_DIR}/artifacts", max_bytes: int = 50 * 1024 * 1024,
+                 chunk_size: int = 1024 * 1024, workers: int = 2, max_total_bytes: int = 1024 * 1024 * 1024,
+                 max_age_seconds: float = 24 * 3600, evict_interval_seconds: float = 60):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.max_total_bytes = max_total_bytes
+        self.max_age_seconds = max_age_seconds
+        self.evict_interval_seconds = evict_interval_seconds
+        self._last_eviction = 0.0
+        self.evicted = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def text_path(self, artifact_id: str) -> str:
+        return os.path.join(self.directory, f"{artifact_id}.txt")
+
+    def exists(self, artifact_id: str) -> bool:
+        return bool(_ARTIFACT_ID_RE.match(artifact_id)) and os.path.exists(self.text_path(artifact_id))
+
+    def load_text(self, artifact_id: str) -> Optional[str]:
+        if not self.exists(artifact_id):
+            return None
+        self._touch(self.text_path(artifact_id))
+        try:
+            with open(self.text_path(artifact_id), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            # Evicted by another worker between the check and the read
+            return None
+
+    @staticmethod
+    def _touch(path: str):
+        # Both times mark the last use: age and LRU order both count from it
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def maybe_evict(self):
+        if time.time() - self._last_eviction >= self.evict_interval_seconds:
+            self.evict()
+
+    def evict(self) -> int:
+        """Apply the age and size limits; returns the number of artifacts removed"""
+        self._last_eviction = now = time.time()
+        entries = []
+        removed = 0
+        try:
+            scan = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return 0
+        for entry in scan:
+            artifact_id, ext = os.path.splitext(entry.name)
+            if not entry.is_file() or ext != ".txt" or not _ARTIFACT_ID_RE.match(artifact_id):
+                continue
+            stat = entry.stat()
+            if now - stat.st_mtime > self.max_age_seconds:
+                removed += self._remove(entry.path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_total_bytes:
+                break
+            removed += self._remove(path)
+            total -= size
+        self.evicted += removed
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"evicted": self.evicted}
+
+    @staticmethod
+    def detect_format(filename: str) -> str:
+        ext = os.path.splitext(filename or "")[1].lower().lstrip(".")
+        if ext not in SUPPORTED_FORMATS:
+            raise UnsupportedFormat(f"Unsupported file type '.{ext}' (expected one of {sorted(SUPPORTED_FORMATS)})")
+        return ext
+
+    def content_length_too_large(self, content_length: Optional[str]) -> bool:
+        """True if a declared request size alone proves the upload is over the limit"""
+        return bool(content_length and content_length.isdigit()
+                    and int(content_length) > self.max_bytes + MULTIPART_OVERHEAD_BYTES)
+
+    async def ingest_stream(self, content_type: str, stream: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """Ingest the 'file' field of a raw multipart body, reading it only up to the size limit"""
+        reader = MultipartFileReader(content_type, stream)
+        return await self._ingest(reader.chunks(), lambda: reader.filename)
+
+    async def _ingest(self, chunks: AsyncIterator[bytes], filename: Callable[[], Optional[str]]) -> Dict[str, Any]:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_upload = os.path.join(self.directory, f".upload.{uuid.uuid4().hex}")
+        digest = hashlib.sha256()
+        size = 0
+        fmt = None
+        pending: List[bytes] = []
+        pending_bytes = 0
+        try:
+            # File I/O runs in a thread, batched to chunk_size, so the event loop never blocks on disk
+            f = await asyncio.to_thread(open, tmp_upload, "wb")
+            try:
+                async for chunk in chunks:
+                    if fmt is None:
+                        fmt = self.detect_format(filename())
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise UploadTooLarge(f"Upload exceeds the {self.max_bytes} byte limit")
+                    digest.update(chunk)
+                    pending.append(chunk)
+                    pending_bytes += len(chunk)
+                    if pending_bytes >= self.chunk_size:
+                        await asyncio.to_thread(f.write, b"".join(pending))
+                        pending.clear()
+                        pending_bytes = 0
+                if pending:
+                    await asyncio.to_thread(f.write, b"".join(pending))
+            finally:
+                await asyncio.to_thread(f.close)
+            if fmt is None:
+                fmt = self.detect_format(filename())
+
+            digest.update(fmt.encode("ascii"))
+            artifact_id = digest.hexdigest()[:32]
+            cached = self.exists(artifact_id)
+            if cached:
+                await asyncio.to_thread(self._touch, self.text_path(artifact_id))
+                text_bytes = os.path.getsize(self.text_path(artifact_id))
+            else:
+                loop = asyncio.get_running_loop()
+                text_bytes = await loop.run_in_executor(
+                    self._executor(), extract_to_artifact, tmp_upload, fmt, self.text_path(artifact_id)
+                )
+        finally:
+            if os.path.exists(tmp_upload):
+                os.remove(tmp_upload)
+        await asyncio.to_thread(self.maybe_evict)
+
+        return {
+            "artifact_id": artifact_id,
+            "filename": filename(),
+            "format": fmt,
+            "bytes": size,
+            "text_bytes": text_bytes,
+            "cached": cached,
+        }
@@ -0,0 +1,113 @@
+#  utils/job_store.py
+
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from utils.shared_store import _SQLiteBacked, DEFAULT_STATE_DIR
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobStore(_SQLiteBacked):
+    """State of workflows submitted through /jobs, shared by every API worker.
+
+    The worker that accepted a job runs it and writes its progress here
+    about once a second. Any worker can answer a poll or record a
+    cancellation. A queued or running job that stops getting updates for
+    ``stale_seconds`` belonged to a worker that died, and reads as failed.
+    """
+
+    _schema = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        status TEXT NOT NULL,
+        workflow TEXT,
+        topic TEXT,
+        stages TEXT NOT NULL DEFAULT '[]',
+        stages_total INTEGER,
+        partial_result TEXT,
+        result TEXT,
+        exports TEXT NOT NULL DEFAULT '{}',
+        history_id TEXT,
+        error TEXT,
+        cancel_requested INTEGER NOT NULL DEFAULT 0,
+        client_id TEXT,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS jobs_updated ON jobs(updated_at);
+    """
+
+    _COLUMNS = ("id", "kind", "status", "workflow", "topic", "stages", "stages_total", "partial_result",
+                "result", "exports", "history_id", "error", "cancel_requested", "client_id", "created_at",
+                "updated_at")
+
+    def __init__(self, path: str = f"{DEFAULT_STATE_DIR}/jobs.sqlite3", retention_seconds: float = 86400,
+                 stale_seconds: float = 30):
+        super().__init__(path)
+        self.retention_seconds = retention_seconds
+        self.stale_seconds = stale_seconds
+        self._writes = 0
+
+    def create(self, kind: str, workflow: str, topic: str, stages_total: Optional[int] = None,
+               client_id: Optional[str] = None) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (id, kind, status, workflow, topic, stages_total, client_id, created_at, updated_at) "
+            "VALUES (?, ?, 'queued', ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, workflow, topic, stages_total, client_id, now, now),
+        )
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self.prune()
+        return job_id
+
+    def update(self, job_id: str, stages: Optional[List[Dict[str, Any]]] = None,
+               exports: Optional[Dict[str, str]] = None, **fields):
+        """Set columns (status, partial_result, result, ...) and refresh the heartbeat"""
+        if stages is not None:
+            fields["stages"] = json.dumps(stages, ensure_ascii=False, default=str)
+        if exports is not None:
+            fields["exports"] = json.dumps(exports, ensure_ascii=False)
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        self._execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def request_cancel(self, job_id: str) -> bool:
+        """Flag a job for cancellation; the worker running it stops it on its next tick"""
+        job = self.get(job_id)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            return False
+        self._execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+        return True
+
+    def cancel_requested(self, job_id: str) -> bool:
+        rows = self._execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,))
+        return bool(rows and rows[0][0])
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._execute(f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        job = dict(zip(self._COLUMNS, rows[0]))
+        job["stages"] = json.loads(job["stages"])
+        job["exports"] = json.loads(job["exports"])
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        if job["status"] not in FINISHED_STATUSES and time.time() - job["updated_at"] > self.stale_seconds:
+            job.update(status="failed", error="The worker running this job stopped responding")
+        return job
+
+    def prune(self):
+        """Forget finished jobs after retention_seconds"""
+        self._execute(
+            f"DELETE FROM jobs WHERE updated_at < ? AND status IN {FINISHED_STATUSES}",
+            (time.time() - self.retention_seconds,),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        counts = dict(self._execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+        return {"jobs": counts, "path": self.path}
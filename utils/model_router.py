@@ -0,0 +1,340 @@
+#  utils/model_router.py
+
+import asyncio
+import os
+import random
+import re
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from utils.prompt_budget import estimate_tokens
+from utils.rate_limiter import is_rate_limit_error
+from utils.event_log import log_event
+
+DEFAULT_MODEL = "gemini-1.5-flash"
+
+# Used when an agent's config.json has no "model_routing" section
+DEFAULT_POLICY: Dict[str, Any] = {
+    "tiers": {"standard": {"model": DEFAULT_MODEL, "timeout_seconds": 120}},
+    "default_tier": "standard",
+}
+
+
+_configured_pid: Optional[int] = None
+
+
+def gemini_model_factory(model_name: str):
+    """Build a Gemini model, importing and configuring the SDK on first use"""
+    global _configured_pid
+    import google.generativeai as genai
+
+    if _configured_pid != os.getpid():
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        _configured_pid = os.getpid()
+    return genai.GenerativeModel(model_name)
+
+
+_WORD_TARGET_RE = re.compile(r"(\d+)(?:\s*-\s*(\d+))?\s+words", re.IGNORECASE)
+
+
+class SimulatedModel:
+    """Stand-in for a Gemini model in load tests: blocks for a configurable latency like the SDK does.
+
+    With ``tokens_per_second``, the output is as long as the word counts the
+    prompt asks for (e.g. "800-1200 words" -> 1200) and takes that long to
+    "decode" on top of ``latency_ms``, so long generations cost what they would.
+    """
+
+    def __init__(self, model_name: str, latency_ms: float, jitter_ms: float = 0.0, output_chars: int = 2000,
+                 tokens_per_second: float = 0.0):
+        self.model_name = model_name
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.output_chars = output_chars
+        self.tokens_per_second = tokens_per_second
+
+    def generate_content(self, prompt: str):
+        latency_ms = max(0.0, random.gauss(self.latency_ms, self.jitter_ms))
+        output_chars = self.output_chars
+        if self.tokens_per_second:
+            words = sum(int(high or low) for low, high in _WORD_TARGET_RE.findall(prompt)) or 150
+            output_chars = words * 6
+            latency_ms += words * 1.3 / self.tokens_per_second * 1000
+        time.sleep(latency_ms / 1000)
+        paragraph = f"Simulated {self.model_name} output. " + prompt.strip()[:200].replace("\n", " ") + "\n\n"
+        text = (paragraph * (output_chars // max(len(paragraph), 1) + 1))[:output_chars]
+        return type("SimulatedResponse", (), {"text": text})()
+
+
+def simulated_model_factory(model_name: str) -> SimulatedModel:
+    """Used instead of Gemini when A2A_SIMULATED_MODEL_LATENCY_MS is set"""
+    return SimulatedModel(
+        model_name,
+        latency_ms=float(os.getenv("A2A_SIMULATED_MODEL_LATENCY_MS", "0")),
+        jitter_ms=float(os.getenv("A2A_SIMULATED_MODEL_JITTER_MS", "0")),
+        output_chars=int(os.getenv("A2A_SIMULATED_MODEL_OUTPUT_CHARS", "2000")),
+        tokens_per_second=float(os.getenv("A2A_SIMULATED_MODEL_TOKENS_PER_SECOND", "0")),
+    )
+
+
+class ModelStats:
+    """Rolling latency statistics for a single model"""
+
+    def __init__(self, window: int = 200):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.throttled = 0
+        self.ewma_ms: Optional[float] = None
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, latency_ms: float):
+        self.calls += 1
+        self.samples.append(latency_ms)
+        self.ewma_ms = latency_ms if self.ewma_ms is None else 0.8 * self.ewma_ms + 0.2 * latency_ms
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))], 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "throttled": self.throttled,
+            "ewma_ms": round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+        }
+
+
+class ModelRouter:
+    """Chooses a model tier per call from the agent's "model_routing" policy.
+
+    Rules are checked in order and the first match wins; a rule may restrict
+    ``capabilities``, ``max_input_tokens``, ``min_input_tokens`` and
+    ``max_latency_budget_ms``. If no rule matches, the capability's own tier
+    or ``default_tier`` is used. A timed-out call is retried once on the
+    tier's ``fallback``. With a ``rate_limiter``, every call first waits for
+    the shared per-model quota, and 429 responses are re-queued rather than
+    surfaced.
+
+    A blocking SDK call cannot be interrupted, so a call that times out (or
+    whose caller goes away) keeps running in its thread. It keeps its
+    rate-limit lease until that thread finishes. A model with
+    ``max_abandoned_per_model`` such calls still running is skipped, so
+    stuck calls and their fallbacks cannot pile up.
+    """
+
+    def __init__(self, policy: Optional[Dict[str, Any]], model_factory: Callable[[str], Any], metrics=None,
+                 rate_limiter=None):
+        self.policy = policy or DEFAULT_POLICY
+        self.tiers: Dict[str, Dict[str, Any]] = self.policy["tiers"]
+        self.default_tier = self.policy.get("default_tier", next(iter(self.tiers)))
+        self.model_factory = model_factory
+        if os.getenv("A2A_SIMULATED_MODEL_LATENCY_MS"):
+            print(f"🧪 Simulated model backend ({os.getenv('A2A_SIMULATED_MODEL_LATENCY_MS')}ms per call)")
+            self.model_factory = simulated_model_factory
+        self.metrics = metrics
+        self.rate_limiter = rate_limiter
+        self._models: Dict[str, Any] = {}
+        self._pid = os.getpid()
+        self.stats: Dict[str, ModelStats] = {}
+        self.max_abandoned_per_model = self.policy.get("max_abandoned_per_model", 4)
+        # Timed-out calls whose threads are still running, per model, and the tasks waiting them out
+        self.abandoned: Dict[str, int] = {}
+        self._settling: set = set()
+
+    def _get_model(self, model_name: str):
+        # SDK clients hold sockets/threads that must not be shared across fork()
+        if self._pid != os.getpid():
+            self._models.clear()
+            self._pid = os.getpid()
+        if model_name not in self._models:
+            self._models[model_name] = self.model_factory(model_name)
+        return self._models[model_name]
+
+    def _record_shared(self, model_name: str, outcome: str, latency_ms: float = 0.0):
+        if self.metrics is None:
+            return
+        self.metrics.incr(f"model.{model_name}.{outcome}")
+        if latency_ms:
+            self.metrics.incr(f"model.{model_name}.latency_ms_total", latency_ms)
+
+    def warm_up(self):
+        """Import the SDK and build the default tier's model ahead of the first call"""
+        self._get_model(self.tiers[self.default_tier]["model"])
+
+    def _rule_matches(self, rule: Dict[str, Any], capability: str, input_tokens: int, latency_budget_ms: Optional[float]) -> bool:
+        if "capabilities" in rule and capability not in rule["capabilities"]:
+            return False
+        if "max_input_tokens" in rule and input_tokens > rule["max_input_tokens"]:
+            return False
+        if "min_input_tokens" in rule and input_tokens < rule["min_input_tokens"]:
+            return False
+        if "max_latency_budget_ms" in rule:
+            if latency_budget_ms is None or latency_budget_ms > rule["max_latency_budget_ms"]:
+                return False
+        return True
+
+    def select_tier(self, capability: str, input_text: str = "", latency_budget_ms: Optional[float] = None) -> str:
+        """Pick the tier for a call based on capability, input size and latency budget"""
+        input_tokens = estimate_tokens(input_text)
+        tier = None
+        for rule in self.policy.get("rules", []):
+            if self._rule_matches(rule, capability, input_tokens, latency_budget_ms):
+                tier = rule["tier"]
+                break
+        if tier is None:
+            tier = self.policy.get("capabilities", {}).get(capability, {}).get("tier", self.default_tier)
+
+        # If recorded latency says this tier cannot meet the budget, prefer the fastest observed tier
+        if latency_budget_ms is not None:
+            observed = self._observed_ms(tier)
+            if observed is not None and observed > latency_budget_ms:
+                faster = min(
+                    (t for t in self.tiers if self._observed_ms(t) is not None),
+                    key=self._observed_ms,
+                )
+                tier = faster
+        return tier
+
+    def _observed_ms(self, tier: str) -> Optional[float]:
+        stats = self.stats.get(self.tiers[tier]["model"])
+        return stats.ewma_ms if stats else None
+
+    def _candidates(self, tier: str) -> List[str]:
+        chain = [tier]
+        fallback = self.tiers[tier].get("fallback")
+        if fallback and fallback in self.tiers and fallback != tier:
+            chain.append(fallback)
+        return chain
+
+    async def generate(
+        self,
+        prompt: str,
+        capability: str,
+        input_text: str = "",
+        latency_budget_ms: Optional[float] = None,
+    ) -> str:
+        """Generate text with the routed model, falling back to another tier on timeout"""
+        tier = self.select_tier(capability, input_text, latency_budget_ms)
+        deadline = time.monotonic() + latency_budget_ms / 1000 if latency_budget_ms is not None else None
+        last_error: Optional[Exception] = None
+        for candidate in self._candidates(tier):
+            tier_config = self.tiers[candidate]
+            model_name = tier_config["model"]
+            stats = self.stats.setdefault(model_name, ModelStats())
+            timeout = tier_config.get("timeout_seconds")
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                timeout = min(timeout, remaining) if timeout else remaining
+            if self.abandoned.get(model_name, 0) >= self.max_abandoned_per_model:
+                last_error = TimeoutError(f"{model_name} still has {self.abandoned[model_name]} timed-out calls running")
+                log_event("model.skipped", "warning", model=model_name, tier=candidate, capability=capability,
+                          abandoned=self.abandoned[model_name])
+                continue
+
+            model = self._get_model(model_name)
+            try:
+                response, latency_ms = await self._call_model(model_name, model, prompt, timeout, deadline, stats)
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+                self._record_shared(model_name, "timeouts")
+                last_error = TimeoutError(f"{model_name} timed out after {timeout:.1f}s")
+                log_event("model.timeout", "warning", model=model_name, tier=candidate, capability=capability,
+                          timeout_s=round(timeout, 2) if timeout else None)
+                continue
+            except Exception as e:
+                stats.errors += 1
+                self._record_shared(model_name, "errors")
+                log_event("model.error", "warning", model=model_name, tier=candidate, capability=capability,
+                          error=f"{type(e).__name__}: {str(e)[:200]}")
+                raise
+            stats.record(latency_ms)
+            self._record_shared(model_name, "calls", latency_ms)
+            log_event("model.call", "debug", model=model_name, tier=candidate, capability=capability,
+                      duration_ms=round(latency_ms, 2), prompt_chars=len(prompt))
+            return response.text
+        raise last_error or TimeoutError(f"Latency budget of {latency_budget_ms:.0f}ms exhausted")
+
+    async def _call_model(self, model_name: str, model, prompt: str, timeout: Optional[float],
+                          deadline: Optional[float], stats: ModelStats):
+        """One model call under the shared rate limit; 429s go back in the queue"""
+        limiter = self.rate_limiter
+        attempts = 0
+        while True:
+            lease = None
+            if limiter is not None:
+                max_wait = deadline - time.monotonic() if deadline is not None else None
+                lease = await limiter.acquire(
+                    model_name, limiter.estimate_tokens(estimate_tokens(prompt)), max_wait=max_wait
+                )
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        await limiter.release(model_name, lease)
+                        raise asyncio.TimeoutError()
+                    timeout = min(timeout, remaining) if timeout else remaining
+            start = time.perf_counter()
+            # The SDK call is blocking; run it off the event loop
+            call = asyncio.ensure_future(asyncio.to_thread(model.generate_content, prompt))
+            try:
+                response = await asyncio.wait_for(asyncio.shield(call), timeout=timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                if not call.done():
+                    # Timed out, or the caller gave up: the thread still runs and uses quota
+                    self._abandon(model_name, call, lease)
+                    raise
+                if limiter is not None:
+                    await limiter.release(model_name, lease)
+                raise
+            except Exception as e:
+                throttled = is_rate_limit_error(e)
+                if limiter is not None:
+                    await limiter.release(model_name, lease, throttled=throttled)
+                if throttled and limiter is not None and attempts < limiter.retries_on_429:
+                    attempts += 1
+                    stats.throttled += 1
+                    self._record_shared(model_name, "throttled")
+                    continue
+                raise
+            if limiter is not None:
+                await limiter.release(model_name, lease)
+            return response, (time.perf_counter() - start) * 1000
+
+    def _abandon(self, model_name: str, call: asyncio.Future, lease: Optional[str]):
+        """Hold an abandoned call's lease (and count it) until its thread really finishes"""
+        self.abandoned[model_name] = self.abandoned.get(model_name, 0) + 1
+        self._record_shared(model_name, "abandoned")
+
+        async def settle():
+            throttled = False
+            try:
+                await call
+            except Exception as e:
+                throttled = is_rate_limit_error(e)
+            finally:
+                self.abandoned[model_name] -= 1
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.release(model_name, lease, throttled=throttled)
+
+        task = asyncio.create_task(settle())
+        self._settling.add(task)
+        task.add_done_callback(self._settling.discard)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-model latency figures for tuning the routing policy"""
+        return {
+            "worker_pid": os.getpid(),
+            "default_tier": self.default_tier,
+            "tiers": {name: cfg["model"] for name, cfg in self.tiers.items()},
+            "models": {name: stats.to_dict() for name, stats in self.stats.items()},
+            "abandoned_in_flight": {name: n for name, n in self.abandoned.items() if n},
+        }
@@ -0,0 +1,222 @@
+#  utils/prompt_budget.py
+
+import re
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+# Rough heuristic used by Gemini docs: ~4 characters per token for English text
+CHARS_PER_TOKEN = 4
+
+_BANNER_RE = re.compile(r"^\s*([=\-_*~#])\1{9,}\s*$")
+# "✍️ Article by Alex Writer": an emoji (or bare indent) lead, then a short "... by Name" line
+_BYLINE_RE = re.compile(r"^(?:\s*[^\w\s]+\s*|\s+)[\w ]{1,40} by [A-Z][\w.]*( [A-Z][\w.]*){0,2}\s*$")
+
+# Payload fields holding the text a capability transforms; compacting them would change the output
+EDITED_FIELDS = frozenset({"content", "text"})
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=\S)")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_HEADING_RE = re.compile(r"^\s*(#{1,6}\s+\S|\*\*[^*]+\*\*:?\s*$|\d+\.\s+\S.{0,60}$)")
+_NUMBER_RE = re.compile(r"\d")
+# Smallest leftover budget worth filling with a cut-down unit
+_MIN_TRUNCATED_TOKENS = 32
+
+_STOPWORDS = frozenset(
+    "a an the and or but if of to in on at by for with from as is are was were be been "
+    "it its this that these those their there they we you he she i not no can will "
+    "would should could may might has have had do does did so than then also into".split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of model tokens in text"""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def strip_boilerplate(text: str) -> str:
+    """Remove agent banners such as the '='*60 separator and its byline header.
+
+    A banner is only dropped when it stands alone or sits under an agent
+    byline; a rule directly under ordinary text is a setext heading underline
+    and is kept.
+    """
+    lines = text.split("\n")
+    kept: List[str] = []
+    for line in lines:
+        if _BANNER_RE.match(line):
+            previous = kept[-1] if kept else ""
+            if _BYLINE_RE.match(previous):
+                kept.pop()
+                continue
+            if not previous.strip():
+                continue
+        kept.append(line)
+    return "\n".join(kept).strip()
+
+
+def _normalize_sentence(sentence: str) -> str:
+    return " ".join(_WORD_RE.findall(sentence.lower()))
+
+
+def dedupe_sentences(text: str) -> Tuple[str, int]:
+    """Drop sentences that already appeared earlier in the text"""
+    seen = set()
+    removed = 0
+    out_lines: List[str] = []
+    for line in text.split("\n"):
+        if not line.strip():
+            # Collapse runs of blank lines into a single paragraph break
+            if out_lines and out_lines[-1] != "":
+                out_lines.append("")
+            continue
+        kept = []
+        for sentence in _SENTENCE_SPLIT_RE.split(line.strip()):
+            key = _normalize_sentence(sentence)
+            # Very short fragments ("1.", "Yes.") are too generic to dedupe safely
+            if len(key) > 12:
+                if key in seen:
+                    removed += 1
+                    continue
+                seen.add(key)
+            kept.append(sentence)
+        if kept:
+            indent = line[: len(line) - len(line.lstrip())]
+            out_lines.append(indent + " ".join(kept))
+    return "\n".join(out_lines).strip(), removed
+
+
+def compact_to_budget(text: str, max_tokens: int) -> str:
+    """Extractively select the most informative sentences that fit max_tokens"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    # Units are (line_index, sentence_index, sentence, is_heading)
+    units: List[Tuple[int, int, str, bool]] = []
+    for li, line in enumerate(text.split("\n")):
+        if not line.strip():
+            continue
+        if _HEADING_RE.match(line):
+            units.append((li, 0, line.rstrip(), True))
+            continue
+        for si, sentence in enumerate(_SENTENCE_SPLIT_RE.split(line.strip())):
+            units.append((li, si, sentence, False))
+
+    freq = Counter(
+        w for _, _, s, _ in units for w in _WORD_RE.findall(s.lower()) if w not in _STOPWORDS
+    )
+    total_units = len(units)
+
+    def score(pos: int, sentence: str, is_heading: bool) -> float:
+        words = [w for w in _WORD_RE.findall(sentence.lower()) if w not in _STOPWORDS]
+        if not words:
+            return 0.0
+        value = sum(freq[w] for w in words) / len(words)
+        if is_heading:
+            value *= 2.0
+        if _NUMBER_RE.search(sentence):
+            value *= 1.3  # statistics and dates are what the writer needs most
+        # Mild lead bias: earlier material is usually the summary
+        value *= 1.0 + 0.3 * (1.0 - pos / max(total_units, 1))
+        return value
+
+    ranked = sorted(
+        range(total_units),
+        key=lambda i: score(i, units[i][2], units[i][3]),
+        reverse=True,
+    )
+    selected = set()
+    truncated: Dict[int, str] = {}
+    skipped: Optional[int] = None
+    used = 0
+    for i in ranked:
+        cost = estimate_tokens(units[i][2]) + 1
+        if used + cost > max_tokens:
+            if skipped is None:
+                skipped = i
+            continue
+        selected.add(i)
+        used += cost
+    # Text without sentence punctuation (tables, CSV, scraped dumps) comes as a few huge
+    # units; cut the best one that did not fit down to the budget that is left
+    if skipped is not None and (not selected or max_tokens - used >= _MIN_TRUNCATED_TOKENS):
+        cut = _truncate_words(units[skipped][2], (max_tokens - used - 1) * CHARS_PER_TOKEN)
+        if cut:
+            selected.add(skipped)
+            truncated[skipped] = cut
+
+    lines: Dict[int, List[str]] = {}
+    for i in sorted(selected):
+        li, _, sentence, _ = units[i]
+        lines.setdefault(li, []).append(truncated.get(i, sentence))
+    compacted = "\n".join(" ".join(parts) for _, parts in sorted(lines.items()))
+    # Never hand back nothing for non-empty input
+    return compacted or _truncate_words(text.strip(), max_tokens * CHARS_PER_TOKEN)
+
+
+def _truncate_words(text: str, max_chars: int) -> str:
+    """Head of text within max_chars, cut at a word boundary where there is one"""
+    if len(text) <= max_chars:
+        return text
+    head = text[:max(max_chars, 0)]
+    space = head.rfind(" ")
+    return (head[:space] if space > max_chars // 2 else head).rstrip()
+
+
+class PromptBudgetManager:
+    """Fits large context fields into a per-capability token budget.
+
+    Budgets are read from the agent's config.json, e.g.::
+
+        "prompt_budget": {
+            "create_article": {"fields": ["research_data"], "max_tokens": 3000}
+        }
+
+    Only context (research, reference material) may be budgeted. Compaction
+    drops sentences, so budgeting the text a capability edits or proofreads
+    (EDITED_FIELDS) is rejected at startup.
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.budgets = budgets or {}
+        for capability_name, budget in self.budgets.items():
+            edited = EDITED_FIELDS.intersection(budget.get("fields", []))
+            if edited:
+                raise ValueError(
+                    f"prompt_budget for {capability_name} lists {sorted(edited)}; only context fields can be "
+                    "compacted, never the text being edited"
+                )
+
+    def apply(self, capability_name: str, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Return the compacted payload and a report of token counts, if a budget applies"""
+        budget = self.budgets.get(capability_name)
+        if not budget:
+            return payload, None
+
+        max_tokens = int(budget.get("max_tokens", 0))
+        compacted = dict(payload)
+        fields_report: Dict[str, Dict[str, int]] = {}
+        for field_name in budget.get("fields", []):
+            value = payload.get(field_name)
+            if not isinstance(value, str) or not value:
+                continue
+            before = estimate_tokens(value)
+            cleaned = strip_boilerplate(value)
+            cleaned, duplicates = dedupe_sentences(cleaned)
+            if max_tokens > 0:
+                cleaned = compact_to_budget(cleaned, max_tokens)
+            compacted[field_name] = cleaned
+            fields_report[field_name] = {
+                "tokens_before": before,
+                "tokens_after": estimate_tokens(cleaned),
+                "duplicate_sentences_removed": duplicates,
+            }
+
+        if not fields_report:
+            return payload, None
+        return compacted, {
+            "max_tokens": max_tokens,
+            "tokens_before": sum(f["tokens_before"] for f in fields_report.values()),
+            "tokens_after": sum(f["tokens_after"] for f in fields_report.values()),
+            "fields": fields_report,
+        }
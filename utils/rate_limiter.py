@@ -0,0 +1,293 @@
+#  utils/rate_limiter.py
+
+import asyncio
+import os
+import sqlite3
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from utils.event_log import log_event
+from utils.shared_store import _SQLiteBacked, DEFAULT_STATE_DIR
+
+
+class RateLimitTimeout(Exception):
+    pass
+
+
+_RATE_LIMIT_TYPES = {"ResourceExhausted", "TooManyRequests", "RateLimitError"}
+_RATE_LIMIT_STATUSES = {429, "429", "RESOURCE_EXHAUSTED", "TOO_MANY_REQUESTS"}
+
+
+def _status_value(value: Any) -> Any:
+    if callable(value):
+        try:
+            value = value()
+        except Exception:
+            return None
+    # HTTPStatus and grpc StatusCode enums
+    value = getattr(value, "value", value)
+    if isinstance(value, tuple):  # grpc StatusCode.value is (int, "resource exhausted")
+        value = value[0]
+    return value
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for upstream quota errors (HTTP 429 / RESOURCE_EXHAUSTED), without importing the SDK.
+
+    Matches on the exception type (google.api_core ResourceExhausted and
+    TooManyRequests) or a status attribute, never on message text, so an
+    unrelated error that mentions "429" is not treated as throttling.
+    """
+    if any(cls.__name__ in _RATE_LIMIT_TYPES for cls in type(error).__mro__):
+        return True
+    for attr in ("code", "status_code", "status", "grpc_status_code"):
+        value = _status_value(getattr(error, attr, None))
+        if value == 8 and attr == "grpc_status_code":  # grpc RESOURCE_EXHAUSTED
+            return True
+        if isinstance(value, str):
+            value = value.upper()
+        if value in _RATE_LIMIT_STATUSES:
+            return True
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == 429
+
+
+class SharedRateLimiter(_SQLiteBacked):
+    """Token buckets for requests and tokens per minute, shared by every agent process.
+
+    Each model has its own bucket row. All agents point at the same SQLite
+    file, so together they stay under the project quota. Concurrency is capped
+    by an AIMD limit: it grows by one slot per ``limit`` successful calls and
+    is multiplied by ``decrease_factor`` on a 429, which also pauses the bucket
+    for ``throttle_cooldown_seconds`` in every process. In-flight calls are leases
+    with an expiry, so a crashed worker cannot hold slots forever.
+
+    SQLite transactions run on one dedicated thread per process, never on the
+    event loop, and an admission attempt that finds the database locked for
+    more than ``busy_timeout_seconds`` simply counts as "not admitted yet".
+    """
+
+    # Transactions are a few statements; a longer wait means another process holds the lock
+    _busy_timeout_seconds = 0.25
+
+    _schema = """
+    CREATE TABLE IF NOT EXISTS buckets (
+        name TEXT PRIMARY KEY,
+        requests REAL NOT NULL,
+        tokens REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        concurrency REAL NOT NULL,
+        throttled INTEGER NOT NULL DEFAULT 0,
+        last_throttle_at REAL NOT NULL DEFAULT 0,
+        paused_until REAL NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS leases (
+        id TEXT PRIMARY KEY,
+        bucket TEXT NOT NULL,
+        pid INTEGER NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS leases_bucket ON leases(bucket, expires_at);
+    """
+
+    def __init__(self, path: str = f"{DEFAULT_STATE_DIR}/model_quota.sqlite3", rpm: float = 60,
+                 tpm: float = 1_000_000, max_concurrency: int = 8, min_concurrency: int = 1,
+                 decrease_factor: float = 0.5, throttle_cooldown_seconds: float = 2.0,
+                 max_wait_seconds: float = 300, lease_seconds: float = 300,
+                 output_tokens_estimate: int = 1000, retries_on_429: int = 3,
+                 models: Optional[Dict[str, Dict[str, float]]] = None, enabled: bool = True):
+        super().__init__(path)
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.decrease_factor = decrease_factor
+        self.throttle_cooldown_seconds = throttle_cooldown_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.lease_seconds = lease_seconds
+        self.output_tokens_estimate = output_tokens_estimate
+        self.retries_on_429 = retries_on_429
+        self.models = models or {}
+        self.enabled = enabled
+        self.waiting = 0
+        self.total_wait_ms = 0.0
+        self.acquired = 0
+        self._released: Dict[str, asyncio.Event] = {}
+
+    def _limits(self, bucket: str):
+        limits = self.models.get(bucket, {})
+        return limits.get("rpm", self.rpm), limits.get("tpm", self.tpm)
+
+    def _transaction(self, fn):
+        """Run fn(conn) inside BEGIN IMMEDIATE so concurrent processes serialise"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn)
+                conn.execute("COMMIT")
+                return result
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _refilled(self, conn, bucket: str, now: float):
+        rpm, tpm = self._limits(bucket)
+        row = conn.execute(
+            "SELECT requests, tokens, updated_at, concurrency, paused_until FROM buckets WHERE name = ?", (bucket,)
+        ).fetchone()
+        if row is None:
+            conn.execute(
+                "INSERT INTO buckets (name, requests, tokens, updated_at, concurrency) VALUES (?, ?, ?, ?, ?)",
+                (bucket, rpm, tpm, now, self.max_concurrency),
+            )
+            return rpm, tpm, float(self.max_concurrency), 0.0
+        requests, tokens, updated_at, concurrency, paused_until = row
+        elapsed = max(0.0, now - updated_at)
+        return (min(rpm, requests + elapsed * rpm / 60),
+                min(tpm, tokens + elapsed * tpm / 60),
+                concurrency, paused_until)
+
+    def _try_acquire(self, bucket: str, tokens_needed: float):
+        """Take a lease if the bucket allows it; otherwise return seconds to wait"""
+        rpm, tpm = self._limits(bucket)
+        tokens_needed = min(tokens_needed, tpm)
+
+        def attempt(conn):
+            now = time.time()
+            requests, tokens, concurrency, paused_until = self._refilled(conn, bucket, now)
+            in_flight = conn.execute(
+                "SELECT COUNT(*) FROM leases WHERE bucket = ? AND expires_at > ?", (bucket, now)
+            ).fetchone()[0]
+            if now >= paused_until and requests >= 1 and tokens >= tokens_needed and in_flight < int(concurrency):
+                lease_id = uuid.uuid4().hex
+                conn.execute(
+                    "UPDATE buckets SET requests = ?, tokens = ?, updated_at = ? WHERE name = ?",
+                    (requests - 1, tokens - tokens_needed, now, bucket),
+                )
+                conn.execute(
+                    "INSERT INTO leases (id, bucket, pid, expires_at) VALUES (?, ?, ?, ?)",
+                    (lease_id, bucket, os.getpid(), now + self.lease_seconds),
+                )
+                return lease_id, 0.0
+            conn.execute(
+                "UPDATE buckets SET requests = ?, tokens = ?, updated_at = ? WHERE name = ?",
+                (requests, tokens, now, bucket),
+            )
+            wait = max(0.05, paused_until - now)  # 0.05: poll for slots freed by other processes
+            if requests < 1:
+                wait = max(wait, (1 - requests) * 60 / rpm)
+            if tokens < tokens_needed:
+                wait = max(wait, (tokens_needed - tokens) * 60 / tpm)
+            return None, wait
+
+        try:
+            return self._transaction(attempt)
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) and "busy" not in str(e):
+                raise
+            return None, 0.05
+
+    async def acquire(self, bucket: str, tokens: float, max_wait: Optional[float] = None) -> Optional[str]:
+        """Wait (queue) until the bucket admits the call; returns a lease id for release()"""
+        if not self.enabled:
+            return None
+        max_wait = self.max_wait_seconds if max_wait is None else min(max_wait, self.max_wait_seconds)
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            while True:
+                lease_id, wait = await self.run(self._try_acquire, bucket, tokens)
+                if lease_id is not None:
+                    self.acquired += 1
+                    self.total_wait_ms += (time.monotonic() - start) * 1000
+                    return lease_id
+                remaining = max_wait - (time.monotonic() - start)
+                if remaining <= 0:
+                    raise RateLimitTimeout(f"Rate limit for {bucket} did not admit the call within {max_wait:.1f}s")
+                # Calls finishing in this process wake waiters early; other processes are polled
+                released = self._released.setdefault(bucket, asyncio.Event())
+                released.clear()
+                try:
+                    await asyncio.wait_for(released.wait(), timeout=min(wait, 1.0, remaining))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.waiting -= 1
+
+    async def release(self, bucket: str, lease_id: Optional[str], throttled: bool = False):
+        """Return the lease and adapt the concurrency limit (AIMD)"""
+        if not self.enabled or lease_id is None:
+            return
+        await self.run(self._return_lease, bucket, lease_id, throttled)
+        released = self._released.get(bucket)
+        if released is not None:
+            released.set()
+
+    def _return_lease(self, bucket: str, lease_id: str, throttled: bool):
+
+        def update(conn):
+            now = time.time()
+            conn.execute("DELETE FROM leases WHERE id = ? OR expires_at <= ?", (lease_id, now))
+            row = conn.execute(
+                "SELECT concurrency, last_throttle_at FROM buckets WHERE name = ?", (bucket,)
+            ).fetchone()
+            if row is None:
+                return
+            concurrency, last_throttle_at = row
+            if throttled:
+                # Many calls see the same 429 burst; only back off once per cooldown
+                if now - last_throttle_at >= self.throttle_cooldown_seconds:
+                    concurrency = max(self.min_concurrency, concurrency * self.decrease_factor)
+                    last_throttle_at = now
+                conn.execute(
+                    "UPDATE buckets SET concurrency = ?, throttled = throttled + 1, last_throttle_at = ?, "
+                    "paused_until = MAX(paused_until, ?) WHERE name = ?",
+                    (concurrency, last_throttle_at, now + self.throttle_cooldown_seconds, bucket),
+                )
+            else:
+                concurrency = min(self.max_concurrency, concurrency + 1.0 / max(concurrency, 1.0))
+                conn.execute("UPDATE buckets SET concurrency = ? WHERE name = ?", (concurrency, bucket))
+
+        # A lost release would hold the slot until the lease expires, so keep trying through lock contention
+        for _ in range(40):
+            try:
+                return self._transaction(update)
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) and "busy" not in str(e):
+                    raise
+        log_event("rate_limit.release_failed", "warning", bucket=bucket, lease_id=lease_id)
+
+    def estimate_tokens(self, prompt_tokens: int) -> int:
+        return prompt_tokens + self.output_tokens_estimate
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.enabled:
+            return {"enabled": False}
+        now = time.time()
+        buckets = {}
+        for name, requests, tokens, updated_at, concurrency, throttled in self._execute(
+            "SELECT name, requests, tokens, updated_at, concurrency, throttled FROM buckets ORDER BY name"
+        ):
+            rpm, tpm = self._limits(name)
+            elapsed = max(0.0, now - updated_at)
+            in_flight = self._execute(
+                "SELECT COUNT(*) FROM leases WHERE bucket = ? AND expires_at > ?", (name, now)
+            )[0][0]
+            buckets[name] = {
+                "rpm": rpm,
+                "tpm": tpm,
+                "requests_available": round(min(rpm, requests + elapsed * rpm / 60), 2),
+                "tokens_available": round(min(tpm, tokens + elapsed * tpm / 60)),
+                "concurrency_limit": round(concurrency, 2),
+                "in_flight": in_flight,
+                "throttled_total": throttled,
+            }
+        return {
+            "enabled": True,
+            "path": self.path,
+            "waiting_in_this_worker": self.waiting,
+            "avg_wait_ms": round(self.total_wait_ms / self.acquired, 1) if self.acquired else None,
+            "buckets": buckets,
+        }
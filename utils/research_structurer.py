@@ -0,0 +1,236 @@
+#  utils/research_structurer.py
+
+import hashlib
+import re
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+
+# Deterministic, single-pass structuring of raw research dumps. Every line is
+# visited once and every regex below is anchored or bounded, so run time is
+# linear in the input size.
+
+_MD_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*$")
+_SETEXT_RE = re.compile(r"^(=+|-+)$")
+_NUMBERED_HEADING_RE = re.compile(r"^(\d+(?:\.\d+)*)[.)]?\s+([A-Z][^.!?]{0,80})$")
+_NUMBERED_LINE_RE = re.compile(r"^\d+(?:\.\d+)*[.)]?\s+\S")
+_BULLET_RE = re.compile(r"^(?:[-*•+▪◦]|\d{1,3}[.)]|[a-zA-Z][.)])\s+(.+)$")
+_URL_RE = re.compile(r"https?://[^\s<>()\[\]\"'`]+")
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+_FACT_RE = re.compile(
+    r"\d[\d,.]*\s*(?:%|percent|per cent|x\b|million|billion|trillion|thousand|k\b|m\b|bn\b)"
+    r"|[$€£¥]\s?\d"
+    r"|\b(?:19|20)\d{2}\b"
+    r"|\b\d[\d,.]*\s*(?:users|people|patients|companies|countries|units|hours|days|years|months)\b",
+    re.IGNORECASE,
+)
+_DIGIT_RE = re.compile(r"\d")
+_BOLD_HEADING_RE = re.compile(r"^\*\*([^*]{1,80})\*\*:?$")
+
+
+def _iter_lines(text: str) -> Iterator[str]:
+    start = 0
+    length = len(text)
+    while start < length:
+        end = text.find("\n", start)
+        if end == -1:
+            end = length
+        yield text[start:end]
+        start = end + 1
+
+
+def _collapse(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _fingerprint(text: str) -> bytes:
+    normalized = _collapse(text.lower())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest()
+
+
+def _heading_of(line: str, next_line: Optional[str], standalone: bool = False) -> Optional[tuple]:
+    """Return (level, title) if the stripped line looks like a heading.
+
+    A numbered line ("2. Market Size") only counts when ``standalone``:
+    otherwise it is taken to be a list item.
+    """
+    match = _MD_HEADING_RE.match(line)
+    if match:
+        return len(match.group(1)), match.group(2).strip()
+    if next_line is not None and _SETEXT_RE.match(next_line) and len(line) <= 120:
+        return (1 if next_line[0] == "=" else 2), line
+    match = _BOLD_HEADING_RE.match(line)
+    if match:
+        return 3, match.group(1).strip()
+    match = _NUMBERED_HEADING_RE.match(line) if standalone else None
+    if match and len(line) <= 80:
+        return min(match.group(1).count(".") + 2, 6), line
+    if len(line) <= 60 and line.endswith(":") and not _BULLET_RE.match(line):
+        return 3, line[:-1].strip()
+    if len(line) <= 80 and line.isupper() and sum(c.isalpha() for c in line) >= 3:
+        return 2, line.title()
+    return None
+
+
+class _Section:
+    __slots__ = ("heading", "level", "paragraphs", "bullets")
+
+    def __init__(self, heading: str, level: int):
+        self.heading = heading
+        self.level = level
+        self.paragraphs: List[str] = []
+        self.bullets: List[str] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "heading": self.heading,
+            "level": self.level,
+            "paragraphs": self.paragraphs,
+            "bullets": self.bullets,
+        }
+
+
+def structure_research(raw: str, max_facts: int = 200) -> Dict[str, Any]:
+    """Split raw research into sections and extract bullets, URLs and numeric facts"""
+    sections: List[_Section] = [_Section("Overview", 1)]
+    seen_blocks = set()
+    seen_urls = set()
+    urls: List[str] = []
+    facts: List[str] = []
+    seen_facts = set()
+    stats = {"input_chars": len(raw), "lines": 0, "duplicate_blocks_removed": 0}
+    paragraph: List[str] = []
+
+    def flush_paragraph():
+        if not paragraph:
+            return
+        text = _collapse(" ".join(paragraph))
+        paragraph.clear()
+        if not text:
+            return
+        key = _fingerprint(text)
+        if key in seen_blocks:
+            stats["duplicate_blocks_removed"] += 1
+            return
+        seen_blocks.add(key)
+        sections[-1].paragraphs.append(text)
+        collect_facts(text)
+
+    def collect_facts(text: str):
+        if len(facts) >= max_facts or not _DIGIT_RE.search(text):
+            return
+        for sentence in _SENTENCE_SPLIT_RE.split(text):
+            sentence = sentence.strip()
+            if len(sentence) < 12 or len(sentence) > 400 or not _FACT_RE.search(sentence):
+                continue
+            key = _fingerprint(sentence)
+            if key not in seen_facts:
+                seen_facts.add(key)
+                facts.append(sentence)
+                if len(facts) >= max_facts:
+                    return
+
+    lines = _iter_lines(raw)
+    # Lines read ahead but not yet visited; only blank lines pile up here, so
+    # every line is still read once
+    upcoming: deque = deque()
+
+    def peek(offset: int) -> Optional[str]:
+        while len(upcoming) <= offset:
+            line = next(lines, None)
+            if line is None:
+                return None
+            upcoming.append(line)
+        return upcoming[offset]
+
+    def take() -> Optional[str]:
+        return upcoming.popleft() if upcoming else next(lines, None)
+
+    def standalone_numbered(previous: str) -> bool:
+        """A numbered line with blank lines around it and body text (not another numbered line) after"""
+        if previous or peek(0) is None or peek(0).strip():
+            return False
+        offset = 1
+        while peek(offset) is not None and not peek(offset).strip():
+            offset += 1
+        body = peek(offset)
+        return body is not None and not _NUMBERED_LINE_RE.match(body.strip())
+
+    previous = ""
+    current = take()
+    while current is not None:
+        following = peek(0)
+        stats["lines"] += 1
+        line = current.strip()
+
+        for url in _URL_RE.findall(line):
+            url = url.rstrip(".,;:")
+            if url not in seen_urls:
+                seen_urls.add(url)
+                urls.append(url)
+
+        if not line:
+            flush_paragraph()
+        elif _SETEXT_RE.match(line) and not paragraph:
+            pass  # underline already consumed with its heading, or a bare rule
+        else:
+            standalone = bool(_NUMBERED_HEADING_RE.match(line)) and standalone_numbered(previous)
+            heading = _heading_of(line, following.strip() if following is not None else None, standalone)
+            bullet = None if heading else _BULLET_RE.match(line)
+            if heading:
+                flush_paragraph()
+                sections.append(_Section(heading[1], heading[0]))
+                if following is not None and _SETEXT_RE.match(following.strip()):
+                    line = take().strip()
+                    stats["lines"] += 1
+            elif bullet:
+                flush_paragraph()
+                item = _collapse(bullet.group(1))
+                key = _fingerprint(item)
+                if key in seen_blocks:
+                    stats["duplicate_blocks_removed"] += 1
+                else:
+                    seen_blocks.add(key)
+                    sections[-1].bullets.append(item)
+                    collect_facts(item)
+            else:
+                paragraph.append(line)
+        previous = line
+        current = take()
+    flush_paragraph()
+
+    # Drop the implicit overview if the text started with a heading
+    if not sections[0].paragraphs and not sections[0].bullets:
+        sections.pop(0)
+    stats["sections"] = len(sections)
+    stats["bullets"] = sum(len(s.bullets) for s in sections)
+    return {
+        "sections": [s.to_dict() for s in sections],
+        "urls": urls,
+        "numeric_facts": facts,
+        "stats": stats,
+    }
+
+
+def render_markdown(structured: Dict[str, Any]) -> str:
+    """Render structure_research output as clean markdown for downstream agents"""
+    out: List[str] = ["# Structured Research", ""]
+    for section in structured["sections"]:
+        out.append(f"{'#' * min(section['level'] + 1, 6)} {section['heading']}")
+        out.append("")
+        for paragraph in section["paragraphs"]:
+            out.append(paragraph)
+            out.append("")
+        if section["bullets"]:
+            out.extend(f"- {item}" for item in section["bullets"])
+            out.append("")
+    if structured["numeric_facts"]:
+        out.append("## Key Facts & Figures")
+        out.append("")
+        out.extend(f"- {fact}" for fact in structured["numeric_facts"])
+        out.append("")
+    if structured["urls"]:
+        out.append("## Sources")
+        out.append("")
+        out.extend(f"- {url}" for url in structured["urls"])
+        out.append("")
+    return "\n".join(out).strip() + "\n"
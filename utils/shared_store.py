@@ -0,0 +1,155 @@
+#  utils/shared_store.py
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_STATE_DIR = ".a2a_state"
+
+
+class _SQLiteBacked:
+    """Lazily opens one SQLite connection per process.
+
+    Connections must not cross ``fork()``, so uvicorn workers each reopen the
+    database the first time they touch it. WAL mode lets many workers read
+    while one writes. Async code reaches the database through ``run`` (or
+    ``submit`` for fire-and-forget writes), which use one dedicated thread
+    per store, so a busy database never stalls the event loop.
+    """
+
+    _schema = ""
+    # How long a statement waits for another process's write lock
+    _busy_timeout_seconds = 10.0
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._db_thread: Optional[ThreadPoolExecutor] = None
+        self._db_thread_pid: Optional[int] = None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._db_thread is None or self._db_thread_pid != os.getpid():
+            self._db_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{type(self).__name__}-db")
+            self._db_thread_pid = os.getpid()
+        return self._db_thread
+
+    async def run(self, fn, *args):
+        """Await a blocking call (e.g. self.get) on this store's database thread"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor(), fn, *args)
+
+    def submit(self, fn, *args) -> Future:
+        """Queue a blocking call on the database thread without waiting for it"""
+        future = self._executor().submit(fn, *args)
+        future.add_done_callback(self._report_failure)
+        return future
+
+    def _report_failure(self, future: Future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"⚠️ {type(self).__name__} background write failed: {future.exception()}")
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self._busy_timeout_seconds, check_same_thread=False,
+                                   isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self._schema)
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple = ()):
+        with self._lock:
+            return self._connection().execute(sql, params).fetchall()
+
+
+class SharedCache(_SQLiteBacked):
+    """SQLite-backed result cache shared by every worker process of a service"""
+
+    _schema = """
+    CREATE TABLE IF NOT EXISTS cache (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS cache_expires ON cache(expires_at);
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 3600, max_entries: int = 10000):
+        super().__init__(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._writes = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Stable hash of JSON-serialisable key parts"""
+        raw = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        rows = self._execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        expires_at = time.time() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        self._execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), expires_at),
+        )
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self.prune()
+
+    def prune(self):
+        """Drop expired entries and trim the table to max_entries"""
+        self._execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        self._execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        rows = self._execute("SELECT COUNT(*) FROM cache WHERE expires_at > ?", (time.time(),))
+        return {"entries": rows[0][0], "path": self.path}
+
+
+class SharedMetrics(_SQLiteBacked):
+    """Cross-process counters so /a2a/metrics reports totals for all workers"""
+
+    _schema = """
+    CREATE TABLE IF NOT EXISTS counters (
+        name TEXT PRIMARY KEY,
+        value REAL NOT NULL DEFAULT 0
+    );
+    """
+
+    def incr(self, name: str, amount: float = 1):
+        """Add to a counter; the write is queued on the database thread, so callers never block"""
+        self.submit(self._incr, name, amount)
+
+    def _incr(self, name: str, amount: float):
+        self._execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def snapshot(self) -> Dict[str, float]:
+        # Queued behind pending increments, so it sees every incr() made before it
+        return self._executor().submit(self._snapshot).result()
+
+    def _snapshot(self) -> Dict[str, float]:
+        return {name: value for name, value in self._execute("SELECT name, value FROM counters ORDER BY name")}